@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Mede a vazão do montador em programas gerados de 25 mil a 200 mil linhas e
+confere se o tempo cresce linearmente com o tamanho da entrada
+
+Para cada tamanho mostra o tempo de montagem, as linhas por segundo e o tempo
+por linha relativo ao menor programa. Sai com código 1 se o tempo por linha do
+maior programa passar de --limite vezes o do menor. No maior programa também
+compara montar e carregar no Simulador passando pelos .bin e em memória.
+
+Exemplos:
+    python benchmarks/benchmark_montador.py
+    python benchmarks/benchmark_montador.py --blocos 10000 40000 --repeticoes 5
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(DIRETORIO))
+
+from montador import Montador
+from simulador import Simulador
+from suite_desempenho import cronometrar, gerar_programa_grande
+
+
+def medir(blocos, repeticoes):
+    """(linhas, melhor tempo em segundos) da montagem de um programa com `blocos` blocos"""
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, 'grande.asm')
+        gerar_programa_grande(caminho, blocos)
+        linhas = len(Montador().ler_arquivo(caminho))
+        base = os.path.join(tmp, 'grande')
+        return linhas, cronometrar(lambda: Montador().montar(caminho, base), repeticoes)
+
+
+def medir_carga(blocos, repeticoes):
+    """Melhor tempo de montar e criar o Simulador (pelos .bin, em memória)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, 'grande.asm')
+        gerar_programa_grande(caminho, blocos)
+        base = os.path.join(tmp, 'grande')
+
+        def por_arquivos():
+            Montador().montar(caminho, base)
+            Simulador(f"{base}_data.bin", f"{base}_text.bin")
+
+        def em_memoria():
+            Simulador(*Montador().montar(caminho, gravar=False))
+
+        return cronometrar(por_arquivos, repeticoes), cronometrar(em_memoria, repeticoes)
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Vazão e escalabilidade do montador")
+    parser.add_argument('--blocos', type=int, nargs='+', default=[2500, 5000, 10000, 20000],
+                        help="tamanhos em blocos de 10 linhas (padrão: 2500 5000 10000 20000)")
+    parser.add_argument('--repeticoes', type=int, default=3,
+                        help="montagens por tamanho; vale a mais rápida (padrão: 3)")
+    parser.add_argument('--limite', type=float, default=1.5,
+                        help="razão máxima entre o tempo por linha do maior e do menor programa (padrão: 1.5)")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    if args.repeticoes < 1:
+        print("Erro: --repeticoes deve ser pelo menos 1", file=sys.stderr)
+        return 2
+
+    print(f"{'linhas':>8} {'tempo (s)':>10} {'linhas/s':>10} {'tempo/linha':>12}")
+    medidas = [medir(blocos, args.repeticoes) for blocos in sorted(args.blocos)]
+    por_linha_menor = medidas[0][1] / medidas[0][0]
+    for linhas, tempo in medidas:
+        relativo = (tempo / linhas) / por_linha_menor
+        print(f"{linhas:>8} {tempo:>10.3f} {linhas / tempo:>10,.0f} {relativo:>11.2f}x")
+
+    arquivos, memoria = medir_carga(max(args.blocos), args.repeticoes)
+    print(f"\nMontar e carregar {medidas[-1][0]} linhas: {arquivos:.3f} s pelos .bin, "
+          f"{memoria:.3f} s em memória")
+
+    razao = (medidas[-1][1] / medidas[-1][0]) / por_linha_menor
+    if razao > args.limite:
+        print(f"\nCrescimento não linear: o tempo por linha do maior programa é {razao:.2f}x o do menor")
+        return 1
+    print(f"\nCrescimento linear: tempo por linha do maior programa {razao:.2f}x o do menor")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Mede a vazão do simulador em um laço longo: ciclos simulados por segundo no
+modo pipeline e instruções por segundo no modo funcional
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(DIRETORIO))
+
+from montador import Montador
+from preditor import PREDITORES
+from simulador import Simulador
+
+
+# Programas com NOPs entre as dependências e as mesmas versões sem eles
+PARES_FORWARDING = [
+    (os.path.join(os.path.dirname(DIRETORIO), 'TesteASM.asm'), os.path.join(DIRETORIO, 'teste_sem_nops.asm')),
+    (os.path.join(DIRETORIO, 'laco_longo.asm'), os.path.join(DIRETORIO, 'laco_longo_sem_nops.asm')),
+]
+
+
+def medir(arquivo_asm, modo='pipeline', repeticoes=5, **opcoes):
+    """Executa o programa algumas vezes e devolve (ciclos, melhor ciclos/s).
+
+    opcoes vão direto para o Simulador (forwarding, detectar_load_use).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'prog')
+        Montador().montar(arquivo_asm, base)
+
+        melhor = 0.0
+        ciclos = 0
+        for _ in range(repeticoes):
+            sim = Simulador(f"{base}_data.bin", f"{base}_text.bin", modo=modo, **opcoes)
+            inicio = time.perf_counter()
+            if modo == 'funcional':
+                sim.executar_funcional()
+            else:
+                while not sim.terminou():
+                    sim.executar_ciclo()
+            duracao = time.perf_counter() - inicio
+            ciclos = sim.ciclo
+            melhor = max(melhor, ciclos / duracao)
+    return ciclos, melhor
+
+
+def medir_preditor(arquivo_asm, preditor, estagio_desvio='MEM'):
+    """Ciclos e precisão de um preditor de desvios no pipeline"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'prog')
+        Montador().montar(arquivo_asm, base)
+        sim = Simulador(f"{base}_data.bin", f"{base}_text.bin", preditor=preditor,
+                        estagio_desvio=estagio_desvio)
+        while not sim.terminou():
+            sim.executar_ciclo()
+        return sim.ciclo, sim.estatisticas_desvio.precisao()
+
+
+def registradores_criados_por_ciclo(arquivo_asm, ciclos=10000):
+    """Conta quantos objetos novos de registrador de pipeline surgem por ciclo.
+
+    Todos os objetos vistos são mantidos vivos durante a medição, então ids
+    repetidos significam de fato o mesmo objeto reaproveitado.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'prog')
+        Montador().montar(arquivo_asm, base)
+        sim = Simulador(f"{base}_data.bin", f"{base}_text.bin")
+
+        vistos = []
+        executados = 0
+        while executados < ciclos and not sim.terminou():
+            sim.executar_ciclo()
+            vistos.extend((sim.IF_ID, sim.ID_EX, sim.EX_MEM, sim.MEM_WB))
+            executados += 1
+        return len({id(obj) for obj in vistos}) / max(executados, 1)
+
+
+def main():
+    arquivo = sys.argv[1] if len(sys.argv) > 1 else os.path.join(DIRETORIO, 'laco_longo.asm')
+    nome = os.path.basename(arquivo)
+
+    ciclos, por_segundo = medir(arquivo)
+    print(f"{nome} [pipeline]: {ciclos} ciclos, {por_segundo:,.0f} ciclos/s")
+
+    criados = registradores_criados_por_ciclo(arquivo)
+    print(f"Registradores de pipeline alocados por ciclo: {criados:.4f}")
+
+    instrucoes, instr_por_segundo = medir(arquivo, 'funcional')
+    print(f"{nome} [funcional]: {instrucoes} instruções, {instr_por_segundo:,.0f} instruções/s")
+
+    # O modo funcional executa uma instrução por "ciclo"; a comparação justa é o
+    # tempo total para chegar ao mesmo estado arquitetural
+    tempo_pipeline = ciclos / por_segundo
+    tempo_funcional = instrucoes / instr_por_segundo
+    print(f"Aceleração do modo funcional: {tempo_pipeline / tempo_funcional:.1f}x")
+
+    print("\nForwarding + parada em load-use (programa sem NOPs) contra o original com NOPs:")
+    for com_nops, sem_nops in PARES_FORWARDING:
+        ciclos_nops, _ = medir(com_nops, repeticoes=1)
+        ciclos_fwd, _ = medir(sem_nops, repeticoes=1, forwarding=True, detectar_load_use=True)
+        reducao = 100 * (ciclos_nops - ciclos_fwd) / ciclos_nops
+        print(f"  {os.path.basename(com_nops)}: {ciclos_nops} -> {ciclos_fwd} ciclos ({reducao:.1f}% a menos)")
+
+    print(f"\nPreditores de desvio em {nome} (ciclos, precisão):")
+    for estagio in Simulador.ESTAGIOS_DESVIO:
+        resultados = []
+        for preditor in PREDITORES:
+            ciclos_pred, precisao = medir_preditor(arquivo, preditor, estagio)
+            resultados.append(f"{preditor} {ciclos_pred} ({100 * precisao:.1f}%)")
+        print(f"  resolvido no {estagio}: " + ", ".join(resultados))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Compara o modo funcional interpretado com o modo funcional com tradução de
+blocos (tradutor.py) nos kernels da suíte de desempenho
+
+Para cada kernel mostra as instruções por segundo nos dois casos, o ganho e
+quantos blocos foram traduzidos. Sai com código 1 se algum kernel terminar com
+registradores, memória ou contagem de instruções diferentes nos dois casos.
+
+Exemplos:
+    python benchmarks/benchmark_tradutor.py
+    python benchmarks/benchmark_tradutor.py --repeticoes 5 --limiar 1
+"""
+
+import argparse
+import os
+import sys
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(DIRETORIO))
+
+from montador import Montador
+from simulador import Simulador
+from suite_desempenho import KERNELS, cronometrar
+from tradutor import LIMIAR_TRADUCAO, Tradutor
+
+
+def estado(sim):
+    return sim.ciclo, list(sim.bancoReg), list(sim.memoria_dados.palavras())
+
+
+def medir(arquivo_asm, repeticoes, limiar):
+    """(instruções, instr/s interpretado, instr/s traduzido, blocos traduzidos, mesmo resultado)"""
+    dados, texto = Montador().montar(arquivo_asm, gravar=False)
+    finais = {}
+    tradutores = []
+
+    def interpretar(sim):
+        sim.executar_funcional()
+        finais['interpretado'] = sim
+
+    def traduzir(sim):
+        # Um Tradutor novo por execução: a tradução entra no tempo medido
+        tradutores.append(Tradutor(limiar))
+        sim.executar_funcional(tradutor=tradutores[-1])
+        finais['traduzido'] = sim
+
+    def preparar():
+        return Simulador(dados, texto, modo='funcional')
+
+    interpretado = cronometrar(interpretar, repeticoes, preparar)
+    traduzido = cronometrar(traduzir, repeticoes, preparar)
+
+    instrucoes = finais['interpretado'].ciclo
+    return (instrucoes, instrucoes / interpretado, instrucoes / traduzido, tradutores[-1].traduzidos,
+            estado(finais['interpretado']) == estado(finais['traduzido']))
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Modo funcional com e sem tradução de blocos")
+    parser.add_argument('--repeticoes', type=int, default=3,
+                        help="amostras por kernel; vale a mais rápida (padrão: 3)")
+    parser.add_argument('--limiar', type=int, default=LIMIAR_TRADUCAO,
+                        help=f"execuções de um bloco antes de traduzi-lo (padrão: {LIMIAR_TRADUCAO})")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    if args.repeticoes < 1 or args.limiar < 1:
+        print("Erro: --repeticoes e --limiar devem ser pelo menos 1", file=sys.stderr)
+        return 2
+
+    print(f"{'kernel':<24} {'instruções':>10} {'interpretado':>13} {'traduzido':>13} {'ganho':>7} {'blocos':>7}")
+    divergentes = []
+    for nome, arquivo, _, _ in KERNELS:
+        if arquivo is None:
+            continue
+        instrucoes, interpretado, traduzido, blocos, igual = medir(
+            os.path.join(DIRETORIO, arquivo), args.repeticoes, args.limiar)
+        print(f"{nome:<24} {instrucoes:>10} {interpretado:>13,.0f} {traduzido:>13,.0f} "
+              f"{traduzido / interpretado:>6.2f}x {blocos:>7}")
+        if not igual:
+            divergentes.append(nome)
+
+    if divergentes:
+        print(f"\nResultado diferente do interpretador em: {', '.join(divergentes)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Mede quantas instâncias por segundo o SimuladorVetorizado executa com imagens
+de dados aleatórias, comparado com o modo funcional do Simulador
+
+Cada kernel roda com --instancias imagens de dados diferentes (vetores
+aleatórios no soma_vetor, permutações no bubble_sort, que separa as instâncias
+nos desvios). Algumas instâncias são conferidas com o Simulador; sai com código
+1 se alguma terminar com registradores ou memória diferentes. Precisa do NumPy.
+
+Exemplos:
+    python benchmarks/benchmark_vetorizado.py
+    python benchmarks/benchmark_vetorizado.py --instancias 100 1000 5000 --conferir 20
+"""
+
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(DIRETORIO))
+
+import simulador_vetorizado
+from montador import Montador
+from simulador import Simulador
+from simulador_vetorizado import SimuladorVetorizado
+
+
+def vetor_aleatorio(dados, rnd):
+    # tamanho, repetições e resultado, seguidos dos 64 elementos
+    return bytes(dados[:12]) + struct.pack('<64i', *(rnd.randint(-1000, 1000) for _ in range(64)))
+
+
+def permutacao(dados, rnd):
+    # tamanho e resultado, seguidos dos 100 elementos
+    vetor = list(range(1, 101))
+    rnd.shuffle(vetor)
+    return bytes(dados[:8]) + struct.pack('<100i', *vetor)
+
+
+# (nome, arquivo .asm em benchmarks/, gerador de imagens de dados)
+KERNELS = [
+    ('soma_vetor', 'soma_vetor.asm', vetor_aleatorio),
+    ('bubble_sort', 'bubble_sort.asm', permutacao),
+]
+
+
+def medir(arquivo_asm, gerar, instancias, conferir, semente=0):
+    """(instâncias/s vetorizado, instâncias/s no Simulador, passos, instâncias divergentes)"""
+    dados, texto = Montador().montar(arquivo_asm, gravar=False)
+    rnd = random.Random(semente)
+    imagens = [gerar(dados, rnd) for _ in range(instancias)]
+
+    inicio = time.perf_counter()
+    lote = SimuladorVetorizado(imagens, texto)
+    passos = lote.executar()
+    vetorizado = instancias / (time.perf_counter() - inicio)
+
+    divergentes = []
+    inicio = time.perf_counter()
+    for i in range(min(conferir, instancias)):
+        sim = Simulador(imagens[i], texto, modo='funcional')
+        sim.executar_funcional()
+        if (lote.registradores(i) != sim.bancoReg
+                or lote.memoria_instancia(i).estado() != sim.memoria_dados.estado()):
+            divergentes.append(i)
+    escalar = min(conferir, instancias) / (time.perf_counter() - inicio)
+    return vetorizado, escalar, passos, divergentes
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Vazão do SimuladorVetorizado")
+    parser.add_argument('--instancias', type=int, nargs='+', default=[100, 1000],
+                        help="quantidades de instâncias por lote (padrão: 100 1000)")
+    parser.add_argument('--conferir', type=int, default=5,
+                        help="instâncias de cada lote executadas também no Simulador (padrão: 5)")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    if simulador_vetorizado.np is None:
+        print("Erro: o SimuladorVetorizado precisa do NumPy (pip install numpy)", file=sys.stderr)
+        return 2
+    if min(args.instancias) < 1 or args.conferir < 1:
+        print("Erro: --instancias e --conferir devem ser pelo menos 1", file=sys.stderr)
+        return 2
+
+    print(f"{'kernel':<14} {'instâncias':>10} {'passos':>8} {'vetorizado':>12} {'Simulador':>11} {'ganho':>8}")
+    erros = False
+    for nome, arquivo, gerar in KERNELS:
+        for instancias in args.instancias:
+            vetorizado, escalar, passos, divergentes = medir(
+                os.path.join(DIRETORIO, arquivo), gerar, instancias, args.conferir)
+            print(f"{nome:<14} {instancias:>10} {passos:>8} {vetorizado:>10,.0f}/s {escalar:>9,.1f}/s "
+                  f"{vetorizado / escalar:>7.1f}x")
+            if divergentes:
+                print(f"  instâncias diferentes do Simulador: {divergentes}")
+                erros = True
+    return 1 if erros else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+.data
+tamanho: .word 100
+resultado: .word 0
+vetor: .word 100, 99, 98, 97, 96, 95, 94, 93, 92, 91, 90, 89, 88, 87, 86, 85, 84, 83, 82, 81, 80, 79, 78, 77, 76, 75, 74, 73, 72, 71, 70, 69, 68, 67, 66, 65, 64, 63, 62, 61, 60, 59, 58, 57, 56, 55, 54, 53, 52, 51, 50, 49, 48, 47, 46, 45, 44, 43, 42, 41, 40, 39, 38, 37, 36, 35, 34, 33, 32, 31, 30, 29, 28, 27, 26, 25, 24, 23, 22, 21, 20, 19, 18, 17, 16, 15, 14, 13, 12, 11, 10, 9, 8, 7, 6, 5, 4, 3, 2, 1
+
+.text
+    LW x1, 0(x0)          # x1 = n
+    ADDI x2, x1, -1       # x2 = comparações na passada (n - 1, diminui a cada passada)
+
+passada:
+    ADDI x3, x0, vetor    # x3 = &vetor[j]
+    ADDI x4, x0, 0        # x4 = j
+    ADDI x9, x0, 0        # x9 = trocas feitas na passada
+
+compara:
+    LW x5, 0(x3)
+    LW x6, 4(x3)
+    BGE x6, x5, sem_troca
+    SW x6, 0(x3)
+    SW x5, 4(x3)
+    ADDI x9, x9, 1
+sem_troca:
+    ADDI x3, x3, 4
+    ADDI x4, x4, 1
+    BLT x4, x2, compara
+
+    ADDI x2, x2, -1
+    BEQ x9, x0, confere   # nenhuma troca: já está ordenado
+    BLT x0, x2, passada
+
+confere:
+    ADDI x3, x0, vetor
+    ADDI x4, x0, 1
+    ADDI x10, x0, 0       # x10 = pares vizinhos em ordem
+
+conta:
+    LW x5, 0(x3)
+    LW x6, 4(x3)
+    BLT x6, x5, fora_de_ordem
+    ADDI x10, x10, 1
+fora_de_ordem:
+    ADDI x3, x3, 4
+    ADDI x4, x4, 1
+    BLT x4, x1, conta
+
+    SW x10, 4(x0)         # resultado = n - 1 = 99
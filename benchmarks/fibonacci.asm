@@ -0,0 +1,29 @@
+.data
+n: .word 40
+repeticoes: .word 300
+resultado: .word 0
+tabela: .word 0, 1        # os demais termos são escritos pelo programa
+
+.text
+    LW x1, 0(x0)          # x1 = n
+    LW x2, 4(x0)          # x2 = repetições
+
+repete:
+    ADDI x3, x0, tabela   # x3 = &fib[i - 2]
+    ADDI x4, x0, 0        # x4 = fib(i - 2)
+    ADDI x5, x0, 1        # x5 = fib(i - 1)
+    ADDI x6, x0, 2        # x6 = i
+
+termo:
+    ADD x7, x4, x5        # x7 = fib(i)
+    SW x7, 8(x3)
+    ADDI x4, x5, 0
+    ADDI x5, x7, 0
+    ADDI x3, x3, 4
+    ADDI x6, x6, 1
+    BGE x1, x6, termo
+
+    ADDI x2, x2, -1
+    BNE x2, x0, repete
+
+    SW x5, 8(x0)          # resultado = fib(40) = 102334155
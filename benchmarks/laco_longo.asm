@@ -0,0 +1,18 @@
+.data
+iteracoes: .word 20000
+resultado: .word 0
+
+.text
+    LW x1, 0(x0)          # x1 = número de iterações
+    ADDI x2, x0, 0        # x2 = acumulador
+    ADDI x0, x0, 0
+    ADDI x0, x0, 0
+
+laco:
+    ADDI x2, x2, 3
+    ADDI x1, x1, -1
+    ADDI x0, x0, 0
+    ADDI x0, x0, 0
+    BNE x1, x0, laco
+
+    SW x2, 4(x0)          # resultado = 3 * iterações
@@ -0,0 +1,15 @@
+.data
+iteracoes: .word 20000
+resultado: .word 0
+
+.text
+    # laco_longo.asm sem os NOPs: precisa de forwarding e da detecção de load-use
+    LW x1, 0(x0)          # x1 = número de iterações
+    ADDI x2, x0, 0        # x2 = acumulador
+
+laco:
+    ADDI x2, x2, 3
+    ADDI x1, x1, -1
+    BNE x1, x0, laco      # x1 vem de EX_MEM
+
+    SW x2, 4(x0)          # resultado = 3 * iterações
@@ -0,0 +1,48 @@
+.data
+n: .word 12
+resultado: .word 0
+a: .word 1, 2, 3, 4, 5, 6, 7, 1, 2, 3, 4, 5, 2, 3, 4, 5, 6, 7, 1, 2, 3, 4, 5, 6, 3, 4, 5, 6, 7, 1, 2, 3, 4, 5, 6, 7, 4, 5, 6, 7, 1, 2, 3, 4, 5, 6, 7, 1, 5, 6, 7, 1, 2, 3, 4, 5, 6, 7, 1, 2, 6, 7, 1, 2, 3, 4, 5, 6, 7, 1, 2, 3, 7, 1, 2, 3, 4, 5, 6, 7, 1, 2, 3, 4, 1, 2, 3, 4, 5, 6, 7, 1, 2, 3, 4, 5, 2, 3, 4, 5, 6, 7, 1, 2, 3, 4, 5, 6, 3, 4, 5, 6, 7, 1, 2, 3, 4, 5, 6, 7, 4, 5, 6, 7, 1, 2, 3, 4, 5, 6, 7, 1, 5, 6, 7, 1, 2, 3, 4, 5, 6, 7, 1, 2
+b: .word 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4, 5, 1, 2, 3, 4
+c: .word 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0
+
+.text
+    LW x1, 0(x0)          # x1 = n
+    ADD x2, x1, x1
+    ADD x2, x2, x2        # x2 = 4n, bytes por linha
+    ADDI x20, x0, 0       # x20 = soma dos elementos de C
+    ADDI x3, x0, 0        # x3 = i
+    ADDI x11, x0, a       # x11 = &A[i][0]
+    ADDI x13, x0, c       # x13 = &C[i][j]
+
+linha:
+    ADDI x4, x0, 0        # x4 = j
+    ADDI x12, x0, b       # x12 = &B[0][j]
+
+coluna:
+    ADDI x5, x0, 0        # x5 = k
+    ADDI x6, x11, 0       # x6 = &A[i][k]
+    ADDI x7, x12, 0       # x7 = &B[k][j]
+    ADDI x10, x0, 0       # x10 = C[i][j]
+
+produto:
+    LW x8, 0(x6)
+    LW x9, 0(x7)
+    MUL x8, x8, x9
+    ADD x10, x10, x8
+    ADDI x6, x6, 4
+    ADD x7, x7, x2
+    ADDI x5, x5, 1
+    BLT x5, x1, produto
+
+    SW x10, 0(x13)
+    ADD x20, x20, x10
+    ADDI x13, x13, 4
+    ADDI x12, x12, 4
+    ADDI x4, x4, 1
+    BLT x4, x1, coluna
+
+    ADD x11, x11, x2
+    ADDI x3, x3, 1
+    BLT x3, x1, linha
+
+    SW x20, 4(x0)         # resultado = soma de C = 20806
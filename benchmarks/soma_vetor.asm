@@ -0,0 +1,26 @@
+.data
+tamanho: .word 64
+repeticoes: .word 200
+resultado: .word 0
+vetor: .word 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 26, 27, 28, 29, 30, 31, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41, 42, 43, 44, 45, 46, 47, 48, 49, 50, 51, 52, 53, 54, 55, 56, 57, 58, 59, 60, 61, 62, 63, 64
+
+.text
+    LW x1, 0(x0)          # x1 = tamanho do vetor
+    LW x2, 4(x0)          # x2 = repetições
+    ADDI x10, x0, 0       # x10 = soma acumulada
+
+externo:
+    ADDI x3, x0, vetor    # x3 = endereço do elemento
+    ADDI x4, x0, 0        # x4 = índice
+
+interno:
+    LW x5, 0(x3)
+    ADD x10, x10, x5
+    ADDI x3, x3, 4
+    ADDI x4, x4, 1
+    BLT x4, x1, interno
+
+    ADDI x2, x2, -1
+    BNE x2, x0, externo
+
+    SW x10, 8(x0)         # resultado = repetições * (1 + ... + 64) = 416000
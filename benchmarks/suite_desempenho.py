@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Suíte de kernels para medir o montador e o simulador e detectar regressões
+
+Para cada kernel mede linhas montadas por segundo, ciclos por segundo no
+pipeline e instruções por segundo no modo funcional, confere o resultado que o
+programa grava na memória e compara com a referência salva em
+referencia_desempenho.json. Sai com código 1 se alguma taxa cair mais que a
+tolerância, se o número de ciclos mudar ou se algum resultado estiver errado.
+
+A referência vale para a máquina onde foi gravada. Ela guarda a mediana de
+algumas medidas, e um kernel abaixo dela é medido de novo antes de a queda ser
+acusada, para que um pico de carga da máquina não pareça regressão do código.
+
+Exemplos:
+    python benchmarks/suite_desempenho.py
+    python benchmarks/suite_desempenho.py --kernels bubble_sort fibonacci --repeticoes 5
+    python benchmarks/suite_desempenho.py --salvar-referencia
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(DIRETORIO))
+
+from montador import Montador
+from simulador import Simulador
+
+REFERENCIA = os.path.join(DIRETORIO, 'referencia_desempenho.json')
+
+# Programas sem NOPs entre as dependências só dão o resultado certo no pipeline
+# com forwarding e parada em load-use
+FORWARDING = {'forwarding': True, 'detectar_load_use': True}
+
+# Blocos de 10 linhas do programa gerado (100 mil linhas)
+BLOCOS_PROGRAMA_GRANDE = 10000
+
+# (nome, arquivo .asm em benchmarks/ ou None para o programa gerado, opções do
+# Simulador no pipeline, (endereço, valor) que o programa deve gravar)
+KERNELS = [
+    ('laco_longo', 'laco_longo.asm', {}, (4, 60000)),
+    ('laco_longo_sem_nops', 'laco_longo_sem_nops.asm', FORWARDING, (4, 60000)),
+    ('soma_vetor', 'soma_vetor.asm', FORWARDING, (8, 416000)),
+    ('bubble_sort', 'bubble_sort.asm', FORWARDING, (4, 99)),
+    ('multiplicacao_matrizes', 'multiplicacao_matrizes.asm', FORWARDING, (4, 20806)),
+    ('fibonacci', 'fibonacci.asm', FORWARDING, (8, 102334155)),
+    ('programa_grande', None, FORWARDING, (4, BLOCOS_PROGRAMA_GRANDE)),
+]
+
+# Métricas comparadas com a referência (maior é melhor)
+TAXAS = ('linhas_por_s', 'ciclos_por_s', 'instrucoes_por_s')
+
+# Duração mínima de cada amostra; programas pequenos são montados várias vezes
+DURACAO_MINIMA = 0.05
+
+# Quantas vezes um kernel com taxa abaixo da referência é medido de novo antes
+# de acusar regressão (picos de carga da máquina costumam passar). A referência
+# guarda a mediana de 1 + CONFIRMACOES medidas
+CONFIRMACOES = 2
+
+
+def cronometrar(funcao, repeticoes, preparar=None):
+    """Menor tempo de uma chamada de funcao entre `repeticoes` amostras.
+
+    Se preparar for dado, é chamado fora da medição antes de cada chamada e o
+    que devolve é passado para funcao.
+    """
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        chamadas = 0
+        duracao = 0.0
+        while duracao < DURACAO_MINIMA:
+            argumentos = () if preparar is None else (preparar(),)
+            inicio = time.perf_counter()
+            funcao(*argumentos)
+            duracao += time.perf_counter() - inicio
+            chamadas += 1
+        melhor = min(melhor, duracao / chamadas)
+    return melhor
+
+
+def gerar_programa_grande(caminho, blocos=BLOCOS_PROGRAMA_GRANDE):
+    """Escreve um programa em linha reta com `blocos` blocos de 10 instruções.
+
+    Cada bloco tem aritmética, um store/load e um desvio para trás nunca tomado;
+    no fim o programa grava em 4(x0) quantos blocos executou.
+    """
+    partes = [".data\n", "valor: .word 0\n", "resultado: .word 0\n", "\n.text\n",
+              "    ADDI x1, x0, 1\n"]
+    for i in range(blocos):
+        partes.append(
+            f"bloco{i}: ADDI x5, x5, 3\n"
+            "    ADD x6, x6, x5\n"
+            "    SUB x7, x6, x5\n"
+            "    XOR x8, x7, x6\n"
+            "    SW x6, 0(x0)\n"
+            "    LW x9, 0(x0)\n"
+            "    AND x10, x9, x8\n"
+            "    OR x11, x10, x7\n"
+            f"    BEQ x0, x1, bloco{i}\n"
+            "    ADDI x12, x12, 1\n")
+    partes.append("    SW x12, 4(x0)\n")
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write(''.join(partes))
+
+
+def medir_kernel(arquivo_asm, opcoes, esperado, repeticoes=3):
+    """Mede um kernel e devolve um dict com as taxas, os ciclos e se o resultado está certo"""
+    endereco, valor = esperado
+    linhas = len(Montador().ler_arquivo(arquivo_asm))
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'prog')
+        dados, texto = f"{base}_data.bin", f"{base}_text.bin"
+
+        melhor_montagem = cronometrar(lambda: Montador().montar(arquivo_asm, base), repeticoes)
+
+        # Só a execução é medida; o Simulador é criado em preparar
+        simuladores = []
+
+        def pipeline(sim):
+            while not sim.terminou():
+                sim.executar_ciclo()
+            simuladores.append(sim)
+
+        def funcional(sim):
+            sim.executar_funcional()
+            simuladores.append(sim)
+
+        melhor_pipeline = cronometrar(pipeline, repeticoes, lambda: Simulador(dados, texto, **opcoes))
+        sim = simuladores[-1]
+        ciclos = sim.ciclo
+        correto = sim.memoria_dados.ler_palavra(endereco) == valor
+
+        melhor_funcional = cronometrar(funcional, repeticoes, lambda: Simulador(dados, texto, modo='funcional'))
+        sim = simuladores[-1]
+        instrucoes = sim.ciclo
+        correto = correto and sim.memoria_dados.ler_palavra(endereco) == valor
+
+    return {
+        'linhas': linhas,
+        'ciclos': ciclos,
+        'instrucoes': instrucoes,
+        'linhas_por_s': linhas / melhor_montagem,
+        'ciclos_por_s': ciclos / melhor_pipeline,
+        'instrucoes_por_s': instrucoes / melhor_funcional,
+        'correto': correto,
+    }
+
+
+def combinar(medidas, agregar):
+    """Junta várias medidas do mesmo kernel aplicando agregar (max, mediana...) a cada taxa"""
+    combinada = dict(medidas[0])
+    for taxa in TAXAS:
+        combinada[taxa] = agregar([medida[taxa] for medida in medidas])
+    return combinada
+
+
+def comparar(nome, medido, referencia, tolerancia):
+    """Lista de problemas do kernel em relação à referência (vazia se está tudo certo)"""
+    problemas = []
+    if not medido['correto']:
+        problemas.append(f"{nome}: resultado incorreto na memória")
+    if referencia is None:
+        return problemas
+    if medido['ciclos'] != referencia['ciclos']:
+        problemas.append(f"{nome}: {medido['ciclos']} ciclos (referência: {referencia['ciclos']})")
+    for taxa in TAXAS:
+        if medido[taxa] < referencia[taxa] * (1 - tolerancia):
+            queda = 100 * (1 - medido[taxa] / referencia[taxa])
+            problemas.append(f"{nome}: {taxa} caiu {queda:.1f}% "
+                             f"({medido[taxa]:,.0f} contra {referencia[taxa]:,.0f} da referência)")
+    return problemas
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Suíte de desempenho do montador e do simulador")
+    parser.add_argument('--kernels', nargs='+', choices=[k[0] for k in KERNELS],
+                        help="kernels a medir (padrão: todos)")
+    parser.add_argument('--repeticoes', type=int, default=3,
+                        help="execuções por medida; vale a mais rápida (padrão: 3)")
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help="queda relativa tolerada antes de acusar regressão (padrão: 0.25)")
+    parser.add_argument('--referencia', default=REFERENCIA,
+                        help="arquivo JSON com a referência (padrão: benchmarks/referencia_desempenho.json)")
+    parser.add_argument('--salvar-referencia', action='store_true',
+                        help="grava as medidas como nova referência em vez de comparar")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    if args.repeticoes < 1:
+        print("Erro: --repeticoes deve ser pelo menos 1", file=sys.stderr)
+        return 2
+
+    referencia = {}
+    if not args.salvar_referencia and os.path.exists(args.referencia):
+        with open(args.referencia, encoding='utf-8') as f:
+            referencia = json.load(f)['kernels']
+
+    resultados = {}
+    problemas = []
+    print(f"{'kernel':<24} {'linhas':>7} {'linhas/s':>10} {'ciclos':>8} {'ciclos/s':>10} {'instr/s':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for nome, arquivo, opcoes, esperado in KERNELS:
+            if args.kernels and nome not in args.kernels:
+                continue
+            if arquivo is None:
+                caminho = os.path.join(tmp, f"{nome}.asm")
+                gerar_programa_grande(caminho)
+            else:
+                caminho = os.path.join(DIRETORIO, arquivo)
+            medidas = [medir_kernel(caminho, opcoes, esperado, args.repeticoes)]
+            if args.salvar_referencia:
+                medidas += [medir_kernel(caminho, opcoes, esperado, args.repeticoes)
+                            for _ in range(CONFIRMACOES)]
+                medido = combinar(medidas, statistics.median)
+                problemas_kernel = comparar(nome, medido, None, args.tolerancia)
+            else:
+                medido = medidas[0]
+                problemas_kernel = comparar(nome, medido, referencia.get(nome), args.tolerancia)
+                while len(medidas) <= CONFIRMACOES and any('caiu' in p for p in problemas_kernel):
+                    medidas.append(medir_kernel(caminho, opcoes, esperado, args.repeticoes))
+                    medido = combinar(medidas, max)
+                    problemas_kernel = comparar(nome, medido, referencia.get(nome), args.tolerancia)
+            resultados[nome] = medido
+            print(f"{nome:<24} {medido['linhas']:>7} {medido['linhas_por_s']:>10,.0f} "
+                  f"{medido['ciclos']:>8} {medido['ciclos_por_s']:>10,.0f} {medido['instrucoes_por_s']:>11,.0f}")
+            problemas.extend(problemas_kernel)
+
+    if args.salvar_referencia:
+        dados = {
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'kernels': {nome: {chave: medido[chave] for chave in ('ciclos',) + TAXAS}
+                        for nome, medido in resultados.items()},
+        }
+        with open(args.referencia, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, indent=2)
+            f.write('\n')
+        print(f"\nReferência gravada em {args.referencia}")
+    elif not referencia:
+        print(f"\nSem referência em {args.referencia}; use --salvar-referencia para criar uma")
+
+    if problemas:
+        print("\nRegressões:")
+        print("\n".join(f"  {problema}" for problema in problemas))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
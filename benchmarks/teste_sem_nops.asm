@@ -0,0 +1,26 @@
+.data
+valor1: .word 15   
+valor2: .word 27   
+resultado: .word 0    
+
+.text
+    # TesteASM.asm sem os NOPs entre as dependências: precisa de forwarding
+    # e da detecção de load-use para dar o mesmo resultado
+    LW x1, 0(x0)
+    LW x2, 4(x0)
+    ADD x3, x1, x2        # load-use em x2
+    SW x3, 8(x0)          # x3 vem de EX_MEM
+    ADDI x4, x0, 42
+    BEQ x3, x4, iguais    # x4 vem de EX_MEM
+
+    ADDI x5, x0, 14
+
+iguais:
+    ADDI x6, x0, 1
+
+    JAL x0, fim 
+
+    ADDI x7, x0, 15 
+
+fim:
+    ADDI x10, x0, 99 
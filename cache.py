@@ -0,0 +1,164 @@
+import random
+
+# Modelo de cache L1 associativa por conjunto. Só guarda as tags: os dados
+# continuam vindo de instrucoes/memoria_dados, a cache decide apenas quantos
+# ciclos o acesso custa e conta acertos, faltas e remoções.
+
+POLITICAS_SUBSTITUICAO = ('LRU', 'FIFO', 'aleatoria')
+POLITICAS_ESCRITA = ('write-back', 'write-through')
+
+
+def _log2_exato(valor, descricao):
+    if valor < 1 or valor & (valor - 1):
+        raise ValueError(f"{descricao} deve ser potência de 2: {valor}")
+    return valor.bit_length() - 1
+
+
+class Cache:
+    """Cache com tamanho, linha, associatividade e políticas configuráveis.
+
+    Toda falta que traz a linha custa `penalidade` ciclos. write-back aloca a
+    linha também nas escritas e conta uma escrita na memória quando uma linha
+    suja é removida. write-through não aloca nas escritas e conta uma escrita
+    na memória a cada store; com buffer de escrita, esses stores não param o
+    pipeline.
+    """
+
+    def __init__(self, nome, tamanho=1024, tamanho_linha=16, associatividade=2,
+                 substituicao='LRU', escrita='write-back', penalidade=10, semente=None):
+        if substituicao not in POLITICAS_SUBSTITUICAO:
+            raise ValueError(f"Política de substituição inválida: {substituicao}")
+        if escrita not in POLITICAS_ESCRITA:
+            raise ValueError(f"Política de escrita inválida: {escrita}")
+        if penalidade < 0:
+            raise ValueError(f"Penalidade de falta inválida: {penalidade}")
+        self.bits_linha = _log2_exato(tamanho_linha, "Tamanho da linha")
+        _log2_exato(tamanho, "Tamanho da cache")
+        _log2_exato(associatividade, "Associatividade")
+        if tamanho < tamanho_linha * associatividade:
+            raise ValueError(f"Cache de {tamanho} B não comporta {associatividade} vias de {tamanho_linha} B")
+
+        self.nome = nome
+        self.tamanho = tamanho
+        self.tamanho_linha = tamanho_linha
+        self.associatividade = associatividade
+        self.substituicao = substituicao
+        self.escrita = escrita
+        self.penalidade = penalidade
+        self.aleatorio = random.Random(semente)
+
+        num_conjuntos = tamanho // (tamanho_linha * associatividade)
+        self.mascara_conjuntos = num_conjuntos - 1
+        # Cada conjunto é a lista das linhas presentes, da mais antiga (ou menos
+        # recentemente usada, no LRU) para a mais nova
+        self.conjuntos = [[] for _ in range(num_conjuntos)]
+        self.sujas = set()
+
+        self.acessos = 0
+        self.acertos = 0
+        self.faltas = 0
+        self.remocoes = 0
+        self.escritas_memoria = 0
+
+    def acessar(self, endereco, escrita=False):
+        """Registra um acesso e devolve os ciclos de espera (0 em acerto)"""
+        self.acessos += 1
+        linha = endereco >> self.bits_linha
+        conjunto = self.conjuntos[linha & self.mascara_conjuntos]
+        write_back = self.escrita == 'write-back'
+
+        if linha in conjunto:
+            self.acertos += 1
+            if self.substituicao == 'LRU' and conjunto[-1] != linha:
+                conjunto.remove(linha)
+                conjunto.append(linha)
+            if escrita:
+                if write_back:
+                    self.sujas.add(linha)
+                else:
+                    self.escritas_memoria += 1
+            return 0
+
+        self.faltas += 1
+        if escrita and not write_back:
+            self.escritas_memoria += 1
+            return 0
+
+        if len(conjunto) == self.associatividade:
+            if self.substituicao == 'aleatoria':
+                vitima = conjunto.pop(self.aleatorio.randrange(len(conjunto)))
+            else:
+                vitima = conjunto.pop(0)
+            self.remocoes += 1
+            if vitima in self.sujas:
+                self.sujas.discard(vitima)
+                self.escritas_memoria += 1
+        conjunto.append(linha)
+        if escrita:
+            self.sujas.add(linha)
+        return self.penalidade
+
+    def estado(self):
+        """Configuração, linhas presentes e contadores em tipos simples (para checkpoints)"""
+        return {
+            'parametros': (self.nome, self.tamanho, self.tamanho_linha, self.associatividade,
+                           self.substituicao, self.escrita, self.penalidade),
+            'conjuntos': [list(conjunto) for conjunto in self.conjuntos],
+            'sujas': list(self.sujas),
+            'contadores': (self.acessos, self.acertos, self.faltas, self.remocoes, self.escritas_memoria),
+            # O gerador só pesa no estado (625 inteiros) na substituição aleatória
+            'aleatorio': self.aleatorio.getstate() if self.substituicao == 'aleatoria' else None,
+        }
+
+    @classmethod
+    def de_estado(cls, estado):
+        """Recria a cache salva por estado()"""
+        cache = cls(*estado['parametros'])
+        cache.conjuntos = [list(conjunto) for conjunto in estado['conjuntos']]
+        cache.sujas = set(estado['sujas'])
+        (cache.acessos, cache.acertos, cache.faltas, cache.remocoes,
+         cache.escritas_memoria) = estado['contadores']
+        if estado['aleatorio'] is not None:
+            cache.aleatorio.setstate(estado['aleatorio'])
+        return cache
+
+    def taxa_acertos(self):
+        return self.acertos / self.acessos if self.acessos else 0.0
+
+    def descricao(self):
+        return (f"{self.tamanho} B, linha de {self.tamanho_linha} B, {self.associatividade} via(s), "
+                f"{self.substituicao}, {self.escrita}, falta = {self.penalidade} ciclos")
+
+    def relatorio(self):
+        """Linhas de texto com a configuração e os contadores"""
+        return [
+            f"{self.nome} ({self.descricao()}):",
+            f"  {self.acessos} acessos, {self.acertos} acertos ({100 * self.taxa_acertos():.1f}%), "
+            f"{self.faltas} faltas, {self.remocoes} remoções, {self.escritas_memoria} escritas na memória",
+        ]
+
+
+# Nomes aceitos em criar_cache e o parâmetro correspondente de Cache
+CHAVES_ESPECIFICACAO = {
+    'tamanho': ('tamanho', int),
+    'linha': ('tamanho_linha', int),
+    'vias': ('associatividade', int),
+    'substituicao': ('substituicao', str),
+    'escrita': ('escrita', str),
+    'penalidade': ('penalidade', int),
+}
+
+
+def criar_cache(nome, especificacao=''):
+    """Cria uma Cache a partir de um texto como 'tamanho=4096,linha=32,vias=4,penalidade=20'"""
+    parametros = {}
+    for item in filter(None, (parte.strip() for parte in especificacao.split(','))):
+        chave, sep, valor = item.partition('=')
+        if not sep or chave.strip() not in CHAVES_ESPECIFICACAO:
+            raise ValueError(f"Parâmetro de cache inválido: {item}")
+        parametro, conversao = CHAVES_ESPECIFICACAO[chave.strip()]
+        try:
+            parametros[parametro] = conversao(valor.strip())
+        except ValueError:
+            raise ValueError(f"Valor inválido para {chave.strip()}: {valor.strip()}") from None
+    return Cache(nome, **parametros)
@@ -0,0 +1,118 @@
+import marshal
+import struct
+import zlib
+
+from cache import Cache
+from preditor import EstatisticasDesvio, criar_preditor
+
+# Checkpoint do estado completo de um Simulador: registradores, memória, pc,
+# ciclo, registradores de pipeline, paradas em andamento, contadores, preditor e
+# caches. O programa (.text) não vai junto; o checkpoint guarda só um CRC dele
+# e precisa ser restaurado em um Simulador com o mesmo programa. O CRC é
+# calculado uma vez, ao carregar o programa, e fica em simulador.contadores.
+#
+# Formato: cabeçalho fixo (CABECALHO) seguido de um dict de tipos simples
+# serializado com marshal, opcionalmente comprimido com zlib. Os bytes da
+# memória vão inteiros no dict, então restaurar é basicamente uma cópia.
+
+MAGICO = b'RVCK'
+VERSAO = 1
+# mágico, versão do formato, versão do marshal, comprimido
+CABECALHO = struct.Struct('<4sHBB')
+
+
+def crc_programa(instrucoes):
+    """CRC das palavras do .text (em little-endian, como no arquivo)"""
+    if isinstance(instrucoes, memoryview):
+        # Palavras nativas little-endian: são os próprios bytes do .text
+        return zlib.crc32(instrucoes)
+    return zlib.crc32(struct.pack(f'<{len(instrucoes)}I', *instrucoes))
+
+
+def salvar_estado(simulador, comprimir=False):
+    """Serializa o estado do simulador em bytes"""
+    preditor = simulador.preditor
+    estado = {
+        'programa': simulador.contadores.crc_programa,
+        'modo': simulador.modo,
+        'forwarding': simulador.forwarding,
+        'detectar_load_use': simulador.detectar_load_use,
+        'estagio_desvio': simulador.estagio_desvio,
+        'pc': simulador.pc,
+        'ciclo': simulador.ciclo,
+        'fim': simulador.fim,
+        'registradores': list(simulador.bancoReg),
+        'memoria': simulador.memoria_dados.estado(),
+        'latches': [getattr(simulador, nome).estado() for nome in simulador.NOMES_LATCHES],
+        'paradas': (simulador.parado, simulador.espera_if, simulador.pc_liberado,
+                    simulador.espera_mem, simulador.mem_liberado, simulador.mem_parado),
+        'contadores': simulador.contadores.estado(),
+        'preditor': None if preditor is None else (preditor.nome, preditor.estado()),
+        'desvios': simulador.estatisticas_desvio.por_pc,
+        'cache_instrucoes': None if simulador.cache_instrucoes is None else simulador.cache_instrucoes.estado(),
+        'cache_dados': None if simulador.cache_dados is None else simulador.cache_dados.estado(),
+    }
+    corpo = marshal.dumps(estado)
+    if comprimir:
+        corpo = zlib.compress(corpo)
+    return CABECALHO.pack(MAGICO, VERSAO, marshal.version, comprimir) + corpo
+
+
+def restaurar_estado(simulador, dados):
+    """Põe o simulador no estado salvo por salvar_estado"""
+    if len(dados) < CABECALHO.size:
+        raise ValueError("Checkpoint inválido: arquivo truncado")
+    magico, versao, versao_marshal, comprimido = CABECALHO.unpack_from(dados)
+    if magico != MAGICO:
+        raise ValueError("Checkpoint inválido: formato desconhecido")
+    if versao != VERSAO or versao_marshal != marshal.version:
+        raise ValueError(f"Checkpoint de versão incompatível: {versao}/{versao_marshal}")
+    corpo = memoryview(dados)[CABECALHO.size:]
+    try:
+        estado = marshal.loads(zlib.decompress(corpo) if comprimido else corpo)
+    except (EOFError, ValueError, TypeError, zlib.error):
+        raise ValueError("Checkpoint inválido: conteúdo corrompido") from None
+    if estado['programa'] != simulador.contadores.crc_programa:
+        raise ValueError("Checkpoint de outro programa")
+
+    simulador.modo = estado['modo']
+    simulador.forwarding = estado['forwarding']
+    simulador.detectar_load_use = estado['detectar_load_use']
+    simulador.estagio_desvio = estado['estagio_desvio']
+    simulador.pc = estado['pc']
+    simulador.ciclo = estado['ciclo']
+    simulador.fim = estado['fim']
+    simulador.bancoReg[:] = estado['registradores']
+    simulador.memoria_dados.restaurar(estado['memoria'])
+    for nome, latch in zip(simulador.NOMES_LATCHES, estado['latches']):
+        getattr(simulador, nome).restaurar(latch)
+    (simulador.parado, simulador.espera_if, simulador.pc_liberado,
+     simulador.espera_mem, simulador.mem_liberado, simulador.mem_parado) = estado['paradas']
+    simulador.contadores.restaurar(estado['contadores'])
+
+    if estado['preditor'] is None:
+        simulador.preditor = None
+    else:
+        nome, tabelas = estado['preditor']
+        preditor = criar_preditor(nome, len(tabelas[0]) if tabelas else 64)
+        preditor.restaurar(tabelas)
+        simulador.preditor = preditor
+    simulador.estatisticas_desvio = EstatisticasDesvio(simulador.estagio_desvio)
+    simulador.estatisticas_desvio.por_pc = estado['desvios']
+    simulador.cache_instrucoes = None if estado['cache_instrucoes'] is None else Cache.de_estado(estado['cache_instrucoes'])
+    simulador.cache_dados = None if estado['cache_dados'] is None else Cache.de_estado(estado['cache_dados'])
+
+    simulador.regs_escritos.clear()
+    simulador.latches_alterados = []
+
+
+def salvar_arquivo(simulador, caminho):
+    """Grava um checkpoint comprimido em disco"""
+    with open(caminho, 'wb') as f:
+        f.write(salvar_estado(simulador, comprimir=True))
+
+
+def carregar_arquivo(simulador, caminho):
+    """Restaura o simulador a partir de um checkpoint gravado por salvar_arquivo"""
+    with open(caminho, 'rb') as f:
+        restaurar_estado(simulador, f.read())
@@ -0,0 +1,148 @@
+import csv
+import heapq
+import json
+from itertools import accumulate, compress
+from operator import add
+
+from decodificador import desmontar
+
+# Contadores de desempenho do Simulador. Durante a execução só se conta o
+# mínimo (instruções retiradas por pc e ciclos perdidos em eventos raros); CPI,
+# bolhas e mix de instruções são calculados a partir disso no resumo.
+
+# ADDI x0, x0, 0: os NOPs que os programas sem forwarding usam como bolha
+INSTRUCAO_NOP = 0x00000013
+
+
+class Contadores:
+    """Contagens brutas atualizadas pelo Simulador"""
+
+    def __init__(self, num_instrucoes):
+        self.por_pc = [0] * num_instrucoes  # instruções retiradas, indexadas por pc // 4
+        # O modo funcional e o tradutor não contam instrução por instrução:
+        # cada trecho executado em linha reta, do índice i ao j, soma 1 em
+        # trechos[i] e subtrai 1 em trechos[j + 1]. execucoes() junta as duas
+        # contagens.
+        self.trechos = [0] * (num_instrucoes + 1)
+        # (decodificadas, assembly de cada pc, {tipo: máscara dos pcs do tipo}),
+        # montado no primeiro resumo do programa
+        self.programa = None
+        # CRC do .text, calculado pelo Simulador ao carregar o programa e
+        # gravado nos checkpoints (checkpoint.py); não faz parte do estado
+        self.crc_programa = None
+        self.bolhas_load_use = 0
+        self.instrucoes_descartadas = 0     # descartadas por desvio/JAL mal previsto
+        self.ciclos_espera_icache = 0
+        self.ciclos_espera_dcache = 0
+
+    def execucoes(self):
+        """Instruções retiradas por pc // 4, somando os trechos do modo funcional"""
+        return list(map(add, self.por_pc, accumulate(self.trechos)))
+
+    def estado(self):
+        return (self.execucoes(), self.bolhas_load_use, self.instrucoes_descartadas,
+                self.ciclos_espera_icache, self.ciclos_espera_dcache)
+
+    def restaurar(self, estado):
+        # As listas são alteradas no lugar: o modo funcional e o tradutor
+        # guardam referências a elas
+        (self.por_pc[:], self.bolhas_load_use, self.instrucoes_descartadas,
+         self.ciclos_espera_icache, self.ciclos_espera_dcache) = estado
+        self.trechos[:] = [0] * len(self.trechos)
+
+
+def perfil_programa(contadores, decodificadas):
+    """Assembly e máscaras por tipo do programa, montados uma vez por programa"""
+    if contadores.programa is None or contadores.programa[0] is not decodificadas:
+        tipos = ['NOP' if d.instrucao == INSTRUCAO_NOP else d.tipo or 'desconhecida' for d in decodificadas]
+        mascaras = {tipo: [t == tipo for t in tipos] for tipo in dict.fromkeys(tipos)}
+        contadores.programa = (decodificadas, [desmontar(d) for d in decodificadas], mascaras)
+    return contadores.programa[1:]
+
+
+def resumir(simulador, max_pcs=None):
+    """Dict com as métricas da execução até aqui (próprio para JSON).
+
+    Com max_pcs, por_pc traz só os max_pcs pcs mais executados. Os textos e
+    tipos das instruções são montados uma vez por programa; mix e totais são
+    somas em C sobre as contagens, sem um laço Python por instrução.
+    """
+    contadores = simulador.contadores
+    textos, mascaras = perfil_programa(contadores, simulador.decodificadas)
+    execucoes = contadores.execucoes()
+    mix = {}
+    for tipo, mascara in mascaras.items():
+        quantidade = sum(compress(execucoes, mascara))
+        if quantidade:
+            mix[tipo] = quantidade
+    nops = mix.get('NOP', 0)
+    if max_pcs is None:
+        indices = [indice for indice, n in enumerate(execucoes) if n]
+    else:
+        indices = [indice for indice in heapq.nlargest(max_pcs, range(len(execucoes)), key=execucoes.__getitem__)
+                   if execucoes[indice]]
+    por_pc = [{'pc': indice * 4, 'assembly': textos[indice], 'execucoes': execucoes[indice]}
+              for indice in indices]
+
+    retiradas = sum(mix.values())
+    uteis = retiradas - nops
+    ciclos = simulador.ciclo
+    return {
+        'ciclos': ciclos,
+        'instrucoes_retiradas': retiradas,
+        'nops': nops,
+        'cpi': ciclos / retiradas if retiradas else 0.0,
+        'cpi_sem_nops': ciclos / uteis if uteis else 0.0,
+        # Ciclos em que o WB não recebeu instrução (enchimento, paradas e
+        # descartes); no modo funcional cada instrução é um ciclo
+        'bolhas': ciclos - retiradas,
+        'bolhas_load_use': contadores.bolhas_load_use,
+        'instrucoes_descartadas': contadores.instrucoes_descartadas,
+        'ciclos_espera_icache': contadores.ciclos_espera_icache,
+        'ciclos_espera_dcache': contadores.ciclos_espera_dcache,
+        'mix': dict(sorted(mix.items(), key=lambda item: -item[1])),
+        'por_pc': por_pc,
+    }
+
+
+def formatar_resumo(resumo, max_pcs=10):
+    """Linhas de texto do resumo; mostra só os max_pcs pcs mais executados"""
+    retiradas = resumo['instrucoes_retiradas']
+    linhas = [
+        f"Ciclos: {resumo['ciclos']}",
+        f"Instruções retiradas: {retiradas} ({resumo['nops']} NOPs)",
+        f"CPI: {resumo['cpi']:.3f} (sem NOPs: {resumo['cpi_sem_nops']:.3f})",
+        f"Bolhas no WB: {resumo['bolhas']}",
+        f"  bolhas de load-use: {resumo['bolhas_load_use']}",
+        f"  ciclos esperando a I-cache: {resumo['ciclos_espera_icache']}",
+        f"  ciclos esperando a D-cache: {resumo['ciclos_espera_dcache']}",
+        f"Instruções descartadas por desvio mal previsto: {resumo['instrucoes_descartadas']}",
+        "Mix de instruções:",
+    ]
+    for tipo, quantidade in resumo['mix'].items():
+        linhas.append(f"  {tipo:<4} {quantidade:>10} ({100 * quantidade / retiradas:.1f}%)")
+    mais_executados = sorted(resumo['por_pc'], key=lambda item: -item['execucoes'])[:max_pcs]
+    if mais_executados:
+        linhas.append("PCs mais executados:")
+        for item in mais_executados:
+            linhas.append(f"  0x{item['pc']:08X} {item['assembly']:<24} {item['execucoes']:>10}")
+    return linhas
+
+
+def exportar_json(resumo, caminho):
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(resumo, f, ensure_ascii=False, indent=2)
+
+
+def exportar_csv(resumo, caminho):
+    """Uma linha por métrica: secao (resumo, mix ou pc), nome e valor"""
+    with open(caminho, 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(['secao', 'nome', 'valor'])
+        for chave, valor in resumo.items():
+            if chave not in ('mix', 'por_pc'):
+                escritor.writerow(['resumo', chave, valor])
+        for tipo, quantidade in resumo['mix'].items():
+            escritor.writerow(['mix', tipo, quantidade])
+        for item in resumo['por_pc']:
+            escritor.writerow(['pc', f"0x{item['pc']:08X} {item['assembly']}", item['execucoes']])
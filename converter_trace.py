@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Converte um trace binário (executar_cli.py --gravar-trace) para o log de texto
+da interface gráfica (*_saida.out)
+
+Exemplos:
+    python converter_trace.py bubble.trc
+    python converter_trace.py bubble.trc -o bubble_saida.out
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Adicionar o diretório atual ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from trace_execucao import converter_para_texto
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Converte um trace binário para o log de texto")
+    parser.add_argument('trace', help="arquivo gravado com --gravar-trace")
+    parser.add_argument('-o', '--saida',
+                        help="arquivo de texto gerado (padrão: <trace sem extensão>_saida.out)")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    saida = args.saida or args.trace.rsplit('.', 1)[0] + '_saida.out'
+
+    inicio = time.perf_counter()
+    try:
+        ciclos = converter_para_texto(args.trace, saida)
+    except (OSError, ValueError) as e:
+        print(f"Erro ao converter {args.trace}: {e}", file=sys.stderr)
+        return 1
+    duracao = time.perf_counter() - inicio
+    print(f"{ciclos} ciclos convertidos para {saida} em {duracao:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+from collections import OrderedDict, namedtuple
+
+# Instrução já decodificada. Os campos que não se aplicam ao formato ficam em 0
+# e tipo é None quando o opcode não é suportado pelo simulador.
+Decodificada = namedtuple('Decodificada', ['tipo', 'rd', 'rs1', 'rs2', 'funct3', 'funct7', 'imm', 'instrucao'])
+
+# Campos que cada tipo leva para o registrador ID/EX
+CAMPOS_ID_EX = {
+    'R': ('rd', 'funct3', 'rs1', 'rs2', 'funct7'),
+    'I': ('rd', 'funct3', 'rs1', 'imm'),
+    'LW': ('rd', 'funct3', 'rs1', 'rs2', 'imm'),
+    'SW': ('funct3', 'rs1', 'rs2', 'imm'),
+    'B': ('funct3', 'rs1', 'rs2', 'imm'),
+    'J': ('rd', 'imm'),
+}
+
+# Nome de cada (funct3, funct7) tipo R, como em simulador.operacao_r
+NOMES_R = {
+    (0b000, 0b0000000): 'ADD', (0b000, 0b0100000): 'SUB', (0b000, 0b0000001): 'MUL',
+    (0b100, 0b0000000): 'XOR', (0b100, 0b0000001): 'DIV',
+    (0b110, 0b0000000): 'OR', (0b110, 0b0000001): 'REM',
+    (0b111, 0b0000000): 'AND', (0b001, 0b0000000): 'SLL', (0b101, 0b0000000): 'SRL',
+}
+
+# Loads e stores compartilham o tipo 'LW'/'SW'; a largura vem do funct3
+NOMES_LOAD = {0b000: 'LB', 0b001: 'LH', 0b010: 'LW', 0b100: 'LBU', 0b101: 'LHU'}
+NOMES_STORE = {0b000: 'SB', 0b001: 'SH', 0b010: 'SW'}
+NOMES_DESVIO = {0b000: 'BEQ', 0b001: 'BNE', 0b100: 'BLT', 0b101: 'BGE'}
+# Tipo I: o simulador executa todos como ADDI, mas o texto segue a codificação
+NOMES_I = {0b000: 'ADDI', 0b001: 'SLLI', 0b101: 'SRLI'}
+
+# Opcodes cujo texto depende do pc (o destino pode ser mostrado como label)
+OPCODES_COM_DESTINO = (0b1100011, 0b1101111)
+
+# Textos guardados por um Desmontador
+TAMANHO_DESMONTADOR = 4096
+
+
+def decodificar(instr):
+    """Decodifica uma palavra de 32 bits em uma Decodificada"""
+    opcode = instr & 0x7F
+    rd = (instr >> 7) & 0x1F
+    funct3 = (instr >> 12) & 0x7
+    rs1 = (instr >> 15) & 0x1F
+    rs2 = (instr >> 20) & 0x1F
+    funct7 = (instr >> 25) & 0x7F
+
+    if opcode == 0b0110011:  # Tipo R
+        return Decodificada('R', rd, rs1, rs2, funct3, funct7, 0, instr)
+
+    elif opcode == 0b0010011:  # Tipo I (ex: ADDI)
+        imm = (instr >> 20) & 0xFFF
+        imm = imm - 4096 if imm & 0x800 else imm
+        return Decodificada('I', rd, rs1, 0, funct3, 0, imm, instr)
+
+    elif opcode == 0b0000011:  # LB, LH, LW, LBU, LHU
+        imm = (instr >> 20) & 0xFFF
+        imm = imm - 4096 if imm & 0x800 else imm
+        return Decodificada('LW', rd, rs1, rs2, funct3, 0, imm, instr)
+
+    elif opcode == 0b0100011:  # SB, SH, SW
+        imm = (funct7 << 5) | rd
+        imm = imm - 4096 if imm & 0x800 else imm
+        return Decodificada('SW', 0, rs1, rs2, funct3, 0, imm, instr)
+
+    elif opcode == 0b1100011:  # BEQ, BNE (Tipo B)
+        imm12 = (instr >> 31) & 0x1
+        imm10_5 = (instr >> 25) & 0x3F
+        imm4_1 = (instr >> 8) & 0xF
+        imm11 = (instr >> 7) & 0x1
+        imm = (imm12 << 12) | (imm11 << 11) | (imm10_5 << 5) | (imm4_1 << 1)
+        imm = imm - 8192 if imm & 0x1000 else imm
+        return Decodificada('B', 0, rs1, rs2, funct3, 0, imm, instr)
+
+    elif opcode == 0b1101111:  # JAL (Tipo J)
+        imm = (
+            ((instr >> 31) & 0x1) << 20 |
+            ((instr >> 21) & 0x3FF) << 1 |
+            ((instr >> 20) & 0x1) << 11 |
+            ((instr >> 12) & 0xFF) << 12
+        )
+        imm = imm - (1 << 21) if imm & (1 << 20) else imm
+        return Decodificada('J', rd, 0, 0, 0, 0, imm, instr)
+
+    return Decodificada(None, 0, 0, 0, 0, 0, 0, instr)
+
+
+def decodificar_programa(instrucoes):
+    """Decodifica todas as instruções de uma vez; o resultado é indexado por pc // 4"""
+    return tuple(decodificar(instr) for instr in instrucoes)
+
+
+def desmontar(d, pc=None, labels=None):
+    """Converte uma instrução decodificada para formato assembly.
+
+    Com o pc e labels (pc -> nome), o destino de desvios e JAL aparece como
+    o label em vez do deslocamento.
+    """
+    tipo = d.tipo
+
+    if tipo == 'R':
+        nome = NOMES_R.get((d.funct3, d.funct7), 'R-type')
+        return f"{nome} x{d.rd}, x{d.rs1}, x{d.rs2}"
+
+    elif tipo == 'I':
+        nome = NOMES_I.get(d.funct3, 'I-type')
+        return f"{nome} x{d.rd}, x{d.rs1}, {d.imm}"
+
+    elif tipo == 'LW':
+        nome = NOMES_LOAD.get(d.funct3, 'LW')
+        return f"{nome} x{d.rd}, {d.imm}(x{d.rs1})"
+
+    elif tipo == 'SW':
+        nome = NOMES_STORE.get(d.funct3, 'SW')
+        return f"{nome} x{d.rs2}, {d.imm}(x{d.rs1})"
+
+    elif tipo == 'B':
+        nome = NOMES_DESVIO.get(d.funct3, 'B-type')
+        return f"{nome} x{d.rs1}, x{d.rs2}, {destino(d, pc, labels)}"
+
+    elif tipo == 'J':
+        return f"JAL x{d.rd}, {destino(d, pc, labels)}"
+
+    return "Instrução desconhecida"
+
+
+def destino(d, pc, labels):
+    """Label do destino de um desvio ou JAL, ou o deslocamento se não houver"""
+    if labels and pc is not None:
+        return labels.get(pc + d.imm, d.imm)
+    return d.imm
+
+
+class Desmontador:
+    """Cache LRU dos textos assembly, indexada pela palavra da instrução.
+
+    Desvios e JAL entram com o pc na chave, porque o destino aparece pelo
+    label da tabela de símbolos do Montador (labels_texto, nome -> pc). Usada
+    pela interface no pipeline, no log e no *_saida.out, onde as mesmas
+    instruções são desmontadas de novo a cada ciclo.
+    """
+
+    def __init__(self, labels_texto=None, tamanho=TAMANHO_DESMONTADOR):
+        self.tamanho = tamanho
+        self.textos = OrderedDict()
+        self.labels = {}
+        for nome, pc in (labels_texto or {}).items():
+            self.labels.setdefault(pc, nome)
+
+    def texto(self, instrucao, pc=None):
+        """Assembly da palavra instrucao (no endereço pc, se conhecido)"""
+        chave = (instrucao, pc) if instrucao & 0x7F in OPCODES_COM_DESTINO else instrucao
+        textos = self.textos
+        texto = textos.get(chave)
+        if texto is not None:
+            textos.move_to_end(chave)
+            return texto
+        texto = textos[chave] = desmontar(decodificar(instrucao), pc, self.labels)
+        if len(textos) > self.tamanho:
+            textos.popitem(last=False)
+        return texto
@@ -0,0 +1,189 @@
+from collections import namedtuple
+
+from memoria import FORMATOS_STORE, PALAVRA
+
+# Breakpoints e watchpoints para Simulador.executar_ate. Tudo é conferido
+# quando a instrução é concluída (WB no pipeline, execução no modo funcional):
+# instruções buscadas no caminho errado nunca disparam nada e uma instrução
+# parada no pipeline não dispara duas vezes. A execução para logo depois do
+# ciclo em que a instrução foi concluída.
+#
+# Watchpoints de registrador e de memória podem ser de 'alteracao' (o valor
+# mudou) ou de 'acesso' (a instrução leu ou escreveu). Um watchpoint de memória
+# vigia a palavra de 4 bytes que começa no endereço dado.
+#
+# Os valores novos vêm do que a própria instrução escreveu (resultado e valor
+# do store), não do banco e da memória depois do ciclo: no pipeline as
+# instruções seguintes já podem ter escrito neles (um JAL ou store escreve no
+# MEM, no mesmo ciclo em que a instrução vigiada é concluída no WB).
+
+TIPOS_WATCHPOINT = ('alteracao', 'acesso')
+
+# Tipos de instrução que escrevem rd, que leem rs1 e que leem rs2
+ESCREVEM_RD = ('R', 'I', 'LW', 'J')
+LEEM_RS1 = ('R', 'I', 'LW', 'SW', 'B')
+LEEM_RS2 = ('R', 'SW', 'B')
+
+# O que interrompeu executar_ate. tipo é 'breakpoint', 'registrador' ou
+# 'memoria'; alvo é o pc, o número do registrador ou o endereço vigiado;
+# anterior e atual são os valores vigiados antes e depois da instrução (None
+# nos breakpoints)
+Parada = namedtuple('Parada', ['tipo', 'pc', 'ciclo', 'alvo', 'anterior', 'atual'])
+
+
+def registradores_lidos(d):
+    lidos = []
+    if d.tipo in LEEM_RS1:
+        lidos.append(d.rs1)
+    if d.tipo in LEEM_RS2:
+        lidos.append(d.rs2)
+    return lidos
+
+
+def palavra_apos_store(palavra, vigiado, endereco, valor, funct3):
+    """Palavra vigiada (que começa em vigiado) depois do store de valor em endereco"""
+    formato, mascara = FORMATOS_STORE[funct3]
+    bytes_palavra = bytearray(PALAVRA.pack(palavra))
+    for i, byte in enumerate(formato.pack(valor & mascara), endereco - vigiado):
+        if 0 <= i < 4:
+            bytes_palavra[i] = byte
+    return PALAVRA.unpack(bytes_palavra)[0]
+
+
+def descrever(parada):
+    """Texto curto explicando a parada"""
+    onde = f"pc 0x{parada.pc:08X}, ciclo {parada.ciclo}"
+    if parada.tipo == 'breakpoint':
+        return f"Breakpoint em 0x{parada.pc:08X} (ciclo {parada.ciclo})"
+    alvo = f"x{parada.alvo}" if parada.tipo == 'registrador' else f"memória[0x{parada.alvo:08X}]"
+    if parada.anterior == parada.atual:
+        return f"Acesso a {alvo} = {parada.atual} ({onde})"
+    return f"{alvo}: {parada.anterior} -> {parada.atual} ({onde})"
+
+
+class PontosParada:
+    """Conjunto de breakpoints (por pc) e watchpoints (por registrador e endereço)"""
+
+    def __init__(self):
+        self.breakpoints = set()
+        self.registradores = {}  # registrador -> tipo
+        self.memoria = {}  # endereço -> tipo
+        # Último valor visto de cada registrador e palavra vigiados
+        self.valores_registradores = {}
+        self.valores_memoria = {}
+        # pcs que precisam ser conferidos, calculados para um programa por preparar()
+        self.pcs = None
+        self.programa = None
+        self.ciclo = None  # ciclo em que o último executar_ate parou
+
+    def __bool__(self):
+        return bool(self.breakpoints or self.registradores or self.memoria)
+
+    def mudou(self):
+        self.pcs = None
+        self.ciclo = None
+
+    def adicionar_breakpoint(self, pc):
+        if pc < 0 or pc % 4:
+            raise ValueError(f"pc de breakpoint inválido: {pc}")
+        self.breakpoints.add(pc)
+        self.mudou()
+
+    def remover_breakpoint(self, pc):
+        self.breakpoints.discard(pc)
+        self.mudou()
+
+    def observar_registrador(self, registrador, tipo='alteracao'):
+        if not 0 <= registrador < 32:
+            raise ValueError(f"Registrador inválido: {registrador}")
+        if tipo not in TIPOS_WATCHPOINT:
+            raise ValueError(f"Tipo de watchpoint inválido: {tipo}")
+        self.registradores[registrador] = tipo
+        self.mudou()
+
+    def remover_registrador(self, registrador):
+        self.registradores.pop(registrador, None)
+        self.mudou()
+
+    def observar_memoria(self, endereco, tipo='alteracao'):
+        if endereco < 0:
+            raise ValueError(f"Endereço de memória inválido: {endereco}")
+        if tipo not in TIPOS_WATCHPOINT:
+            raise ValueError(f"Tipo de watchpoint inválido: {tipo}")
+        self.memoria[endereco] = tipo
+        self.mudou()
+
+    def remover_memoria(self, endereco):
+        self.memoria.pop(endereco, None)
+        self.mudou()
+
+    def preparar(self, simulador):
+        """pcs cujas instruções precisam ser conferidas ao serem concluídas.
+
+        Breakpoints, instruções que escrevem (ou leem, no 'acesso') um
+        registrador vigiado e loads/stores quando há memória vigiada. Também
+        relê os valores vigiados se o simulador não está onde a última
+        execução parou.
+        """
+        if simulador.ciclo != self.ciclo:
+            self.valores_registradores = {r: simulador.bancoReg[r] for r in self.registradores}
+            self.valores_memoria = {e: simulador.memoria_dados.ler_palavra(e) for e in self.memoria}
+        if self.pcs is not None and self.programa is simulador.decodificadas:
+            return self.pcs
+
+        pcs = set(self.breakpoints)
+        acessos_memoria = 'acesso' in self.memoria.values()
+        for i, d in enumerate(simulador.decodificadas):
+            if d.tipo is None:
+                continue
+            escrito = d.rd if d.tipo in ESCREVEM_RD else None
+            lidos = registradores_lidos(d)
+            for registrador, tipo in self.registradores.items():
+                if registrador == escrito or (tipo == 'acesso' and registrador in lidos):
+                    pcs.add(i * 4)
+            if self.memoria and (d.tipo == 'SW' or (d.tipo == 'LW' and acessos_memoria)):
+                pcs.add(i * 4)
+        self.pcs = pcs
+        self.programa = simulador.decodificadas
+        return pcs
+
+    def verificar(self, simulador, pc, endereco, resultado, valor_store):
+        """Parada causada pela instrução em pc, que acabou de ser concluída (ou None).
+
+        endereco é o endereço acessado, se a instrução é um load ou store;
+        resultado é o valor que ela escreveu em rd e valor_store o que um store
+        guardou. Os valores vigiados só mudam por eles: como as instruções são
+        concluídas em ordem, o valor guardado de um registrador lido é o que a
+        instrução leu.
+        """
+        ciclo = simulador.ciclo
+        d = simulador.decodificadas[pc >> 2]
+        parada = Parada('breakpoint', pc, ciclo, pc, None, None) if pc in self.breakpoints else None
+
+        escrito = d.rd if d.tipo in ESCREVEM_RD else None
+        lidos = registradores_lidos(d)
+        for registrador, tipo in self.registradores.items():
+            if registrador == escrito:
+                anterior = self.valores_registradores[registrador]
+                # x0 continua 0 seja qual for o resultado
+                atual = self.valores_registradores[registrador] = resultado if registrador else 0
+                if parada is None and (anterior != atual or tipo == 'acesso'):
+                    parada = Parada('registrador', pc, ciclo, registrador, anterior, atual)
+            elif parada is None and tipo == 'acesso' and registrador in lidos:
+                valor = self.valores_registradores[registrador]
+                parada = Parada('registrador', pc, ciclo, registrador, valor, valor)
+
+        if d.tipo in ('LW', 'SW'):
+            tamanho = 1 << (d.funct3 & 0b11)
+            for vigiado, tipo in self.memoria.items():
+                if not (endereco < vigiado + 4 and vigiado < endereco + tamanho):
+                    continue
+                anterior = self.valores_memoria[vigiado]
+                if d.tipo == 'SW':
+                    atual = palavra_apos_store(anterior, vigiado, endereco, valor_store, d.funct3)
+                    self.valores_memoria[vigiado] = atual
+                    if parada is None and (anterior != atual or tipo == 'acesso'):
+                        parada = Parada('memoria', pc, ciclo, vigiado, anterior, atual)
+                elif parada is None and tipo == 'acesso':
+                    parada = Parada('memoria', pc, ciclo, vigiado, anterior, anterior)
+        return parada
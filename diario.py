@@ -0,0 +1,256 @@
+from bisect import bisect_right
+from collections import deque, namedtuple
+from operator import attrgetter
+
+# Diário de execução para voltar ciclos no simulador. Cada ciclo executado pelo
+# diário guarda só o que ele mudou (valores antigos dos registradores, bytes
+# antigos da memória, registradores de pipeline alterados, pc, ciclo e
+# paradas), e de tempos em tempos é feito um checkpoint completo
+# (checkpoint.py). Para ir a um ciclo anterior o diário desfaz os ciclos um a
+# um ou restaura o checkpoint mais próximo antes do alvo e executa até ele, o
+# que for mais curto. Um limite de memória descarta os ciclos e checkpoints
+# mais antigos.
+#
+# Preditores com tabelas e caches mudam a cada ciclo de um jeito que não vale
+# a pena registrar: com eles o diário só guarda os checkpoints e volta sempre
+# reexecutando a partir do checkpoint.
+
+# Estado escalar do Simulador e dos Contadores guardado em todo ciclo
+CAMPOS_SIMULADOR = ('pc', 'ciclo', 'fim', 'parado', 'espera_if', 'pc_liberado',
+                    'espera_mem', 'mem_liberado', 'mem_parado')
+CAMPOS_CONTADORES = ('bolhas_load_use', 'instrucoes_descartadas',
+                     'ciclos_espera_icache', 'ciclos_espera_dcache')
+ler_simulador = attrgetter(*CAMPOS_SIMULADOR)
+ler_contadores = attrgetter(*CAMPOS_CONTADORES)
+
+# Tamanho aproximado em bytes de cada parte de um registro, para o limite de
+# memória. Os registros não são medidos (seria caro a cada ciclo): contam por
+# estas estimativas, que no CPython 3.11 de 64 bits ficam até uns 30% abaixo do
+# real. Os checkpoints contam pelo tamanho dos próprios bytes. O limite é
+# portanto aproximado.
+TAMANHO_REGISTRO = 400
+TAMANHO_REGISTRADOR = 70
+TAMANHO_LATCH = 250
+TAMANHO_ESCRITA = 90
+
+# O que desfazer um ciclo precisa: estado escalar de antes, (índice, valor
+# antigo) dos registradores alterados, (índice, estado antigo) dos
+# registradores de pipeline alterados, (endereço, bytes antigos) das escritas
+# na memória, pc // 4 da instrução retirada e o desvio registrado nas estatísticas
+Registro = namedtuple('Registro', ['simulador', 'contadores', 'usados', 'registradores',
+                                   'latches', 'memoria', 'retirada', 'desvio'])
+
+
+class Diario:
+    """Histórico limitado de um Simulador para voltar a ciclos anteriores.
+
+    Os ciclos precisam ser executados por executar_ciclo() para poderem ser
+    desfeitos um a um; ciclos executados direto no simulador (como no
+    "Executar Tudo") são acompanhados por sincronizar(), que só mantém os
+    checkpoints periódicos. Quando quem executa é outra thread, ela salva os
+    checkpoints no próprio simulador e o dono do diário os entrega com
+    receber_checkpoint().
+    """
+
+    def __init__(self, simulador, limite_bytes=64 * 2**20, intervalo_checkpoint=1000):
+        # limite_bytes é aproximado (ver TAMANHO_REGISTRO)
+        if intervalo_checkpoint < 1:
+            raise ValueError(f"Intervalo entre checkpoints inválido: {intervalo_checkpoint}")
+        self.simulador = simulador
+        self.limite_bytes = limite_bytes
+        self.intervalo_checkpoint = intervalo_checkpoint
+        self.registros = deque()
+        self.bytes_registros = 0
+        self.checkpoints = []  # (ciclo, bytes), em ordem de ciclo
+        self.bytes_checkpoints = 0
+        self.ciclo = simulador.ciclo  # ciclo em que o último registro termina
+        self.salvar_checkpoint()
+
+    @property
+    def ciclo_mais_antigo(self):
+        """Primeiro ciclo ao qual ainda é possível voltar"""
+        return self.checkpoints[0][0]
+
+    def exato(self):
+        """Indica se os ciclos do simulador atual podem ser desfeitos pelos registros.
+
+        Se não (caches ou preditor com tabelas), o diário só guarda checkpoints
+        e voltar reexecuta a partir deles; a interface avisa na barra de status.
+        """
+        simulador = self.simulador
+        preditor = simulador.preditor
+        return (simulador.cache_instrucoes is None and simulador.cache_dados is None
+                and (preditor is None or not preditor.campos_estado))
+
+    def salvar_checkpoint(self):
+        simulador = self.simulador
+        self.guardar_checkpoint(simulador.ciclo, simulador.salvar_estado())
+
+    def guardar_checkpoint(self, ciclo, dados):
+        self.checkpoints.append((ciclo, dados))
+        self.bytes_checkpoints += len(dados)
+        self.proximo_checkpoint = ciclo + self.intervalo_checkpoint
+
+    def receber_checkpoint(self, ciclo, dados):
+        """Guarda um checkpoint salvo por quem executou o simulador fora do diário.
+
+        Não lê o simulador, que pode estar em uso por outra thread: os
+        registros são descartados e sincronizar() acerta o ciclo depois.
+        """
+        self.registros.clear()
+        self.bytes_registros = 0
+        self.ciclo = ciclo
+        self.guardar_checkpoint(ciclo, dados)
+        self.limitar()
+
+    def sincronizar(self):
+        """Acompanha ciclos executados fora do diário.
+
+        Se o simulador andou sem passar por executar_ciclo os registros deixam
+        de formar uma sequência e são descartados; o checkpoint periódico é
+        feito normalmente.
+        """
+        simulador = self.simulador
+        if simulador.ciclo != self.ciclo:
+            self.registros.clear()
+            self.bytes_registros = 0
+            self.ciclo = simulador.ciclo
+        if simulador.ciclo >= self.proximo_checkpoint:
+            self.salvar_checkpoint()
+            self.limitar()
+
+    def executar_ciclo(self):
+        """Executa um ciclo do simulador guardando o necessário para desfazê-lo"""
+        simulador = self.simulador
+        if not self.exato():
+            simulador.executar_ciclo()
+            self.sincronizar()
+            return
+        if simulador.ciclo != self.ciclo:
+            self.sincronizar()
+
+        memoria = simulador.memoria_dados
+        bancoReg = simulador.bancoReg
+        registradores = list(bancoReg)
+        latches = [getattr(simulador, nome).estado() for nome in simulador.NOMES_LATCHES]
+        escalares = ler_simulador(simulador)
+        contadores = ler_contadores(simulador.contadores)
+        usados = memoria.usados
+        if simulador.modo == 'pipeline':
+            MEM_WB = simulador.MEM_WB
+            retirada = MEM_WB.pc >> 2 if MEM_WB.valido else None
+        else:
+            retirada = simulador.pc >> 2 if simulador.pc < len(simulador.instrucoes) * 4 else None
+        estatisticas = simulador.estatisticas_desvio
+        estatisticas.ultimo = None
+
+        anteriores = memoria.anteriores = []
+        try:
+            simulador.executar_ciclo()
+        finally:
+            memoria.anteriores = None
+            # Se o ciclo falhou no meio, o próximo sincronizar descarta os registros
+            self.ciclo = None
+
+        alterados = ()
+        if registradores != bancoReg:
+            alterados = [(i, valor) for i, valor in enumerate(registradores) if valor != bancoReg[i]]
+        latches_alterados = [(i, estado) for i, (nome, estado) in enumerate(zip(simulador.NOMES_LATCHES, latches))
+                             if getattr(simulador, nome).estado() != estado]
+        registro = Registro(escalares, contadores, usados, alterados, latches_alterados,
+                            anteriores, retirada, estatisticas.ultimo)
+        self.registros.append(registro)
+        self.bytes_registros += self.tamanho_registro(registro)
+        self.ciclo = simulador.ciclo
+        if simulador.ciclo >= self.proximo_checkpoint:
+            self.salvar_checkpoint()
+        self.limitar()
+
+    def desfazer(self, registro):
+        """Volta o simulador para antes do ciclo do registro (o último executado)"""
+        simulador = self.simulador
+        for campo, valor in zip(CAMPOS_SIMULADOR, registro.simulador):
+            setattr(simulador, campo, valor)
+        contadores = simulador.contadores
+        for campo, valor in zip(CAMPOS_CONTADORES, registro.contadores):
+            setattr(contadores, campo, valor)
+        if registro.retirada is not None:
+            contadores.por_pc[registro.retirada] -= 1
+        if registro.desvio is not None:
+            simulador.estatisticas_desvio.desfazer(*registro.desvio)
+        for i, valor in registro.registradores:
+            simulador.bancoReg[i] = valor
+        for i, estado in registro.latches:
+            getattr(simulador, simulador.NOMES_LATCHES[i]).restaurar(estado)
+        memoria = simulador.memoria_dados
+        # Na ordem inversa, para que o valor mais antigo de cada endereço prevaleça
+        for endereco, antigos in reversed(registro.memoria):
+            memoria.dados[endereco:endereco + len(antigos)] = antigos
+        memoria.usados = registro.usados
+
+    def ir_para(self, alvo):
+        """Leva o simulador ao ciclo alvo, para trás ou para frente.
+
+        Para frente executa direto no simulador até o alvo (ou até o fim do
+        programa), parando só para os checkpoints. Para trás o alvo precisa ser
+        pelo menos ciclo_mais_antigo.
+        """
+        simulador = self.simulador
+        if alvo >= simulador.ciclo:
+            while simulador.ciclo < alvo and not simulador.terminou():
+                simulador.executar(min(alvo, self.proximo_checkpoint), 'nenhum')
+                self.sincronizar()
+            return
+        if alvo < self.ciclo_mais_antigo:
+            raise ValueError(f"Ciclo {alvo} fora do diário: o mais antigo guardado é {self.ciclo_mais_antigo}")
+        self.sincronizar()
+
+        i = bisect_right(self.checkpoints, alvo, key=lambda checkpoint: checkpoint[0]) - 1
+        base, dados = self.checkpoints[i]
+        registros = self.registros
+        desfazendo = simulador.ciclo - alvo
+        if registros and registros[0].simulador[1] <= alvo and desfazendo <= alvo - base:
+            for _ in range(desfazendo):
+                registro = registros.pop()
+                self.bytes_registros -= self.tamanho_registro(registro)
+                self.desfazer(registro)
+            simulador.regs_escritos.clear()
+            simulador.memoria_dados.escritas.clear()
+            simulador.latches_alterados = []
+        else:
+            simulador.restaurar_estado(dados)
+            simulador.executar(alvo, 'nenhum')
+            while registros and registros[-1].simulador[1] >= alvo:
+                self.bytes_registros -= self.tamanho_registro(registros.pop())
+        self.ciclo = simulador.ciclo
+
+        # Daqui para frente a execução é refeita, com registros e checkpoints novos
+        for _, descartado in self.checkpoints[i + 1:]:
+            self.bytes_checkpoints -= len(descartado)
+        del self.checkpoints[i + 1:]
+        self.proximo_checkpoint = base + self.intervalo_checkpoint
+
+    def voltar(self, ciclos=1):
+        """Volta ciclos (limitado ao ciclo mais antigo guardado)"""
+        self.ir_para(max(self.simulador.ciclo - ciclos, self.ciclo_mais_antigo))
+
+    @staticmethod
+    def tamanho_registro(registro):
+        return (TAMANHO_REGISTRO + TAMANHO_REGISTRADOR * len(registro.registradores)
+                + TAMANHO_LATCH * len(registro.latches) + TAMANHO_ESCRITA * len(registro.memoria))
+
+    def limitar(self):
+        """Descarta os registros e checkpoints mais antigos até caber em limite_bytes.
+
+        O checkpoint mais recente nunca é descartado, para que seja sempre
+        possível voltar ao menos até ele.
+        """
+        while self.bytes_registros + self.bytes_checkpoints > self.limite_bytes:
+            if len(self.checkpoints) > 1 and (not self.registros
+                                              or self.registros[0].simulador[1] >= self.checkpoints[1][0]):
+                _, dados = self.checkpoints.pop(0)
+                self.bytes_checkpoints -= len(dados)
+            elif self.registros:
+                self.bytes_registros -= self.tamanho_registro(self.registros.popleft())
+            else:
+                break
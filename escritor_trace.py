@@ -0,0 +1,64 @@
+import threading
+
+
+class EscritorTrace:
+    """Escreve o log de execução em segundo plano.
+
+    O arquivo fica aberto durante toda a execução; os registros são acumulados
+    em memória e gravados por uma thread a cada `intervalo_flush` segundos ou
+    assim que `max_pendentes` registros se acumulam.
+    """
+
+    def __init__(self, caminho, intervalo_flush=0.5, max_pendentes=500):
+        self.caminho = caminho
+        self.intervalo_flush = intervalo_flush
+        self.max_pendentes = max_pendentes
+        self.arquivo = open(caminho, 'a', encoding='utf-8')
+        self.pendentes = []
+        self.condicao = threading.Condition()
+        # Garante que os lotes chegam ao arquivo na ordem em que foram retirados
+        self.trava_escrita = threading.Lock()
+        self.fechado = False
+        self.thread = threading.Thread(target=self._laco, name="EscritorTrace", daemon=True)
+        self.thread.start()
+
+    def escrever(self, registro):
+        """Enfileira um registro; não bloqueia esperando o disco"""
+        with self.condicao:
+            if self.fechado:
+                raise ValueError("EscritorTrace já foi fechado")
+            self.pendentes.append(registro)
+            if len(self.pendentes) >= self.max_pendentes:
+                self.condicao.notify()
+
+    def _gravar_pendentes(self):
+        with self.trava_escrita:
+            with self.condicao:
+                registros, self.pendentes = self.pendentes, []
+            if registros:
+                self.arquivo.write(''.join(registros))
+                self.arquivo.flush()
+
+    def _laco(self):
+        while True:
+            with self.condicao:
+                if not self.fechado and len(self.pendentes) < self.max_pendentes:
+                    self.condicao.wait(self.intervalo_flush)
+                fechado = self.fechado
+            self._gravar_pendentes()
+            if fechado:
+                return
+
+    def flush(self):
+        """Grava imediatamente tudo o que está pendente"""
+        self._gravar_pendentes()
+
+    def fechar(self):
+        """Grava o que falta e fecha o arquivo"""
+        with self.condicao:
+            if self.fechado:
+                return
+            self.fechado = True
+            self.condicao.notify()
+        self.thread.join()
+        self.arquivo.close()
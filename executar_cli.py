@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Executa o simulador RISC-V sem interface gráfica
+
+Exemplos:
+    python executar_cli.py TesteASM.asm
+    python executar_cli.py TesteASM.asm --trace intervalo --intervalo 1000
+    python executar_cli.py programa.asm --modo funcional --max-ciclos 1000000
+    python executar_cli.py benchmarks/bubble_sort.asm --modo funcional --traduzir --trace nenhum
+    python executar_cli.py benchmarks/teste_sem_nops.asm --forwarding --load-use
+    python executar_cli.py benchmarks/laco_longo.asm --preditor bht2 --estagio-desvio EX --max-ciclos 200000
+    python executar_cli.py programa.asm --icache --dcache tamanho=4096,linha=32,vias=4,penalidade=20
+    python executar_cli.py TesteASM.asm --contadores --contadores-json contadores.json
+    python executar_cli.py programa.asm --max-ciclos 1000000 --salvar-checkpoint parte1.ck
+    python executar_cli.py programa.asm --checkpoint parte1.ck --max-ciclos 2000000
+    python executar_cli.py benchmarks/bubble_sort.asm --max-ciclos 1000000 --gravar-trace bubble.trc
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Adicionar o diretório atual ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import checkpoint
+from cache import criar_cache
+from contadores import exportar_csv, exportar_json, formatar_resumo
+from decodificador import desmontar
+from montador import Montador
+from preditor import PREDITORES
+from simulador import Simulador
+from trace_execucao import GravadorTrace
+from tradutor import Tradutor
+
+
+def carregar_simulador(arquivo, modo='pipeline', gravar_bin=False, montador=None, **opcoes):
+    """Monta o arquivo .asm (ou usa o .bin direto) e devolve o simulador pronto.
+
+    O programa montado vai para o simulador em memória; com gravar_bin os
+    arquivos _data.bin e _text.bin também são gravados. Depois de montar, os
+    labels ficam no montador dado. opcoes vão direto para o Simulador
+    (forwarding, detectar_load_use, preditor...).
+    """
+    if arquivo.endswith('.asm'):
+        base_name = arquivo.rsplit('.', 1)[0]
+        dados, texto = (montador or Montador()).montar(arquivo, base_name, gravar=gravar_bin)
+        return Simulador(dados, texto, modo=modo, **opcoes)
+    return Simulador(None, arquivo, modo=modo, **opcoes)
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Simulador RISC-V com pipeline (linha de comando)")
+    parser.add_argument('arquivo', help="arquivo .asm ou .bin (seção .text) a executar")
+    parser.add_argument('--modo', choices=Simulador.MODOS, default='pipeline',
+                        help="modelo de execução (padrão: pipeline)")
+    parser.add_argument('--trace', choices=Simulador.NIVEIS_TRACE, default='final',
+                        help="o que imprimir durante a execução (padrão: final)")
+    parser.add_argument('--intervalo', type=int, default=1000,
+                        help="ciclos entre impressões com --trace intervalo (padrão: 1000)")
+    parser.add_argument('--max-ciclos', type=int, default=10000,
+                        help="limite de ciclos da execução (padrão: 10000)")
+    parser.add_argument('--forwarding', action='store_true',
+                        help="adianta o resultado em EX_MEM para o EX (modo pipeline)")
+    parser.add_argument('--load-use', action='store_true',
+                        help="para o pipeline um ciclo quando uma instrução usa o registrador de um load logo anterior")
+    parser.add_argument('--preditor', choices=list(PREDITORES),
+                        help="preditor de desvios consultado no IF (padrão: sempre não desvia, sem relatório)")
+    parser.add_argument('--estagio-desvio', choices=Simulador.ESTAGIOS_DESVIO, default='MEM',
+                        help="estágio onde desvios e saltos são resolvidos (padrão: MEM)")
+    especificacao = ("parâmetros separados por vírgula: tamanho, linha, vias, substituicao "
+                     "(LRU/FIFO/aleatoria), escrita (write-back/write-through), penalidade; "
+                     "sem valor usa 1024 B, linha de 16 B, 2 vias, LRU, write-back, 10 ciclos")
+    parser.add_argument('--icache', nargs='?', const='', metavar='PARAMS',
+                        help="cache de instruções no IF; " + especificacao)
+    parser.add_argument('--dcache', nargs='?', const='', metavar='PARAMS',
+                        help="cache de dados no MEM; mesmos parâmetros de --icache")
+    parser.add_argument('--contadores', action='store_true',
+                        help="imprime os contadores de desempenho (bolhas, mix de instruções, pcs mais executados)")
+    parser.add_argument('--contadores-json', metavar='ARQUIVO',
+                        help="salva os contadores de desempenho em JSON")
+    parser.add_argument('--contadores-csv', metavar='ARQUIVO',
+                        help="salva os contadores de desempenho em CSV (secao, nome, valor)")
+    parser.add_argument('--checkpoint', metavar='ARQUIVO',
+                        help="continua a partir de um checkpoint do mesmo programa (--max-ciclos conta desde o início)")
+    parser.add_argument('--salvar-checkpoint', metavar='ARQUIVO',
+                        help="grava o estado completo do simulador ao final")
+    parser.add_argument('--traduzir', action='store_true',
+                        help="traduz os blocos básicos repetidos para funções Python (modo funcional)")
+    parser.add_argument('--gravar-trace', metavar='ARQUIVO',
+                        help="grava um trace binário com um registro por ciclo (converta com converter_trace.py)")
+    parser.add_argument('--gravar-bin', action='store_true',
+                        help="grava também <arquivo>_data.bin e <arquivo>_text.bin ao montar um .asm")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    if args.intervalo < 1:
+        print("Erro: --intervalo deve ser pelo menos 1", file=sys.stderr)
+        return 2
+    if args.traduzir and args.modo != 'funcional':
+        print("Erro: --traduzir só vale com --modo funcional", file=sys.stderr)
+        return 2
+    if args.traduzir and args.gravar_trace:
+        print("Erro: --gravar-trace precisa de um registro por instrução e não vale com --traduzir", file=sys.stderr)
+        return 2
+
+    try:
+        cache_instrucoes = None if args.icache is None else criar_cache('I-cache', args.icache)
+        cache_dados = None if args.dcache is None else criar_cache('D-cache', args.dcache)
+        montador = Montador()
+        simulador = carregar_simulador(args.arquivo, args.modo, args.gravar_bin, montador,
+                                       forwarding=args.forwarding, detectar_load_use=args.load_use,
+                                       preditor=args.preditor, estagio_desvio=args.estagio_desvio,
+                                       cache_instrucoes=cache_instrucoes, cache_dados=cache_dados)
+        if args.checkpoint:
+            checkpoint.carregar_arquivo(simulador, args.checkpoint)
+            # O checkpoint traz as próprias caches
+            cache_instrucoes, cache_dados = simulador.cache_instrucoes, simulador.cache_dados
+    except (OSError, ValueError) as e:
+        print(f"Erro ao carregar {args.arquivo}: {e}", file=sys.stderr)
+        return 1
+
+    try:
+        gravador = GravadorTrace(args.gravar_trace, simulador, montador.labels_texto) if args.gravar_trace else None
+    except OSError as e:
+        print(f"Erro ao criar o trace {args.gravar_trace}: {e}", file=sys.stderr)
+        return 1
+
+    ciclo_inicial = simulador.ciclo
+    inicio = time.perf_counter()
+    tradutor = Tradutor() if args.traduzir else None
+    try:
+        simulador.executar(args.max_ciclos, args.trace, args.intervalo, tradutor, gravador)
+    finally:
+        if gravador is not None:
+            gravador.fechar()
+    duracao = time.perf_counter() - inicio
+
+    if not simulador.terminou():
+        print(f"\nAviso: limite de {args.max_ciclos} ciclos atingido antes do fim do programa")
+
+    ciclos_por_segundo = (simulador.ciclo - ciclo_inicial) / duracao if duracao > 0 else float('inf')
+    print(f"\nCiclos simulados: {simulador.ciclo}")
+    print(f"Tempo de execução: {duracao:.3f} s")
+    print(f"Ciclos por segundo: {ciclos_por_segundo:,.0f}")
+    resumo = simulador.resumo_contadores()
+    print(f"Instruções retiradas: {resumo['instrucoes_retiradas']} (CPI {resumo['cpi']:.3f})")
+    if gravador is not None:
+        print(f"Trace: {gravador.registros} ciclos gravados em {args.gravar_trace}")
+    if tradutor is not None:
+        print(f"Blocos traduzidos: {tradutor.traduzidos} "
+              f"({tradutor.instrucoes_traduzidas} instruções executadas por eles)")
+    if args.load_use:
+        print(f"Bolhas de load-use: {simulador.contadores.bolhas_load_use}")
+    if args.preditor or args.estagio_desvio != 'MEM':
+        print(f"\nDesvios ({args.preditor or 'nao_desvia'}, resolvidos no {args.estagio_desvio}):")
+        linhas = simulador.estatisticas_desvio.relatorio(
+            lambda pc: desmontar(simulador.decodificadas[pc // 4]))
+        print("\n".join(linhas))
+    for cache in (cache_instrucoes, cache_dados):
+        if cache is not None:
+            print()
+            print("\n".join(cache.relatorio()))
+    if args.contadores:
+        print("\nContadores de desempenho:")
+        print("\n".join("  " + linha for linha in formatar_resumo(resumo)))
+
+    try:
+        if args.contadores_json:
+            exportar_json(resumo, args.contadores_json)
+        if args.contadores_csv:
+            exportar_csv(resumo, args.contadores_csv)
+    except OSError as e:
+        print(f"Erro ao salvar os contadores: {e}", file=sys.stderr)
+        return 1
+
+    if args.salvar_checkpoint:
+        try:
+            checkpoint.salvar_arquivo(simulador, args.salvar_checkpoint)
+        except OSError as e:
+            print(f"Erro ao salvar o checkpoint: {e}", file=sys.stderr)
+            return 1
+        print(f"\nCheckpoint do ciclo {simulador.ciclo} salvo em {args.salvar_checkpoint}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
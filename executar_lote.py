@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Executa muitos programas .asm em paralelo e junta os resultados em um relatório
+
+Cada programa (de um diretório, de um padrão glob ou dado direto) é montado em
+memória e executado em um processo separado, usando todos os núcleos. Cada job
+tem limite de ciclos e de tempo; o relatório traz o status, os ciclos, o CPI, os
+registradores finais e as palavras de memória de cada programa.
+
+Exemplos:
+    python executar_lote.py entregas/
+    python executar_lote.py "entregas/**/*.asm" --json lote.json --csv lote.csv
+    python executar_lote.py testes/ --processos 4 --max-ciclos 500000 --tempo-limite 30
+    python executar_lote.py testes/ --forwarding --load-use --preditor bht2
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Adicionar o diretório atual ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cache import criar_cache
+from montador import Montador
+from preditor import PREDITORES
+from simulador import Simulador
+
+# Ciclos executados entre duas conferências do tempo limite de um job
+PASSO_CICLOS = 10000
+
+# Status de um programa no relatório
+STATUS = ('ok', 'limite_ciclos', 'tempo_esgotado', 'erro')
+
+# Caches passam para os jobs como especificação em texto e são criadas no
+# processo de cada job
+NOMES_CACHES = {'cache_instrucoes': 'I-cache', 'cache_dados': 'D-cache'}
+
+
+def listar_programas(entradas, recursivo=False):
+    """Arquivos .asm dos diretórios, padrões glob e arquivos dados, sem repetições"""
+    programas = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            padrao = os.path.join(entrada, '**', '*.asm') if recursivo else os.path.join(entrada, '*.asm')
+            encontrados = sorted(glob.glob(padrao, recursive=recursivo))
+        elif os.path.isfile(entrada):
+            encontrados = [entrada]
+        else:
+            encontrados = sorted(glob.glob(entrada, recursive=True))
+        programas.extend(encontrados)
+    return list(dict.fromkeys(programas))
+
+
+def executar_programa(caminho, max_ciclos, tempo_limite=None, opcoes=None):
+    """Monta e executa um programa, devolvendo o resultado do relatório (próprio para JSON).
+
+    Roda no processo do job. O tempo limite é conferido a cada PASSO_CICLOS
+    ciclos; opcoes vão para o Simulador, com as caches em texto (criar_cache).
+    Qualquer erro do programa fica no resultado em vez de derrubar o lote.
+    """
+    inicio = time.perf_counter()
+    resultado = {'arquivo': caminho, 'status': 'erro', 'ciclos': 0, 'instrucoes_retiradas': 0,
+                 'cpi': 0.0, 'tempo_s': 0.0, 'erro': None, 'registradores': [], 'memoria': {}}
+    try:
+        opcoes = dict(opcoes or {})
+        for chave, nome in NOMES_CACHES.items():
+            if isinstance(opcoes.get(chave), str):
+                opcoes[chave] = criar_cache(nome, opcoes[chave])
+        dados, texto = Montador().montar(caminho, gravar=False)
+        simulador = Simulador(dados, texto, **opcoes)
+
+        prazo = None if tempo_limite is None else inicio + tempo_limite
+        status = 'ok'
+        while not simulador.terminou():
+            if simulador.ciclo >= max_ciclos:
+                status = 'limite_ciclos'
+                break
+            if prazo is not None and time.perf_counter() > prazo:
+                status = 'tempo_esgotado'
+                break
+            simulador.executar(min(max_ciclos, simulador.ciclo + PASSO_CICLOS), 'nenhum')
+
+        resumo = simulador.resumo_contadores()
+        resultado.update({
+            'status': status,
+            'ciclos': simulador.ciclo,
+            'instrucoes_retiradas': resumo['instrucoes_retiradas'],
+            'cpi': resumo['cpi'],
+            'registradores': list(simulador.bancoReg),
+            'memoria': {f"0x{endereco:08X}": valor for endereco, valor in simulador.memoria_dados.palavras()},
+        })
+    except Exception as e:
+        resultado['erro'] = f"{type(e).__name__}: {e}"
+    resultado['tempo_s'] = time.perf_counter() - inicio
+    return resultado
+
+
+def executar_lote(programas, max_ciclos, tempo_limite=None, opcoes=None, processos=None, ao_concluir=None):
+    """Executa os programas em um pool de processos; resultados na ordem de programas.
+
+    ao_concluir(resultado, concluidos, total) é chamado no processo principal à
+    medida que os jobs terminam. Com processos=1 tudo roda neste processo.
+    """
+    resultados = [None] * len(programas)
+
+    def concluir(indice, resultado):
+        resultados[indice] = resultado
+        if ao_concluir is not None:
+            ao_concluir(resultado, sum(r is not None for r in resultados), len(programas))
+
+    if processos == 1:
+        for indice, caminho in enumerate(programas):
+            concluir(indice, executar_programa(caminho, max_ciclos, tempo_limite, opcoes))
+        return resultados
+
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        jobs = {executor.submit(executar_programa, caminho, max_ciclos, tempo_limite, opcoes): indice
+                for indice, caminho in enumerate(programas)}
+        for job in as_completed(jobs):
+            concluir(jobs[job], job.result())
+    return resultados
+
+
+def exportar_json(resultados, caminho, opcoes=None):
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump({'opcoes': opcoes or {}, 'programas': resultados}, f, ensure_ascii=False, indent=2)
+
+
+def exportar_csv(resultados, caminho):
+    """Uma linha por programa, com uma coluna por registrador e a memória em 'endereço=valor'"""
+    colunas = ['arquivo', 'status', 'ciclos', 'instrucoes_retiradas', 'cpi', 'tempo_s', 'erro']
+    with open(caminho, 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(colunas + [f"x{i}" for i in range(32)] + ['memoria'])
+        for resultado in resultados:
+            registradores = resultado['registradores'] or [''] * 32
+            memoria = ' '.join(f"{endereco}={valor}" for endereco, valor in resultado['memoria'].items())
+            escritor.writerow([resultado[coluna] for coluna in colunas] + registradores + [memoria])
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Execução em lote de programas RISC-V")
+    parser.add_argument('entradas', nargs='+',
+                        help="diretórios (todos os .asm), padrões glob ou arquivos .asm")
+    parser.add_argument('--recursivo', action='store_true',
+                        help="procura .asm também nos subdiretórios dos diretórios dados")
+    parser.add_argument('--processos', type=int, default=os.cpu_count(),
+                        help="processos em paralelo (padrão: número de núcleos)")
+    parser.add_argument('--max-ciclos', type=int, default=1000000,
+                        help="limite de ciclos de cada programa (padrão: 1000000)")
+    parser.add_argument('--tempo-limite', type=float, default=60.0,
+                        help="limite de tempo de cada programa em segundos; 0 desliga (padrão: 60)")
+    parser.add_argument('--modo', choices=Simulador.MODOS, default='pipeline',
+                        help="modelo de execução (padrão: pipeline)")
+    parser.add_argument('--forwarding', action='store_true',
+                        help="liga o forwarding de EX_MEM para o EX")
+    parser.add_argument('--load-use', action='store_true',
+                        help="para o pipeline um ciclo em dependências load-use")
+    parser.add_argument('--preditor', choices=list(PREDITORES),
+                        help="preditor de desvios consultado no IF")
+    parser.add_argument('--estagio-desvio', choices=Simulador.ESTAGIOS_DESVIO, default='MEM',
+                        help="estágio onde B e JAL são resolvidos (padrão: MEM)")
+    parser.add_argument('--icache', nargs='?', const='', metavar='PARAMS',
+                        help="liga a I-cache (ex.: tamanho=1024,linha=16,vias=1,penalidade=10)")
+    parser.add_argument('--dcache', nargs='?', const='', metavar='PARAMS',
+                        help="liga a D-cache (mesmos parâmetros da --icache)")
+    parser.add_argument('--json', metavar='ARQUIVO', help="salva o relatório em JSON")
+    parser.add_argument('--csv', metavar='ARQUIVO', help="salva o relatório em CSV (uma linha por programa)")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    if args.processos < 1:
+        print("Erro: --processos deve ser pelo menos 1", file=sys.stderr)
+        return 2
+
+    opcoes = {'modo': args.modo, 'forwarding': args.forwarding, 'detectar_load_use': args.load_use,
+              'preditor': args.preditor, 'estagio_desvio': args.estagio_desvio,
+              'cache_instrucoes': args.icache, 'cache_dados': args.dcache}
+    try:
+        # Confere as caches aqui, em vez de um erro igual em cada job
+        for chave, nome in NOMES_CACHES.items():
+            if opcoes[chave] is not None:
+                criar_cache(nome, opcoes[chave])
+    except ValueError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 2
+
+    programas = listar_programas(args.entradas, args.recursivo)
+    if not programas:
+        print("Nenhum arquivo .asm encontrado", file=sys.stderr)
+        return 1
+
+    def mostrar(resultado, concluidos, total):
+        detalhe = resultado['erro'] or f"{resultado['ciclos']} ciclos, CPI {resultado['cpi']:.3f}"
+        print(f"[{concluidos}/{total}] {resultado['arquivo']}: {resultado['status']} ({detalhe})")
+
+    tempo_limite = args.tempo_limite or None
+    inicio = time.perf_counter()
+    resultados = executar_lote(programas, args.max_ciclos, tempo_limite, opcoes, args.processos, mostrar)
+    duracao = time.perf_counter() - inicio
+
+    contagem = {status: sum(r['status'] == status for r in resultados) for status in STATUS}
+    print(f"\n{len(resultados)} programas em {duracao:.2f} s ({len(resultados) / duracao:.1f} por segundo, "
+          f"{args.processos} processos)")
+    print(", ".join(f"{status}: {quantidade}" for status, quantidade in contagem.items()))
+
+    try:
+        if args.json:
+            exportar_json(resultados, args.json, opcoes)
+        if args.csv:
+            exportar_csv(resultados, args.csv)
+    except OSError as e:
+        print(f"Erro ao salvar o relatório: {e}", file=sys.stderr)
+        return 1
+    return 1 if contagem['erro'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
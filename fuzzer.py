@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+Fuzzing diferencial: pipeline contra o modo funcional em programas aleatórios
+
+Cada semente gera um programa aleatório (todas as instruções suportadas, laços
+limitados por um contador, desvios e JALs para frente, loads e stores de todas
+as larguras) e sorteia uma configuração da microarquitetura. O programa roda no
+pipeline e, em passo travado, no modo funcional como referência: a cada
+instrução retirada pelo pipeline a referência executa uma instrução e os
+registradores, o pc e o store da instrução são comparados. A primeira
+diferença encerra o programa e é relatada com a semente, a configuração e a
+instrução. As sementes rodam em um pool de processos.
+
+Sem forwarding (ou sem parada de load-use) o gerador põe NOPs depois das
+instruções que escrevem registradores, como um programa escrito para esse
+pipeline faria; com os dois ligados as dependências ficam coladas.
+
+Valores de um parâmetro são separados por '|', como no varredura.py; os
+parâmetros não dados variam entre todos os valores (caches: nenhuma ou uma
+cache pequena, para ter faltas).
+
+Exemplos:
+    python fuzzer.py
+    python fuzzer.py --programas 5000 --processos 4 --salvar divergencias/
+    python fuzzer.py --tempo 60 -p forwarding=sim -p detectar_load_use=sim -p estagio_desvio=ID
+    python fuzzer.py --semente 1234 --programas 1 --mostrar
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Adicionar o diretório atual ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cache import criar_cache
+from decodificador import desmontar
+from executar_lote import NOMES_CACHES
+from memoria import FORMATOS_STORE
+from montador import Montador
+from preditor import PREDITORES
+from simulador import Simulador
+from varredura import ler_grade, valor
+
+# Cache pequena o bastante para os programas gerados terem faltas
+CACHE_PEQUENA = 'tamanho=64,linha=16,vias=2,penalidade=3'
+
+# Valores sorteados para os parâmetros que não vêm da linha de comando
+GRADE_PADRAO = {
+    'forwarding': [False, True],
+    'detectar_load_use': [False, True],
+    'preditor': [None] + list(PREDITORES),
+    'estagio_desvio': list(Simulador.ESTAGIOS_DESVIO),
+    'cache_instrucoes': [None, CACHE_PEQUENA],
+    'cache_dados': [None, CACHE_PEQUENA],
+}
+
+# Registradores do programa gerado: os livres recebem resultados; x27 guarda a
+# máscara aplicada depois de MUL e SLL (sem ela os valores crescem sem limite
+# nos laços), x28 e x29 são ponteiros para o vetor de dados, x30 é o endereço
+# do vetor e x31 o contador dos laços
+LIVRES = list(range(1, 27))
+MASCARA = 27
+PONTEIROS = (28, 29)
+BASE = 30
+CONTADOR = 31
+BASES_MEMORIA = (0,) + PONTEIROS + (BASE,)
+
+# Palavras do vetor de dados; os acessos vão até um pouco depois do fim dele
+# (leituras de zeros e escritas que fazem a memória crescer)
+PALAVRAS_DADOS = 48
+ALCANCE_MEMORIA = PALAVRAS_DADOS * 4 + 64
+
+OPERACOES_R = ['ADD', 'SUB', 'MUL', 'DIV', 'REM', 'XOR', 'AND', 'OR', 'SLL', 'SRL']
+LOADS = ['LB', 'LH', 'LW', 'LBU', 'LHU']
+STORES = ['SB', 'SH', 'SW']
+DESVIOS = ['BEQ', 'BNE', 'BLT', 'BGE']
+
+# Limite de ciclos por programa (os gerados terminam bem antes)
+MAX_CICLOS = 200000
+
+
+def sortear_configuracao(grade, rnd):
+    """Dict de opções do Simulador com um valor sorteado por parâmetro da grade"""
+    return {nome: rnd.choice(valores) for nome, valores in grade.items()}
+
+
+def gerar_programa(semente, blocos=10, nops=0, nops_load=0):
+    """Código-fonte (.asm) de um programa aleatório que sempre termina.
+
+    nops e nops_load são os NOPs postos depois de cada instrução que escreve
+    um registrador (e no início de cada bloco) e depois de cada load.
+    """
+    rnd = random.Random(semente)
+    recentes = []  # registradores escritos por último, lidos com mais frequência
+
+    def fonte():
+        if recentes and rnd.random() < 0.6:
+            return rnd.choice(recentes[-4:])
+        return rnd.randrange(32)
+
+    def destino():
+        rd = 0 if rnd.random() < 0.03 else rnd.choice(LIVRES)
+        recentes.append(rd)
+        del recentes[:-8]
+        return rd
+
+    def imediato():
+        return rnd.choice([rnd.randint(-8, 8), rnd.randint(-2048, 2047)])
+
+    def endereco():
+        base = rnd.choice(BASES_MEMORIA)
+        limite = ALCANCE_MEMORIA if base == 0 else ALCANCE_MEMORIA - 128
+        return f"{rnd.randrange(limite)}(x{base})"
+
+    def instrucao():
+        """Linhas de uma instrução do corpo de um bloco, com os NOPs depois dela"""
+        sorteio = rnd.random()
+        if sorteio < 0.35:
+            op = rnd.choice(OPERACOES_R)
+            a, b = fonte(), fonte()
+            rd = destino()
+            linhas = [f"{op} x{rd}, x{a}, x{b}"]
+            if op in ('MUL', 'SLL'):
+                linhas += ['NOP'] * nops + [f"AND x{rd}, x{rd}, x{MASCARA}"]
+        elif sorteio < 0.5:
+            op = rnd.choice(['ADDI', 'ADDI', 'SLLI', 'SRLI'])
+            a = fonte()
+            imm = rnd.randrange(32) if op != 'ADDI' else imediato()
+            linhas = [f"{op} x{destino()}, x{a}, {imm}"]
+        elif sorteio < 0.55:
+            linhas = [rnd.choice([f"LI x{destino()}, {imediato()}", f"MV x{destino()}, x{fonte()}"])]
+        elif sorteio < 0.6:
+            linhas = [f"ADDI x{rnd.choice(PONTEIROS)}, x{BASE}, {rnd.randrange(128)}"]
+        elif sorteio < 0.78:
+            linhas = [f"{rnd.choice(LOADS)} x{destino()}, {endereco()}"]
+            return linhas + ['NOP'] * max(nops, nops_load)
+        elif sorteio < 0.95:
+            return [f"{rnd.choice(STORES)} x{fonte()}, {endereco()}"]
+        else:
+            return ['NOP']
+        return linhas + ['NOP'] * nops
+
+    linhas = ['.data']
+    linhas.append(f"antes: .word {', '.join(str(rnd.randint(-99, 99)) for _ in range(rnd.randrange(1, 5)))}")
+    linhas.append(f"dados: .word {', '.join(str(rnd.randint(-2**31, 2**31 - 1)) for _ in range(PALAVRAS_DADOS))}")
+    linhas.append('.text')
+    iniciais = [f"LI x{CONTADOR}, {rnd.randint(1, 40)}", f"LI x{MASCARA}, {rnd.choice([255, 2047])}",
+                f"ADDI x{BASE}, x0, dados"]
+    iniciais += [f"ADDI x{ponteiro}, x{BASE}, {rnd.randrange(128)}" for ponteiro in PONTEIROS]
+    iniciais += [f"LI x{rd}, {imediato()}" for rd in rnd.sample(LIVRES, 8)]
+    for linha in iniciais:
+        linhas += [linha] + ['NOP'] * nops
+
+    for i in range(blocos):
+        linhas.append(f"b{i}:")
+        linhas += ['NOP'] * nops
+        # Blocos vazios deixam desvios e JALs colados uns nos outros
+        for _ in range(rnd.randint(0, 8) if rnd.random() < 0.7 else 0):
+            linhas += instrucao()
+
+        alvo = f"b{rnd.randint(i + 1, blocos)}" if i + 1 < blocos else 'fim'
+        alvo = 'fim' if alvo == f"b{blocos}" else alvo
+        sorteio = rnd.random()
+        if sorteio < 0.25:
+            # Laço: volta enquanto o contador (comum a todos os laços) for positivo
+            linhas.append(f"ADDI x{CONTADOR}, x{CONTADOR}, -1")
+            linhas += ['NOP'] * nops
+            linhas.append(f"BLT x0, x{CONTADOR}, b{rnd.randint(0, i)}")
+        elif sorteio < 0.55:
+            linhas.append(f"{rnd.choice(DESVIOS)} x{fonte()}, x{fonte()}, {alvo}")
+        elif sorteio < 0.7:
+            if rnd.random() < 0.3:
+                linhas.append(f"J {alvo}")
+            else:
+                linhas.append(f"JAL x{destino()}, {alvo}")
+                linhas += ['NOP'] * nops
+    linhas.append('fim:')
+    return "\n".join(linhas) + "\n"
+
+
+def nops_necessarios(configuracao):
+    """(NOPs depois de cada escrita, NOPs depois de cada load) para a configuração"""
+    forwarding = configuracao.get('forwarding', False)
+    load_use = configuracao.get('detectar_load_use', False)
+    return 0 if forwarding else 2, 0 if forwarding and load_use else 2
+
+
+def divergencia(tipo, simulador, pc, indice, detalhe):
+    d = simulador.decodificadas[pc >> 2] if 0 <= pc < len(simulador.decodificadas) * 4 else None
+    return {
+        'tipo': tipo,
+        'indice': indice,
+        'ciclo': simulador.ciclo,
+        'pc': pc,
+        'instrucao': desmontar(d) if d is not None else None,
+        'detalhe': detalhe,
+    }
+
+
+def comparar(dados, texto, configuracao, max_ciclos=MAX_CICLOS):
+    """Executa o programa no pipeline e na referência em passo travado.
+
+    Devolve (instruções conferidas, ciclos do pipeline, divergência ou None).
+    """
+    opcoes = dict(configuracao)
+    for chave, nome in NOMES_CACHES.items():
+        if opcoes.get(chave) is not None:
+            opcoes[chave] = criar_cache(nome, opcoes[chave])
+    pipeline = Simulador(dados, texto, **opcoes)
+    referencia = Simulador(dados, texto, modo='funcional')
+    MEM_WB = pipeline.MEM_WB
+    regs, regs_ref = pipeline.bancoReg, referencia.bancoReg
+    memoria, memoria_ref = pipeline.memoria_dados, referencia.memoria_dados
+    decodificadas = pipeline.decodificadas
+    # pc -> (endereço, bytes escritos) dos stores feitos no MEM e ainda não
+    # retirados (o MEM escreve um ciclo antes do WB retirar a instrução)
+    stores = {}
+    conferidas = 0
+
+    try:
+        while not pipeline.terminou():
+            if pipeline.ciclo >= max_ciclos:
+                return conferidas, pipeline.ciclo, divergencia(
+                    'limite_ciclos', pipeline, pipeline.pc, conferidas,
+                    f"{max_ciclos} ciclos sem terminar (referência em pc=0x{referencia.pc:X})")
+            retirada = MEM_WB.pc if MEM_WB.valido else None
+            pipeline.executar_ciclo()
+            if memoria.escritas:
+                endereco = memoria.escritas[0]
+                tamanho = FORMATOS_STORE[MEM_WB.funct3][0].size
+                stores[MEM_WB.pc] = (endereco, bytes(memoria.dados[endereco:endereco + tamanho]))
+            if retirada is None:
+                continue
+
+            if referencia.pc != retirada:
+                return conferidas, pipeline.ciclo, divergencia(
+                    'pc', pipeline, retirada, conferidas,
+                    f"retirou pc=0x{retirada:X}, a referência executaria pc=0x{referencia.pc:X}")
+            referencia.executar_funcional(1)
+            conferidas += 1
+
+            if regs != regs_ref:
+                # Um JAL logo atrás da instrução retirada já escreveu o rd no MEM
+                adiantado = MEM_WB.rd if MEM_WB.valido and MEM_WB.tipo == 'J' else 0
+                diferentes = [r for r in range(1, 32) if regs[r] != regs_ref[r] and r != adiantado]
+                if diferentes:
+                    return conferidas, pipeline.ciclo, divergencia(
+                        'registrador', pipeline, retirada, conferidas - 1,
+                        ', '.join(f"x{r}={regs[r]} (esperado {regs_ref[r]})" for r in diferentes))
+
+            if decodificadas[retirada >> 2].tipo == 'SW':
+                obtido = stores.pop(retirada, None)
+                endereco = memoria_ref.escritas[0]
+                tamanho = FORMATOS_STORE[decodificadas[retirada >> 2].funct3][0].size
+                esperado = (endereco, bytes(memoria_ref.dados[endereco:endereco + tamanho]))
+                if obtido != esperado:
+                    return conferidas, pipeline.ciclo, divergencia(
+                        'store', pipeline, retirada, conferidas - 1,
+                        f"escreveu {formatar_store(obtido)}, esperado {formatar_store(esperado)}")
+    except Exception as e:
+        return conferidas, pipeline.ciclo, divergencia(
+            'excecao', pipeline, pipeline.pc, conferidas, f"{type(e).__name__}: {e}")
+
+    if not referencia.fim and referencia.pc < len(referencia.decodificadas) * 4:
+        return conferidas, pipeline.ciclo, divergencia(
+            'fim', pipeline, referencia.pc, conferidas,
+            f"o pipeline terminou e a referência ainda executaria pc=0x{referencia.pc:X}")
+    if memoria.estado() != memoria_ref.estado():
+        return conferidas, pipeline.ciclo, divergencia(
+            'memoria', pipeline, pipeline.pc, conferidas, "memória final diferente da referência")
+    return conferidas, pipeline.ciclo, None
+
+
+def formatar_store(store):
+    if store is None:
+        return "nada"
+    endereco, valor = store
+    return f"{valor.hex()} em 0x{endereco:X}"
+
+
+def verificar(semente, grade, max_ciclos=MAX_CICLOS, blocos=10):
+    """Gera o programa e a configuração da semente e compara pipeline e referência"""
+    configuracao = sortear_configuracao(grade, random.Random(f"configuracao {semente}"))
+    nops, nops_load = nops_necessarios(configuracao)
+    fonte = gerar_programa(semente, blocos, nops, nops_load)
+    dados, texto = Montador().montar_fonte(fonte)
+    conferidas, ciclos, falha = comparar(dados, texto, configuracao, max_ciclos)
+    return {
+        'semente': semente,
+        'configuracao': configuracao,
+        'instrucoes': conferidas,
+        'ciclos': ciclos,
+        'divergencia': falha,
+        'fonte': fonte if falha is not None else None,
+    }
+
+
+def descrever_configuracao(configuracao):
+    return ' '.join(f"-p {nome}={valor(v)}" for nome, v in configuracao.items())
+
+
+def relatar(resultado):
+    """Linhas de texto descrevendo a divergência de um resultado"""
+    falha = resultado['divergencia']
+    instrucao = f" {falha['instrucao']}" if falha['instrucao'] else ''
+    return [
+        f"Divergência na semente {resultado['semente']} ({falha['tipo']}):",
+        f"  configuração: {descrever_configuracao(resultado['configuracao'])}",
+        f"  instrução retirada nº {falha['indice']}, ciclo {falha['ciclo']}, "
+        f"pc=0x{falha['pc']:X}{instrucao}",
+        f"  {falha['detalhe']}",
+    ]
+
+
+def salvar(resultado, diretorio):
+    """Grava o programa divergente em <diretorio>/fuzz_<semente>.asm com o relato no topo"""
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = os.path.join(diretorio, f"fuzz_{resultado['semente']}.asm")
+    with open(caminho, 'w', encoding='utf-8') as f:
+        for linha in relatar(resultado):
+            f.write(f"# {linha}\n")
+        f.write(resultado['fonte'])
+    return caminho
+
+
+def fuzzar(sementes, grade, processos=None, max_ciclos=MAX_CICLOS, blocos=10, tempo=None, ao_concluir=None):
+    """Verifica as sementes (um iterável, pode ser infinito) em um pool de processos.
+
+    Para quando as sementes acabam, quando o tempo (em segundos) se esgota ou
+    quando ao_concluir(resultado) devolve True. Devolve os resultados na
+    ordem em que terminaram.
+    """
+    limite = None if tempo is None else time.perf_counter() + tempo
+    sementes = iter(sementes)
+    resultados = []
+
+    def esgotado():
+        return limite is not None and time.perf_counter() >= limite
+
+    if processos == 1:
+        for semente in sementes:
+            if esgotado():
+                break
+            resultados.append(verificar(semente, grade, max_ciclos, blocos))
+            if ao_concluir is not None and ao_concluir(resultados[-1]):
+                break
+        return resultados
+
+    processos = processos or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        # Poucos jobs em voo por processo, para que parar (por tempo ou na
+        # primeira divergência) não espere uma fila longa
+        pendentes = set()
+        parar = False
+        while True:
+            while not parar and len(pendentes) < 4 * processos and not esgotado():
+                semente = next(sementes, None)
+                if semente is None:
+                    break
+                pendentes.add(executor.submit(verificar, semente, grade, max_ciclos, blocos))
+            if not pendentes:
+                break
+            prontos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+            for job in prontos:
+                resultados.append(job.result())
+                if ao_concluir is not None and ao_concluir(resultados[-1]):
+                    parar = True
+            if parar or esgotado():
+                for job in pendentes:
+                    job.cancel()
+                break
+    return resultados
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Fuzzing diferencial do pipeline contra o modo funcional")
+    parser.add_argument('--programas', type=int, default=200,
+                        help="quantidade de programas gerados (padrão: 200; com --tempo, sem limite)")
+    parser.add_argument('--tempo', type=float, metavar='SEGUNDOS',
+                        help="gera programas até esgotar o tempo")
+    parser.add_argument('--semente', type=int, default=0,
+                        help="primeira semente; as seguintes são consecutivas (padrão: 0)")
+    parser.add_argument('-p', '--parametro', action='append', default=[], metavar='NOME=V1|V2',
+                        help=f"valores sorteados de um parâmetro ({', '.join(GRADE_PADRAO)}); pode repetir")
+    parser.add_argument('--blocos', type=int, default=10,
+                        help="blocos básicos por programa (padrão: 10)")
+    parser.add_argument('--max-ciclos', type=int, default=MAX_CICLOS,
+                        help=f"limite de ciclos de cada programa (padrão: {MAX_CICLOS})")
+    parser.add_argument('--processos', type=int, default=os.cpu_count(),
+                        help="processos em paralelo (padrão: número de núcleos)")
+    parser.add_argument('--salvar', metavar='DIR',
+                        help="grava cada programa divergente em DIR/fuzz_<semente>.asm")
+    parser.add_argument('--parar', action='store_true',
+                        help="para no primeiro programa divergente")
+    parser.add_argument('--mostrar', action='store_true',
+                        help="mostra o código-fonte dos programas divergentes")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    if args.processos < 1 or args.programas < 1 or args.blocos < 1:
+        print("Erro: --processos, --programas e --blocos devem ser pelo menos 1", file=sys.stderr)
+        return 2
+    try:
+        grade = {**GRADE_PADRAO, **ler_grade(args.parametro)}
+    except ValueError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 2
+    if 'modo' in grade:
+        print("Erro: o fuzzer sempre compara o modo pipeline com o funcional", file=sys.stderr)
+        return 2
+
+    if args.tempo is None:
+        sementes = range(args.semente, args.semente + args.programas)
+    else:
+        sementes = itertools.count(args.semente)
+    divergentes = []
+
+    def concluir(resultado):
+        if resultado['divergencia'] is None:
+            return False
+        divergentes.append(resultado)
+        print("\n".join(relatar(resultado)))
+        if args.mostrar:
+            print(resultado['fonte'])
+        if args.salvar:
+            print(f"  programa salvo em {salvar(resultado, args.salvar)}")
+        return args.parar
+
+    inicio = time.perf_counter()
+    resultados = fuzzar(sementes, grade, args.processos, args.max_ciclos, args.blocos, args.tempo, concluir)
+    duracao = time.perf_counter() - inicio
+
+    instrucoes = sum(r['instrucoes'] for r in resultados)
+    ciclos = sum(r['ciclos'] for r in resultados)
+    print(f"\n{len(resultados)} programas, {instrucoes:,} instruções conferidas ({ciclos:,} ciclos) "
+          f"em {duracao:.1f} s: {instrucoes / duracao * 60:,.0f} instruções/min")
+    print(f"{len(divergentes)} programas divergentes")
+    return 1 if divergentes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
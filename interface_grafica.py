@@ -1,11 +1,30 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import os
+import queue
 import struct
+import threading
+import time
+import checkpoint
 from montador import Montador
 from simulador import Simulador
+from decodificador import Desmontador
+from contadores import formatar_resumo
+from depuracao import TIPOS_WATCHPOINT, PontosParada, descrever
+from diario import Diario
+from escritor_trace import EscritorTrace
+from trace_execucao import TextoTrace, palavras_escritas
 
 class InterfaceSimuladorRISCV:
+    # Estágio exibido para cada registrador de pipeline (WB mostra o MEM_WB do ciclo anterior)
+    ESTAGIO_DO_LATCH = {'IF_ID': 'IF', 'ID_EX': 'ID', 'EX_MEM': 'EX', 'MEM_WB': 'MEM'}
+    # Segundos entre redesenhos durante "Executar Tudo" (a tela lê a fila nesse ritmo)
+    INTERVALO_ATUALIZACAO = 0.05
+    # Memória máxima (bytes, aproximada) do diário usado para voltar ciclos
+    LIMITE_DIARIO = 64 * 2**20
+    # PCs mais executados mostrados na aba de desempenho
+    MAX_PCS_DESEMPENHO = 20
+
     def __init__(self, root):
         self.root = root
         self.root.title("Simulador RISC-V com Pipeline")
@@ -13,12 +32,34 @@ class InterfaceSimuladorRISCV:
         
         # Estado do simulador
         self.simulador = None
+        self.estado_inicial = None  # Checkpoint em memória usado pelo Reset
+        self.diario = None  # Histórico para voltar ciclos (diario.py)
+        self.pontos_parada = PontosParada()  # Breakpoints e watchpoints do "Executar até Parada"
         self.montador = Montador()
         self.arquivo_asm = None
         self.arquivo_bin = None
         self.executando = False
         self.arquivo_saida = None
+        self.escritor_trace = None  # Grava o *_saida.out em segundo plano
+        # Execução em segundo plano do "Executar Tudo": a thread manda lotes de
+        # alterações pela fila e a tela os aplica a cada INTERVALO_ATUALIZACAO
+        self.thread_execucao = None
+        self.fila_execucao = queue.Queue()
+        self.continuar_execucao = threading.Event()
+        self.parar_execucao = threading.Event()
+        self.memoria_desatualizada = False
         self.wb_buffer = {}  # Buffer para rastrear o que está no estágio WB
+        # Textos assembly (com os labels do programa) e texto do log
+        # (trace_execucao.py), refeitos a cada programa carregado
+        self.desmontador = Desmontador()
+        self.texto_trace = None
+        
+        # Alterações acumuladas desde a última atualização da tela
+        self.regs_pendentes = set()
+        self.memoria_pendente = set()
+        self.estagios_pendentes = set()
+        self.wb_exibido = {}
+        self.linhas_memoria = {}  # endereço -> linha no memoria_text
         
         # Configurar interface
         self.setup_interface()
@@ -32,7 +73,10 @@ class InterfaceSimuladorRISCV:
         menubar.add_cascade(label="Arquivo", menu=file_menu)
         file_menu.add_command(label="Abrir arquivo .asm", command=self.abrir_arquivo)
         file_menu.add_separator()
-        file_menu.add_command(label="Sair", command=self.root.quit)
+        file_menu.add_command(label="Salvar checkpoint...", command=self.salvar_checkpoint)
+        file_menu.add_command(label="Carregar checkpoint...", command=self.carregar_checkpoint)
+        file_menu.add_separator()
+        file_menu.add_command(label="Sair", command=self.fechar)
         
         # Frame principal
         main_frame = ttk.Frame(self.root)
@@ -52,12 +96,36 @@ class InterfaceSimuladorRISCV:
         self.btn_executar = ttk.Button(btn_frame, text="Executar Próximo Ciclo", command=self.executar_ciclo, state=tk.DISABLED)
         self.btn_executar.pack(side=tk.LEFT, padx=(0, 10))
         
+        self.btn_voltar = ttk.Button(btn_frame, text="Voltar Ciclo", command=self.voltar_ciclo, state=tk.DISABLED)
+        self.btn_voltar.pack(side=tk.LEFT, padx=(0, 10))
+        
         self.btn_executar_tudo = ttk.Button(btn_frame, text="Executar Tudo", command=self.executar_tudo, state=tk.DISABLED)
         self.btn_executar_tudo.pack(side=tk.LEFT, padx=(0, 10))
         
+        self.btn_executar_ate = ttk.Button(btn_frame, text="Executar até Parada", command=self.executar_ate_parada, state=tk.DISABLED)
+        self.btn_executar_ate.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.btn_pausar = ttk.Button(btn_frame, text="Pausar", command=self.pausar_execucao, state=tk.DISABLED)
+        self.btn_pausar.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.btn_parar = ttk.Button(btn_frame, text="Parar", command=self.interromper_execucao, state=tk.DISABLED)
+        self.btn_parar.pack(side=tk.LEFT, padx=(0, 10))
+        
         self.btn_reset = ttk.Button(btn_frame, text="Reset", command=self.reset_simulador, state=tk.DISABLED)
         self.btn_reset.pack(side=tk.LEFT, padx=(0, 10))
         
+        # Limite de ciclos de cada "Executar Tudo"
+        ttk.Label(btn_frame, text="Máx. ciclos:").pack(side=tk.LEFT, padx=(20, 0))
+        self.limite_ciclos = tk.IntVar(value=10000)
+        ttk.Spinbox(btn_frame, from_=1, to=10**9, increment=1000, width=10,
+                    textvariable=self.limite_ciclos).pack(side=tk.LEFT, padx=(5, 0))
+        
+        # Unidade de forwarding e detecção de load-use (valem ao carregar ou resetar)
+        self.usar_forwarding = tk.BooleanVar(value=False)
+        self.usar_load_use = tk.BooleanVar(value=False)
+        ttk.Checkbutton(btn_frame, text="Forwarding", variable=self.usar_forwarding).pack(side=tk.LEFT, padx=(20, 0))
+        ttk.Checkbutton(btn_frame, text="Parada em load-use", variable=self.usar_load_use).pack(side=tk.LEFT, padx=(10, 0))
+        
         # Info do arquivo
         info_frame = ttk.Frame(control_frame)
         info_frame.pack(fill=tk.X, pady=(10, 0))
@@ -71,6 +139,13 @@ class InterfaceSimuladorRISCV:
         self.lbl_ciclo = ttk.Label(info_frame, text="0", font=("Arial", 10, "bold"))
         self.lbl_ciclo.pack(side=tk.LEFT, padx=(10, 0))
         
+        # Ir direto para um ciclo (para trás usa o diário)
+        self.ciclo_destino = tk.IntVar(value=0)
+        ttk.Spinbox(info_frame, from_=0, to=10**9, increment=1, width=10,
+                    textvariable=self.ciclo_destino).pack(side=tk.LEFT, padx=(30, 0))
+        self.btn_ir_ciclo = ttk.Button(info_frame, text="Ir para ciclo", command=self.ir_para_ciclo, state=tk.DISABLED)
+        self.btn_ir_ciclo.pack(side=tk.LEFT, padx=(5, 0))
+        
         # Notebook para as abas
         self.notebook = ttk.Notebook(main_frame)
         self.notebook.pack(fill=tk.BOTH, expand=True)
@@ -87,6 +162,12 @@ class InterfaceSimuladorRISCV:
         # Aba 4: Log de Execução
         self.setup_log_tab()
         
+        # Aba 5: Desempenho
+        self.setup_desempenho_tab()
+        
+        # Aba 6: Depuração (breakpoints e watchpoints)
+        self.setup_depuracao_tab()
+        
         # Status bar
         self.status_bar = ttk.Label(self.root, text="Pronto", relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
@@ -220,7 +301,60 @@ class InterfaceSimuladorRISCV:
         self.log_text = scrolledtext.ScrolledText(log_frame, height=25, font=("Courier", 9))
         self.log_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
+    def setup_desempenho_tab(self):
+        # Aba Desempenho
+        desempenho_frame = ttk.Frame(self.notebook)
+        self.notebook.add(desempenho_frame, text="Desempenho")
+        
+        # Título
+        ttk.Label(desempenho_frame, text="Contadores de Desempenho", font=("Arial", 14, "bold")).pack(pady=10)
+        
+        # Text widget para os contadores (CPI, bolhas, mix e pcs mais executados)
+        self.desempenho_text = scrolledtext.ScrolledText(desempenho_frame, height=25, font=("Courier", 10))
+        self.desempenho_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+    def setup_depuracao_tab(self):
+        # Aba Depuração
+        depuracao_frame = ttk.Frame(self.notebook)
+        self.notebook.add(depuracao_frame, text="Depuração")
+        
+        # Título
+        ttk.Label(depuracao_frame, text="Breakpoints e Watchpoints", font=("Arial", 14, "bold")).pack(pady=10)
+        
+        # Um campo por tipo de ponto de parada; watchpoints com tipo alteração/acesso
+        form_frame = ttk.Frame(depuracao_frame)
+        form_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        ttk.Label(form_frame, text="Breakpoint (label ou pc):").grid(row=0, column=0, sticky=tk.W)
+        self.entrada_breakpoint = ttk.Entry(form_frame, width=20)
+        self.entrada_breakpoint.grid(row=0, column=1, padx=5, pady=2)
+        ttk.Button(form_frame, text="Adicionar", command=self.adicionar_breakpoint).grid(row=0, column=3, padx=5)
+        
+        ttk.Label(form_frame, text="Watch de registrador (x5, t0...):").grid(row=1, column=0, sticky=tk.W)
+        self.entrada_watch_reg = ttk.Entry(form_frame, width=20)
+        self.entrada_watch_reg.grid(row=1, column=1, padx=5, pady=2)
+        self.tipo_watch_reg = tk.StringVar(value=TIPOS_WATCHPOINT[0])
+        ttk.Combobox(form_frame, textvariable=self.tipo_watch_reg, values=TIPOS_WATCHPOINT,
+                     state='readonly', width=10).grid(row=1, column=2)
+        ttk.Button(form_frame, text="Adicionar", command=self.adicionar_watch_registrador).grid(row=1, column=3, padx=5)
+        
+        ttk.Label(form_frame, text="Watch de memória (label ou endereço):").grid(row=2, column=0, sticky=tk.W)
+        self.entrada_watch_mem = ttk.Entry(form_frame, width=20)
+        self.entrada_watch_mem.grid(row=2, column=1, padx=5, pady=2)
+        self.tipo_watch_mem = tk.StringVar(value=TIPOS_WATCHPOINT[0])
+        ttk.Combobox(form_frame, textvariable=self.tipo_watch_mem, values=TIPOS_WATCHPOINT,
+                     state='readonly', width=10).grid(row=2, column=2)
+        ttk.Button(form_frame, text="Adicionar", command=self.adicionar_watch_memoria).grid(row=2, column=3, padx=5)
+        
+        # Lista dos pontos ativos: (tipo, chave) de cada linha em self.itens_pontos
+        self.lista_pontos = tk.Listbox(depuracao_frame, height=15, font=("Courier", 10))
+        self.lista_pontos.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.itens_pontos = []
+        ttk.Button(depuracao_frame, text="Remover Selecionado", command=self.remover_ponto).pack(pady=(0, 10))
+        
     def abrir_arquivo(self):
+        if self.executando:
+            return
         arquivo = filedialog.askopenfilename(
             title="Selecionar arquivo Assembly ou binário",
             filetypes=[("Assembly files", "*.asm"), ("All files", "*.*")]
@@ -239,37 +373,68 @@ class InterfaceSimuladorRISCV:
             try:
                 if self.arquivo_asm:
                     base_name = arquivo.rsplit('.', 1)[0]
-                    self.montador.montar(arquivo, base_name)
+                    # Montado em memória: as imagens vão direto para o simulador,
+                    # sem gravar e reler os .bin
+                    dados, texto = self.montador.montar(arquivo, base_name, gravar=False)
                     
                     # Inicializar simulador
-                    data_file = f"{base_name}_data.bin"
-                    text_file = f"{base_name}_text.bin"
-                    
-                    self.simulador = Simulador(data_file, text_file)
-                    self.wb_buffer = {}  # Inicializar buffer do WB
+                    self.novo_simulador(dados, texto)
 
                 elif self.arquivo_bin:
                     base_name = os.path.basename(arquivo)
-                    self.simulador = Simulador(None, base_name)
+                    # Um .bin não tem labels
+                    self.montador.labels_dados, self.montador.labels_texto = {}, {}
+                    self.novo_simulador(None, base_name)
                     
                 # Habilitar botões
                 self.btn_executar.config(state=tk.NORMAL)
                 self.btn_executar_tudo.config(state=tk.NORMAL)
+                self.btn_executar_ate.config(state=tk.NORMAL)
                 self.btn_reset.config(state=tk.NORMAL)
+                self.btn_voltar.config(state=tk.NORMAL)
+                self.btn_ir_ciclo.config(state=tk.NORMAL)
                 
                 # Atualizar displays
                 self.atualizar_interface()
                 
                 # Preparar arquivo de saída
                 self.arquivo_saida = f"{base_name}_saida.out"
-                with open(self.arquivo_saida, 'w', encoding='utf-8') as f:
-                    f.write("=== LOG DE EXECUÇÃO DO SIMULADOR RISC-V ===\n\n")
+                self.iniciar_arquivo_saida()
                 
                 self.log("Arquivo montado e simulador inicializado com sucesso!")
                 
             except Exception as e:
                 messagebox.showerror("Erro", f"Erro ao processar arquivo: {str(e)}")
                 
+    def novo_diario(self):
+        """Cria o diário do simulador atual.
+
+        Devolve um aviso para a barra de status ('' se não há) quando o diário
+        só guarda checkpoints e voltar ciclos precisa reexecutar a partir deles.
+        """
+        self.diario = Diario(self.simulador, self.LIMITE_DIARIO)
+        if self.diario.exato():
+            return ""
+        self.log("Caches ou preditor com tabelas: voltar ciclos reexecuta a partir do último checkpoint")
+        return " (voltar ciclos reexecuta desde o checkpoint)"
+
+    def novo_simulador(self, data_file, text_file):
+        """Cria o simulador e zera o que a interface guarda do anterior"""
+        self.simulador = Simulador(data_file, text_file, forwarding=self.usar_forwarding.get(),
+                                   detectar_load_use=self.usar_load_use.get())
+        self.simulador.rastrear_latches = True
+        self.desmontador = Desmontador(self.montador.labels_texto)
+        self.texto_trace = TextoTrace(self.simulador.instrucoes, self.desmontador)
+        self.estado_inicial = self.simulador.salvar_estado()
+        self.novo_diario()
+        # Breakpoints e watchpoints são do programa anterior
+        self.pontos_parada = PontosParada()
+        self.atualizar_lista_pontos()
+        self.wb_buffer = {}  # Inicializar buffer do WB
+        self.regs_pendentes.clear()
+        self.memoria_pendente.clear()
+        self.estagios_pendentes.clear()
+
     def executar_ciclo(self):
         """Executa um ciclo do simulador"""
         if not self.simulador:
@@ -277,99 +442,358 @@ class InterfaceSimuladorRISCV:
             
         try:
             # Capturar o que estava em MEM_WB antes da execução (isso irá para WB)
-            self.wb_buffer = self.simulador.MEM_WB.copy() if self.simulador.MEM_WB else {}
+            self.wb_buffer = self.simulador.MEM_WB.snapshot()
             
-            # Executar um ciclo
-            self.simulador.executar_ciclo()
+            # Executar um ciclo (guardando no diário o que for preciso para voltar)
+            self.diario.executar_ciclo()
+            self.regs_pendentes.update(self.simulador.regs_escritos)
+            self.memoria_pendente.update(e & ~3 for e in self.simulador.memoria_dados.escritas)
+            self.estagios_pendentes.update(self.simulador.latches_alterados)
             
             # Atualizar interface
-            self.atualizar_interface()
+            self.atualizar_interface(completa=False)
             
             # Log do ciclo
             self.log_ciclo()
             
             # Verificar se terminou
             if self.simulador_terminou():
-                self.btn_executar.config(state=tk.DISABLED)
-                self.btn_executar_tudo.config(state=tk.DISABLED)
-                self.status_bar.config(text="Execução finalizada")
-                self.log("=== EXECUÇÃO FINALIZADA ===")
+                self.finalizar_execucao()
                 
         except Exception as e:
             messagebox.showerror("Erro", f"Erro durante execução: {str(e)}")
             
+    def finalizar_execucao(self):
+        """Desabilita a execução quando o programa chega ao fim"""
+        if self.escritor_trace:
+            self.escritor_trace.flush()
+        self.btn_executar.config(state=tk.DISABLED)
+        self.btn_executar_tudo.config(state=tk.DISABLED)
+        self.btn_executar_ate.config(state=tk.DISABLED)
+        self.status_bar.config(text="Execução finalizada")
+        self.log("=== EXECUÇÃO FINALIZADA ===")
+            
     def executar_tudo(self):
-        """Executa o programa completo"""
-        if not self.simulador:
+        """Executa o programa completo em segundo plano, sem travar a janela"""
+        self.iniciar_execucao(self.laco_execucao, "ExecutarTudo", self.wb_buffer)
+        
+    def executar_ate_parada(self):
+        """Executa em segundo plano, sem redesenhar nada, até um breakpoint ou watchpoint"""
+        self.iniciar_execucao(self.laco_ate_parada, "ExecutarAteParada")
+        
+    def iniciar_execucao(self, laco, nome, *args):
+        """Roda laco na thread de execução com o limite do campo Máx. ciclos.
+
+        laco recebe (limite, proximo_checkpoint, intervalo_checkpoint, *args):
+        o diário fica com a tela, e a thread só manda os checkpoints para ele.
+        """
+        if not self.simulador or self.executando:
+            return
+            
+        try:
+            max_ciclos = self.limite_ciclos.get()
+            if max_ciclos < 1:
+                raise ValueError
+        except (tk.TclError, ValueError):
+            messagebox.showerror("Erro", "O máximo de ciclos deve ser um inteiro positivo")
             return
             
         self.executando = True
-        self.btn_executar_tudo.config(state=tk.DISABLED)
+        self.configurar_botoes_execucao()
+        self.status_bar.config(text="Executando...")
+        
+        self.continuar_execucao.set()
+        self.parar_execucao.clear()
+        self.thread_execucao = threading.Thread(
+            target=laco, name=nome, daemon=True,
+            args=(self.simulador.ciclo + max_ciclos, self.diario.proximo_checkpoint,
+                  self.diario.intervalo_checkpoint, *args))
+        self.thread_execucao.start()
+        self.root.after(int(self.INTERVALO_ATUALIZACAO * 1000), self.consumir_fila_execucao)
         
+    def laco_execucao(self, limite, proximo_checkpoint, intervalo_checkpoint, wb):
+        """Corpo da thread de "Executar Tudo".
+
+        Não toca em widgets nem no estado da tela (wb_buffer, diário): acumula o
+        que mudou e manda para a fila uma cópia (lote) a cada
+        INTERVALO_ATUALIZACAO segundos, ao pausar e ao terminar. wb é o que o
+        estágio WB mostrava ao começar.
+        """
+        simulador = self.simulador
+        fila = self.fila_execucao
+        ciclo_inicial = simulador.ciclo
+        regs, memoria, estagios, registros = set(), set(), set(), []
+        
+        def enviar_lote():
+            # O WB vai sempre: quem compara com o wb_exibido é aplicar_lote, na
+            # thread da tela
+            fila.put(('lote', {
+                'ciclo': simulador.ciclo,
+                'estagios': self.dados_estagios(wb),
+                'estagios_alterados': set(estagios),
+                'regs': {i: simulador.bancoReg[i] for i in regs},
+                'memoria': {e: simulador.memoria_dados.ler_palavra(e) for e in memoria},
+                'log': "\n".join(registros),
+                'desempenho': simulador.resumo_contadores(self.MAX_PCS_DESEMPENHO),
+            }))
+            regs.clear()
+            memoria.clear()
+            estagios.clear()
+            registros.clear()
+            
         try:
-            ciclo_inicial = self.simulador.ciclo
-            while not self.simulador_terminou() and self.simulador.ciclo < 10000:
-                self.executar_ciclo()
+            proximo_envio = time.perf_counter() + self.INTERVALO_ATUALIZACAO
+            while not simulador.terminou() and simulador.ciclo < limite:
+                if self.parar_execucao.is_set():
+                    break
+                if not self.continuar_execucao.is_set():
+                    enviar_lote()
+                    fila.put(('pausado', simulador.ciclo))
+                    self.continuar_execucao.wait()
+                    continue
+                    
+                wb = simulador.MEM_WB.snapshot()
+                simulador.executar_ciclo()
+                if simulador.ciclo >= proximo_checkpoint:
+                    proximo_checkpoint = self.enviar_checkpoint(intervalo_checkpoint)
+                regs.update(simulador.regs_escritos)
+                memoria.update(e & ~3 for e in simulador.memoria_dados.escritas)
+                estagios.update(self.ESTAGIO_DO_LATCH[nome] for nome in simulador.latches_alterados)
                 
-                # Atualizar interface a cada 10 ciclos para melhor performance
-                if self.simulador.ciclo % 10 == 0:
-                    self.root.update()
+                registro = self.registro_ciclo(wb)
+                registros.append(registro)
+                if self.escritor_trace:
+                    self.escritor_trace.escrever(registro + "\n")
                     
-            self.log(f"Execução completa em {self.simulador.ciclo - ciclo_inicial} ciclos")
+                if time.perf_counter() >= proximo_envio:
+                    enviar_lote()
+                    proximo_envio = time.perf_counter() + self.INTERVALO_ATUALIZACAO
+                    
+            enviar_lote()
+            fila.put(('fim', simulador.ciclo - ciclo_inicial))
+        except Exception as e:
+            fila.put(('erro', str(e)))
             
+    def laco_ate_parada(self, limite, proximo_checkpoint, intervalo_checkpoint):
+        """Corpo da thread de "Executar até Parada".
+
+        Usa Simulador.executar_ate, sem log nem lotes para a tela, em trechos
+        que terminam nos checkpoints do diário (onde também dá para pausar ou
+        parar). Manda só ('parada', (ciclos, parada)) no fim.
+        """
+        simulador = self.simulador
+        fila = self.fila_execucao
+        ciclo_inicial = simulador.ciclo
+        parada = None
+        try:
+            while not simulador.terminou() and simulador.ciclo < limite:
+                if self.parar_execucao.is_set():
+                    break
+                if not self.continuar_execucao.is_set():
+                    fila.put(('pausado', simulador.ciclo))
+                    self.continuar_execucao.wait()
+                    continue
+                parada = simulador.executar_ate(self.pontos_parada, min(limite, proximo_checkpoint))
+                if simulador.ciclo >= proximo_checkpoint:
+                    proximo_checkpoint = self.enviar_checkpoint(intervalo_checkpoint)
+                if parada is not None:
+                    break
+            fila.put(('parada', (simulador.ciclo - ciclo_inicial, parada)))
         except Exception as e:
-            messagebox.showerror("Erro", f"Erro durante execução: {str(e)}")
-        finally:
-            self.executando = False
+            fila.put(('erro', str(e)))
             
-    def reset_simulador(self):
-        """Reseta o simulador para o estado inicial"""
-        if self.arquivo_asm:
-            try:
-                base_name = self.arquivo_asm.rsplit('.', 1)[0]
-                data_file = f"{base_name}_data.bin"
-                text_file = f"{base_name}_text.bin"
-                
-                self.simulador = Simulador(data_file, text_file)
-                self.wb_buffer = {}  
-                self.atualizar_interface()
-                
-                self.btn_executar.config(state=tk.NORMAL)
-                self.btn_executar_tudo.config(state=tk.NORMAL)
-                
-                self.status_bar.config(text="Simulador resetado")
-                self.log("=== SIMULADOR RESETADO ===")
-                
-            except Exception as e:
-                messagebox.showerror("Erro", f"Erro ao resetar: {str(e)}")
+    def enviar_checkpoint(self, intervalo_checkpoint):
+        """Salva um checkpoint na thread de execução e o manda para o diário.
 
-        elif self.arquivo_bin:
+        Devolve o ciclo do próximo checkpoint.
+        """
+        simulador = self.simulador
+        self.fila_execucao.put(('checkpoint', (simulador.ciclo, simulador.salvar_estado())))
+        return simulador.ciclo + intervalo_checkpoint
+            
+    def consumir_fila_execucao(self):
+        """Aplica na tela os lotes mandados pela thread de execução"""
+        fim = None
+        while True:
             try:
-                text_file = os.path.basename(self.arquivo_bin)
-                
-                self.simulador = Simulador(None, text_file)
-                self.wb_buffer = {}  
-                self.atualizar_interface()
-                
-                self.btn_executar.config(state=tk.NORMAL)
-                self.btn_executar_tudo.config(state=tk.NORMAL)
-                
-                self.status_bar.config(text="Simulador resetado")
-                self.log("=== SIMULADOR RESETADO ===")
+                mensagem, conteudo = self.fila_execucao.get_nowait()
+            except queue.Empty:
+                break
+            if mensagem == 'lote':
+                self.aplicar_lote(conteudo)
+            elif mensagem == 'checkpoint':
+                self.diario.receber_checkpoint(*conteudo)
+            elif mensagem == 'pausado':
+                self.status_bar.config(text=f"Pausado no ciclo {conteudo}")
+                self.btn_pausar.config(text="Continuar", state=tk.NORMAL)
+            else:
+                fim = (mensagem, conteudo)
                 
-            except Exception as e:
-                messagebox.showerror("Erro", f"Erro ao resetar: {str(e)}")
+        if fim is None:
+            self.root.after(int(self.INTERVALO_ATUALIZACAO * 1000), self.consumir_fila_execucao)
+            return
+            
+        # A thread terminou: a partir daqui o simulador volta a ser só da tela
+        self.thread_execucao.join()
+        self.thread_execucao = None
+        self.executando = False
+        self.diario.sincronizar()
+        if self.memoria_desatualizada:
+            self.atualizar_memoria()
+        if self.escritor_trace:
+            self.escritor_trace.flush()
+            
+        self.configurar_botoes_execucao()
+        if self.simulador_terminou():
+            self.finalizar_execucao()
+            
+        mensagem, conteudo = fim
+        if mensagem == 'parada':
+            conteudo, parada = conteudo
+            # Volta e refaz o último ciclo para o WB mostrar a instrução concluída
+            self.mudar_ciclo(self.simulador.ciclo)
+            if parada is not None:
+                self.log(f"Parada após {conteudo} ciclos: {descrever(parada)}")
+                self.status_bar.config(text=descrever(parada))
+                return
+        if mensagem == 'erro':
+            messagebox.showerror("Erro", f"Erro durante execução: {conteudo}")
+        elif self.parar_execucao.is_set():
+            self.log(f"Execução interrompida após {conteudo} ciclos")
+            self.status_bar.config(text="Execução interrompida")
+        else:
+            self.log(f"Execução completa em {conteudo} ciclos")
+            if not self.simulador_terminou():
+                self.status_bar.config(text="Limite de ciclos atingido")
+            
+    def aplicar_lote(self, lote):
+        """Redesenha só o que mudou no lote, sem ler o simulador (que está em uso pela thread)"""
+        self.lbl_ciclo.config(text=str(lote['ciclo']))
+        self.wb_buffer = lote['estagios']['WB']
+        estagios = lote['estagios_alterados']
+        if lote['estagios']['WB'] != self.wb_exibido:
+            estagios.add('WB')
+        if estagios:
+            self.atualizar_pipeline(estagios, lote['estagios'])
+        if lote['regs']:
+            self.atualizar_registradores(lote['regs'], lote['regs'])
+        if lote['memoria'] and not self.atualizar_memoria(lote['memoria'], lote['memoria']):
+            # Endereço novo: a lista inteira é refeita quando a thread parar
+            self.memoria_desatualizada = True
+        if lote['log']:
+            self.log(lote['log'])
+        self.atualizar_desempenho(lote['desempenho'])
+            
+    def pausar_execucao(self):
+        """Pausa ou retoma o "Executar Tudo" em andamento"""
+        if not self.executando:
+            return
+        if self.continuar_execucao.is_set():
+            self.continuar_execucao.clear()
+            self.btn_pausar.config(state=tk.DISABLED)
+        else:
+            self.btn_pausar.config(text="Pausar")
+            self.status_bar.config(text="Executando...")
+            self.continuar_execucao.set()
+            
+    def interromper_execucao(self):
+        """Para o "Executar Tudo" em andamento no fim do ciclo atual"""
+        if not self.executando:
+            return
+        self.parar_execucao.set()
+        self.continuar_execucao.set()
+        
+    def configurar_botoes_execucao(self):
+        """Habilita os controles de acordo com haver ou não execução em andamento"""
+        durante = tk.NORMAL if self.executando else tk.DISABLED
+        fora = tk.DISABLED if self.executando else tk.NORMAL
+        self.btn_pausar.config(text="Pausar", state=durante)
+        self.btn_parar.config(state=durante)
+        for botao in (self.btn_carregar, self.btn_executar, self.btn_executar_tudo, self.btn_executar_ate,
+                      self.btn_reset, self.btn_voltar, self.btn_ir_ciclo):
+            botao.config(state=fora)
+            
+    def reset_simulador(self):
+        """Reseta o simulador para o estado inicial"""
+        if self.executando or not self.simulador:
+            return
+        try:
+            # Volta ao checkpoint feito ao carregar, sem reler os arquivos .bin
+            self.simulador.restaurar_estado(self.estado_inicial)
+            self.simulador.forwarding = self.usar_forwarding.get()
+            self.simulador.detectar_load_use = self.usar_load_use.get()
+            aviso = self.novo_diario()
+            self.wb_buffer = {}
+            self.regs_pendentes.clear()
+            self.memoria_pendente.clear()
+            self.estagios_pendentes.clear()
+            self.atualizar_interface()
+            
+            self.btn_executar.config(state=tk.NORMAL)
+            self.btn_executar_tudo.config(state=tk.NORMAL)
+            self.btn_executar_ate.config(state=tk.NORMAL)
+            
+            self.status_bar.config(text="Simulador resetado" + aviso)
+            self.log("=== SIMULADOR RESETADO ===")
+            
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao resetar: {str(e)}")
+
+    def voltar_ciclo(self):
+        """Desfaz o último ciclo executado"""
+        if self.simulador:
+            self.mudar_ciclo(self.simulador.ciclo - 1)
+
+    def ir_para_ciclo(self):
+        """Vai para o ciclo do campo ao lado do botão, para frente ou para trás"""
+        try:
+            alvo = self.ciclo_destino.get()
+            if alvo < 0:
+                raise ValueError
+        except (tk.TclError, ValueError):
+            messagebox.showerror("Erro", "O ciclo deve ser um inteiro não negativo")
+            return
+        self.mudar_ciclo(alvo)
+
+    def mudar_ciclo(self, alvo):
+        """Leva o simulador ao ciclo alvo pelo diário e redesenha a tela"""
+        if self.executando or not self.simulador or alvo < 0:
+            return
+        try:
+            # Para o WB mostrar o que saiu do MEM_WB, o último ciclo é executado de novo
+            if alvo > self.diario.ciclo_mais_antigo:
+                self.diario.ir_para(alvo - 1)
+                self.wb_buffer = self.simulador.MEM_WB.snapshot()
+                if not self.simulador_terminou():
+                    self.diario.executar_ciclo()
+            else:
+                self.diario.ir_para(alvo)
+                self.wb_buffer = {}
+        except ValueError as e:
+            messagebox.showerror("Erro", str(e))
+            return
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao mudar de ciclo: {str(e)}")
+            return
+            
+        self.regs_pendentes.clear()
+        self.memoria_pendente.clear()
+        self.estagios_pendentes.clear()
+        self.atualizar_interface()
+        
+        estado = tk.DISABLED if self.simulador_terminou() else tk.NORMAL
+        self.btn_executar.config(state=estado)
+        self.btn_executar_tudo.config(state=estado)
+        self.btn_executar_ate.config(state=estado)
+        self.status_bar.config(text=f"Ciclo {self.simulador.ciclo}")
+        self.log(f"=== CICLO {self.simulador.ciclo} ===")
 
     def simulador_terminou(self):
         """Verifica se o simulador terminou a execução"""
         if not self.simulador:
             return True
             
-        return (self.simulador.pc >= len(self.simulador.instrucoes) * 4 and
-                not self.simulador.IF_ID and
-                not self.simulador.ID_EX and
-                not self.simulador.EX_MEM and
-                not self.simulador.MEM_WB)
+        return self.simulador.terminou()
     
     def capturar_estado_pipeline(self):
         """Captura o estado atual do pipeline"""
@@ -377,50 +801,63 @@ class InterfaceSimuladorRISCV:
             return {}
             
         # Antes de executar o ciclo, salvar o que estava em MEM_WB como o atual WB
-        self.wb_buffer = self.simulador.MEM_WB.copy() if self.simulador.MEM_WB else {}
+        self.wb_buffer = self.simulador.MEM_WB.snapshot()
             
         return {
-            'IF_ID': self.simulador.IF_ID.copy(),
-            'ID_EX': self.simulador.ID_EX.copy(),
-            'EX_MEM': self.simulador.EX_MEM.copy(),
-            'MEM_WB': self.simulador.MEM_WB.copy(),
-            'WB': self.wb_buffer.copy(),
+            'IF_ID': self.simulador.IF_ID.snapshot(),
+            'ID_EX': self.simulador.ID_EX.snapshot(),
+            'EX_MEM': self.simulador.EX_MEM.snapshot(),
+            'MEM_WB': self.wb_buffer,
+            'WB': self.wb_buffer,
             'pc': self.simulador.pc,
             'ciclo': self.simulador.ciclo
         }
         
-    def atualizar_interface(self):
-        """Atualiza toda a interface com o estado atual"""
+    def atualizar_interface(self, completa=True):
+        """Atualiza a interface com o estado atual.
+
+        Com completa=False só são redesenhados os registradores, as palavras de
+        memória e os estágios que mudaram desde a última atualização.
+        """
         if not self.simulador:
             return
             
         # Atualizar ciclo
         self.lbl_ciclo.config(text=str(self.simulador.ciclo))
         
-        # Atualizar pipeline
-        self.atualizar_pipeline()
-        
-        # Atualizar registradores
-        self.atualizar_registradores()
-        
-        # Atualizar memória
-        self.atualizar_memoria()
+        if completa:
+            self.atualizar_pipeline()
+            self.atualizar_registradores()
+            self.atualizar_memoria()
+        else:
+            estagios = {self.ESTAGIO_DO_LATCH[nome] for nome in self.estagios_pendentes}
+            if self.wb_buffer != self.wb_exibido:
+                estagios.add('WB')
+            if estagios:
+                self.atualizar_pipeline(estagios)
+            if self.regs_pendentes:
+                self.atualizar_registradores(self.regs_pendentes)
+            if self.memoria_pendente:
+                self.atualizar_memoria(self.memoria_pendente)
+        self.atualizar_desempenho()
+                
+        self.regs_pendentes.clear()
+        self.memoria_pendente.clear()
+        self.estagios_pendentes.clear()
         
-    def atualizar_pipeline(self):
-        """Atualiza a visualização do pipeline"""
+    def atualizar_pipeline(self, estagios=None, stage_data=None):
+        """Atualiza a visualização do pipeline (só os estágios dados, se houver)"""
         if not self.simulador:
             return
             
         # Mapear estágios para seus dados
-        stage_data = {
-            'IF': self.simulador.IF_ID,
-            'ID': self.simulador.ID_EX,
-            'EX': self.simulador.EX_MEM,
-            'MEM': self.simulador.MEM_WB,
-            'WB': self.wb_buffer  # Usar o buffer para mostrar o que está sendo processado no WB
-        }
+        if stage_data is None:
+            stage_data = self.dados_estagios(self.wb_buffer)
+        self.wb_exibido = stage_data['WB']
         
         for stage, data in stage_data.items():
+            if estagios is not None and stage not in estagios:
+                continue
             widgets = self.stage_widgets[stage]
             text_widget = widgets['text']
             assembly_label = widgets['assembly']
@@ -438,7 +875,7 @@ class InterfaceSimuladorRISCV:
                 text_widget.insert(tk.END, f"PC: {pc_hex}\nInstrução: {instrucao_hex}\n")
                 text_widget.insert(tk.END, f"Binário: {data['instrucao']:032b}")
                 # Para IF, precisamos decodificar a instrução para mostrar o assembly
-                assembly_text = self.decodificar_instrucao_raw(data['instrucao'])
+                assembly_text = self.decodificar_instrucao_raw(data['instrucao'], data['pc'])
                 
             elif stage == 'ID' and data:
                 text_widget.insert(tk.END, f"Tipo: {data.get('tipo', 'N/A')}\n")
@@ -450,7 +887,7 @@ class InterfaceSimuladorRISCV:
                     text_widget.insert(tk.END, f"RS2: x{data['rs2']}\n")
                 if 'imm' in data:
                     text_widget.insert(tk.END, f"IMM: {data['imm']}")
-                assembly_text = self.simulador.instrucao_para_assembly(data)
+                assembly_text = self.simulador.instrucao_para_assembly(data, self.desmontador)
                     
             elif stage == 'EX' and data:
                 text_widget.insert(tk.END, f"Tipo: {data.get('tipo', 'N/A')}\n")
@@ -460,13 +897,13 @@ class InterfaceSimuladorRISCV:
                     text_widget.insert(tk.END, f"Endereço: 0x{data['endereco']:08X}\n")
                 if 'desvia' in data:
                     text_widget.insert(tk.END, f"Desvia: {data['desvia']}\n")
-                assembly_text = self.simulador.instrucao_para_assembly(data)
+                assembly_text = self.simulador.instrucao_para_assembly(data, self.desmontador)
                     
             elif stage == 'MEM' and data:
                 text_widget.insert(tk.END, f"Tipo: {data.get('tipo', 'N/A')}\n")
                 if 'resultado' in data:
                     text_widget.insert(tk.END, f"Dados: {data['resultado']}\n")
-                assembly_text = self.simulador.instrucao_para_assembly(data)
+                assembly_text = self.simulador.instrucao_para_assembly(data, self.desmontador)
                     
             elif stage == 'WB' and data:
                 text_widget.insert(tk.END, f"Tipo: {data.get('tipo', 'N/A')}\n")
@@ -476,7 +913,7 @@ class InterfaceSimuladorRISCV:
                     text_widget.insert(tk.END, f"Valor: {data['resultado']}\n")
                 else:
                     text_widget.insert(tk.END, "Nenhuma escrita\n(instrução tipo S/B)")
-                assembly_text = self.simulador.instrucao_para_assembly(data)
+                assembly_text = self.simulador.instrucao_para_assembly(data, self.desmontador)
                 
             if not data:
                 if stage == 'WB':
@@ -490,94 +927,19 @@ class InterfaceSimuladorRISCV:
             # Atualizar label da instrução assembly
             assembly_label.config(text=assembly_text if assembly_text else "---")
             
-    def decodificar_instrucao_raw(self, instr):
+    def decodificar_instrucao_raw(self, instr, pc=None):
         """Decodifica uma instrução raw para formato assembly (para estágio IF)"""
-        opcode = instr & 0x7F
-        
-        if opcode == 0b0110011:  # Tipo R
-            rd = (instr >> 7) & 0x1F
-            funct3 = (instr >> 12) & 0x7
-            rs1 = (instr >> 15) & 0x1F
-            rs2 = (instr >> 20) & 0x1F
-            funct7 = (instr >> 25) & 0x7F
-            
-            if funct3 == 0 and funct7 == 0:
-                return f"ADD x{rd}, x{rs1}, x{rs2}"
-            elif funct3 == 0 and funct7 == 32:
-                return f"SUB x{rd}, x{rs1}, x{rs2}"
-            elif funct3 == 7:
-                return f"AND x{rd}, x{rs1}, x{rs2}"
-            elif funct3 == 6:
-                return f"OR x{rd}, x{rs1}, x{rs2}"
-            else:
-                return f"R-type x{rd}, x{rs1}, x{rs2}"
-                
-        elif opcode == 0b0010011:  # Tipo I
-            rd = (instr >> 7) & 0x1F
-            funct3 = (instr >> 12) & 0x7
-            rs1 = (instr >> 15) & 0x1F
-            imm = (instr >> 20) & 0xFFF
-            imm = imm - 4096 if imm & 0x800 else imm
-            
-            if funct3 == 0:
-                return f"ADDI x{rd}, x{rs1}, {imm}"
-            else:
-                return f"I-type x{rd}, x{rs1}, {imm}"
-                
-        elif opcode == 0b0000011:  # LW
-            rd = (instr >> 7) & 0x1F
-            rs1 = (instr >> 15) & 0x1F
-            imm = (instr >> 20) & 0xFFF
-            imm = imm - 4096 if imm & 0x800 else imm
-            return f"LW x{rd}, {imm}(x{rs1})"
-            
-        elif opcode == 0b0100011:  # SW
-            rs1 = (instr >> 15) & 0x1F
-            rs2 = (instr >> 20) & 0x1F
-            imm11_5 = (instr >> 25) & 0x7F
-            imm4_0 = (instr >> 7) & 0x1F
-            imm = (imm11_5 << 5) | imm4_0
-            imm = imm - 4096 if imm & 0x800 else imm
-            return f"SW x{rs2}, {imm}(x{rs1})"
-            
-        elif opcode == 0b1100011:  # Tipo B
-            funct3 = (instr >> 12) & 0x7
-            rs1 = (instr >> 15) & 0x1F
-            rs2 = (instr >> 20) & 0x1F
-            imm12 = (instr >> 31) & 0x1
-            imm10_5 = (instr >> 25) & 0x3F
-            imm4_1 = (instr >> 8) & 0xF
-            imm11 = (instr >> 7) & 0x1
-            imm = (imm12 << 12) | (imm11 << 11) | (imm10_5 << 5) | (imm4_1 << 1)
-            imm = imm - 8192 if imm & 0x1000 else imm
-            
-            if funct3 == 0:
-                return f"BEQ x{rs1}, x{rs2}, {imm}"
-            elif funct3 == 1:
-                return f"BNE x{rs1}, x{rs2}, {imm}"
-            else:
-                return f"B-type x{rs1}, x{rs2}, {imm}"
-                
-        elif opcode == 0b1101111:  # JAL
-            rd = (instr >> 7) & 0x1F
-            imm = (
-                ((instr >> 31) & 0x1) << 20 |
-                ((instr >> 21) & 0x3FF) << 1 |
-                ((instr >> 20) & 0x1) << 11 |
-                ((instr >> 12) & 0xFF) << 12
-            )
-            imm = imm - (1 << 21) if imm & (1 << 20) else imm
-            return f"JAL x{rd}, {imm}"
-            
-        return "Instrução desconhecida"
-            
-    def atualizar_registradores(self):
-        """Atualiza a visualização dos registradores"""
+        return self.desmontador.texto(instr, pc)
+            
+    def atualizar_registradores(self, indices=range(32), valores=None):
+        """Atualiza a visualização dos registradores (só os índices dados, se houver)"""
         if not self.simulador:
             return
             
-        for i in range(32):
-            valor = self.simulador.bancoReg[i]
+        if valores is None:
+            valores = self.simulador.bancoReg
+        for i in indices:
+            valor = valores[i]
             self.reg_labels[i].config(text=f"{valor}")
             
             # Destacar registradores modificados (simplificado)
@@ -586,92 +948,110 @@ class InterfaceSimuladorRISCV:
             else:
                 self.reg_labels[i].config(background="white")
                 
-    def atualizar_memoria(self):
-        """Atualiza a visualização da memória"""
+    def atualizar_memoria(self, enderecos=None, valores=None):
+        """Atualiza a visualização da memória.
+
+        Com enderecos, reescreve só as linhas dessas palavras; o texto inteiro
+        é refeito apenas se alguma delas ainda não aparece na tela. Com valores
+        (dict endereço -> palavra) a memória do simulador não é lida, e em vez
+        de refazer o texto devolve False.
+        """
         if not self.simulador:
-            return
+            return True
+            
+        memoria = self.simulador.memoria_dados
+        if enderecos is not None and all(e in self.linhas_memoria for e in enderecos):
+            for endereco in enderecos:
+                linha = self.linhas_memoria[endereco]
+                valor = valores[endereco] if valores is not None else memoria.ler_palavra(endereco)
+                self.memoria_text.delete(f"{linha}.0", f"{linha}.end")
+                self.memoria_text.insert(f"{linha}.0", f"0x{endereco:08X}: 0x{valor:08X} ({valor})")
+            return True
+        if valores is not None:
+            return False
             
+        self.memoria_desatualizada = False
         self.memoria_text.delete(1.0, tk.END)
     
-        # Mostrar apenas posições preenchidas
-        self.memoria_text.insert(tk.END, "Endereços de memória com dados:\n\n")
-        enderecos_ordenados = sorted(self.simulador.memoria_dados.keys())
-        
-        for endereco in enderecos_ordenados:
-            valor = self.simulador.memoria_dados[endereco]
-            self.memoria_text.insert(tk.END, f"0x{endereco:08X}: 0x{valor:08X} ({valor})\n")
+        # Mostrar apenas posições preenchidas (cabeçalho nas linhas 1 e 2)
+        partes = ["Endereços de memória com dados:\n\n"]
+        self.linhas_memoria = {}
+        for linha, (endereco, valor) in enumerate(memoria.palavras(), start=3):
+            partes.append(f"0x{endereco:08X}: 0x{valor:08X} ({valor})\n")
+            self.linhas_memoria[endereco] = linha
                 
-        if not self.simulador.memoria_dados:
-            self.memoria_text.insert(tk.END, "Nenhum dado na memória")
-            
+        if not memoria:
+            partes.append("Nenhum dado na memória")
+        self.memoria_text.insert(tk.END, ''.join(partes))
+        return True
+
+    def atualizar_desempenho(self, resumo=None):
+        """Reescreve a aba de desempenho (resumo vem pronto da thread de execução)"""
+        if not self.simulador:
+            return
+        if resumo is None:
+            resumo = self.simulador.resumo_contadores(self.MAX_PCS_DESEMPENHO)
+        self.desempenho_text.delete(1.0, tk.END)
+        self.desempenho_text.insert(tk.END, "\n".join(formatar_resumo(resumo, max_pcs=self.MAX_PCS_DESEMPENHO)))
+
+    def iniciar_arquivo_saida(self):
+        """Cria o *_saida.out com o estado inicial e abre o escritor em segundo plano"""
+        if self.escritor_trace:
+            self.escritor_trace.fechar()
+            self.escritor_trace = None
+
+        # Os registros de cada ciclo só trazem o que mudou, então o estado
+        # inicial completo vai no começo do arquivo
+        with open(self.arquivo_saida, 'w', encoding='utf-8') as f:
+            f.write(self.texto_trace.cabecalho(self.simulador.memoria_dados.palavras()))
+
+        self.escritor_trace = EscritorTrace(self.arquivo_saida)
+
     def log_ciclo(self):
-        """Registra informações do ciclo atual no log e arquivo"""
+        """Registra no log e no arquivo o pipeline e o que mudou no ciclo atual"""
         if not self.simulador:
             return
             
-        ciclo = self.simulador.ciclo
-        
-        # Log na interface
-        log_msg = f"\n=== CICLO {ciclo} ===\n"
-        
-        # Pipeline
-        log_msg += "Pipeline:\n"
-        log_msg += f"  IF: {self.formato_instrucao_pipeline('IF')}\n"
-        log_msg += f"  ID: {self.formato_instrucao_pipeline('ID')}\n"
-        log_msg += f"  EX: {self.formato_instrucao_pipeline('EX')}\n"
-        log_msg += f"  MEM: {self.formato_instrucao_pipeline('MEM')}\n"
-        log_msg += f"  WB: {self.formato_instrucao_pipeline('WB')}\n"
-        
-        # Registradores modificados
-        log_msg += "\nRegistradores não-zero:\n"
-        for i in range(32):
-            if self.simulador.bancoReg[i] != 0:
-                log_msg += f"  x{i}: {self.simulador.bancoReg[i]}\n"
-                
-        # Memória
-        log_msg += "\nMemória:\n"
-        for endereco in sorted(self.simulador.memoria_dados.keys()):
-            valor = self.simulador.memoria_dados[endereco]
-            log_msg += f"  0x{endereco:08X}: 0x{valor:08X}\n"
-            
+        log_msg = self.registro_ciclo(self.wb_buffer)
         self.log(log_msg)
         
-        # Salvar no arquivo
-        if self.arquivo_saida:
-            try:
-                with open(self.arquivo_saida, 'a', encoding='utf-8') as f:
-                    f.write(log_msg + "\n")
-            except Exception as e:
-                print(f"Erro ao escrever no arquivo de saída: {e}")
+        # Salvar no arquivo (gravado em lotes pelo escritor em segundo plano)
+        if self.escritor_trace:
+            self.escritor_trace.escrever(log_msg + "\n")
+            
+    def registro_ciclo(self, wb):
+        """Texto do ciclo atual para o log: pipeline (wb é o snapshot no WB) e o que mudou no ciclo"""
+        simulador = self.simulador
+        # O texto do pipeline só depende do pc da instrução em cada estágio
+        # (sem snapshots dos registradores de pipeline)
+        pcs = simulador.identificar_latches() + (wb.get('pc'),)
+        regs = [(i, simulador.bancoReg[i]) for i in simulador.regs_escritos]
+        memoria = palavras_escritas(simulador.memoria_dados) if simulador.memoria_dados.escritas else ()
+        return self.texto_trace.registro(simulador.ciclo, pcs, regs, memoria)
+
+    def fechar(self):
+        """Grava o que falta do log e fecha a janela"""
+        if self.thread_execucao:
+            self.interromper_execucao()
+            self.thread_execucao.join()
+        if self.escritor_trace:
+            self.escritor_trace.fechar()
+            self.escritor_trace = None
+        self.root.destroy()
                 
-    def formato_instrucao_pipeline(self, stage):
-        """Formata a instrução para exibição no pipeline"""
-        stage_data = {
-            'IF': self.simulador.IF_ID,
-            'ID': self.simulador.ID_EX, 
-            'EX': self.simulador.EX_MEM,
-            'MEM': self.simulador.MEM_WB,
-            'WB': self.wb_buffer
+    def dados_estagios(self, wb):
+        """Snapshots dos registradores de pipeline, mapeados para os estágios exibidos.
+
+        wb é o que está sendo processado no WB (o MEM_WB de antes do ciclo).
+        """
+        return {
+            'IF': self.simulador.IF_ID.snapshot(),
+            'ID': self.simulador.ID_EX.snapshot(),
+            'EX': self.simulador.EX_MEM.snapshot(),
+            'MEM': self.simulador.MEM_WB.snapshot(),
+            'WB': wb
         }
-        
-        data = stage_data.get(stage, {})
-        
-        if not data:
-            return "vazio"
-            
-        if stage == 'IF':
-            return f"0x{data.get('instrucao', 0):08X} (PC: 0x{data.get('pc', 0):08X})"
-        elif stage == 'WB':
-            tipo = data.get('tipo', '')
-            if 'rd' in data and data.get('rd', 0) != 0:
-                return f"{tipo} -> x{data['rd']}"
-            else:
-                return f"{tipo} (sem write-back)"
-        elif 'tipo' in data:
-            return f"{data['tipo']}"
-        else:
-            return "processando"
-            
+
     def log(self, mensagem):
         """Adiciona mensagem ao log"""
         self.log_text.insert(tk.END, mensagem + "\n")
@@ -697,9 +1077,129 @@ class InterfaceSimuladorRISCV:
             except Exception as e:
                 messagebox.showerror("Erro", f"Erro ao salvar log: {str(e)}")
 
+    def resolver_endereco(self, texto, labels):
+        """Endereço de um label do programa montado ou de um número (decimal ou 0x...)"""
+        texto = texto.strip()
+        if texto in labels:
+            return labels[texto]
+        try:
+            return int(texto, 0)
+        except ValueError:
+            raise ValueError(f"Label ou endereço inválido: {texto}") from None
+
+    def adicionar_breakpoint(self):
+        """Para o "Executar até Parada" quando a instrução do label/pc for concluída"""
+        if self.executando:
+            return
+        try:
+            pc = self.resolver_endereco(self.entrada_breakpoint.get(), self.montador.labels_texto)
+            self.pontos_parada.adicionar_breakpoint(pc)
+        except ValueError as e:
+            messagebox.showerror("Erro", str(e))
+            return
+        self.entrada_breakpoint.delete(0, tk.END)
+        self.atualizar_lista_pontos()
+
+    def adicionar_watch_registrador(self):
+        """Vigia um registrador pelo nome (x5, t0, sp...)"""
+        if self.executando:
+            return
+        nome = self.entrada_watch_reg.get().strip().lower()
+        if nome not in self.montador.registradores:
+            messagebox.showerror("Erro", f"Registrador inválido: {nome}")
+            return
+        self.pontos_parada.observar_registrador(self.montador.registradores[nome], self.tipo_watch_reg.get())
+        self.entrada_watch_reg.delete(0, tk.END)
+        self.atualizar_lista_pontos()
+
+    def adicionar_watch_memoria(self):
+        """Vigia a palavra de um label de .data ou de um endereço"""
+        if self.executando:
+            return
+        try:
+            endereco = self.resolver_endereco(self.entrada_watch_mem.get(), self.montador.labels_dados)
+            self.pontos_parada.observar_memoria(endereco, self.tipo_watch_mem.get())
+        except ValueError as e:
+            messagebox.showerror("Erro", str(e))
+            return
+        self.entrada_watch_mem.delete(0, tk.END)
+        self.atualizar_lista_pontos()
+
+    def remover_ponto(self):
+        """Remove o breakpoint ou watchpoint selecionado na lista"""
+        selecao = self.lista_pontos.curselection()
+        if self.executando or not selecao:
+            return
+        tipo, chave = self.itens_pontos[selecao[0]]
+        if tipo == 'breakpoint':
+            self.pontos_parada.remover_breakpoint(chave)
+        elif tipo == 'registrador':
+            self.pontos_parada.remover_registrador(chave)
+        else:
+            self.pontos_parada.remover_memoria(chave)
+        self.atualizar_lista_pontos()
+
+    def atualizar_lista_pontos(self):
+        """Redesenha a lista de breakpoints e watchpoints, com os labels de cada endereço"""
+        labels_texto = {pc: label for label, pc in self.montador.labels_texto.items()}
+        labels_dados = {endereco: label for label, endereco in self.montador.labels_dados.items()}
+        pontos = self.pontos_parada
+        self.itens_pontos = []
+        self.lista_pontos.delete(0, tk.END)
+        for pc in sorted(pontos.breakpoints):
+            self.itens_pontos.append(('breakpoint', pc))
+            self.lista_pontos.insert(tk.END, f"breakpoint   0x{pc:08X} {labels_texto.get(pc, '')}")
+        for registrador, tipo in sorted(pontos.registradores.items()):
+            self.itens_pontos.append(('registrador', registrador))
+            self.lista_pontos.insert(tk.END, f"registrador  x{registrador:<9} ({tipo})")
+        for endereco, tipo in sorted(pontos.memoria.items()):
+            self.itens_pontos.append(('memoria', endereco))
+            self.lista_pontos.insert(tk.END, f"memória      0x{endereco:08X} {labels_dados.get(endereco, '')} ({tipo})")
+
+    def salvar_checkpoint(self):
+        """Grava o estado completo do simulador para continuar depois"""
+        if self.executando or not self.simulador:
+            return
+        arquivo = filedialog.asksaveasfilename(
+            title="Salvar checkpoint",
+            defaultextension=".ck",
+            filetypes=[("Checkpoints", "*.ck"), ("All files", "*.*")]
+        )
+        
+        if arquivo:
+            try:
+                checkpoint.salvar_arquivo(self.simulador, arquivo)
+                self.status_bar.config(text=f"Checkpoint do ciclo {self.simulador.ciclo} salvo em {os.path.basename(arquivo)}")
+            except Exception as e:
+                messagebox.showerror("Erro", f"Erro ao salvar checkpoint: {str(e)}")
+
+    def carregar_checkpoint(self):
+        """Continua de um checkpoint do programa carregado"""
+        if self.executando or not self.simulador:
+            return
+        arquivo = filedialog.askopenfilename(
+            title="Carregar checkpoint",
+            filetypes=[("Checkpoints", "*.ck"), ("All files", "*.*")]
+        )
+        
+        if arquivo:
+            try:
+                checkpoint.carregar_arquivo(self.simulador, arquivo)
+                aviso = self.novo_diario()
+                self.wb_buffer = {}
+                self.regs_pendentes.clear()
+                self.memoria_pendente.clear()
+                self.estagios_pendentes.clear()
+                self.atualizar_interface()
+                self.status_bar.config(text=f"Checkpoint carregado: ciclo {self.simulador.ciclo}" + aviso)
+                self.log(f"=== CHECKPOINT CARREGADO (CICLO {self.simulador.ciclo}) ===")
+            except Exception as e:
+                messagebox.showerror("Erro", f"Erro ao carregar checkpoint: {str(e)}")
+
 def main():
     root = tk.Tk()
     app = InterfaceSimuladorRISCV(root)
+    root.protocol("WM_DELETE_WINDOW", app.fechar)
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,133 @@
+import mmap
+import struct
+
+# Formato de cada largura de acesso, indexado pelo funct3 das instruções de load/store
+FORMATOS_LOAD = {
+    0b000: struct.Struct('<b'),  # LB
+    0b001: struct.Struct('<h'),  # LH
+    0b010: struct.Struct('<i'),  # LW
+    0b100: struct.Struct('<B'),  # LBU
+    0b101: struct.Struct('<H'),  # LHU
+}
+FORMATOS_STORE = {
+    0b000: (struct.Struct('<B'), 0xFF),        # SB
+    0b001: (struct.Struct('<H'), 0xFFFF),      # SH
+    0b010: (struct.Struct('<I'), 0xFFFFFFFF),  # SW
+}
+PALAVRA = FORMATOS_LOAD[0b010]
+TAMANHO_PAGINA = 4096
+
+
+class Memoria:
+    """Memória de dados endereçada por byte, guardada em um buffer contíguo.
+
+    Leituras além do fim do buffer devolvem 0; escritas além do fim fazem a
+    memória crescer em páginas. O buffer pode ser um mmap (cópia privada) do
+    arquivo _data.bin, que é trocado por um bytearray na primeira vez que a
+    memória precisa crescer.
+    """
+
+    def __init__(self, dados=b''):
+        self.dados = bytearray(dados)
+        # Tamanho da região carregada do arquivo e maior endereço já escrito
+        self.carregados = len(self.dados)
+        self.usados = len(self.dados)
+        # Endereços escritos desde a última vez que a lista foi limpa
+        self.escritas = []
+        # Quando é uma lista, cada escrita acrescenta (endereço, bytes antigos)
+        # nela; o diário de execução (diario.py) usa isso para desfazer ciclos
+        self.anteriores = None
+
+    @classmethod
+    def de_arquivo(cls, caminho, mapear=False):
+        """Carrega a memória de um arquivo em uma única cópia (ou mapeando o arquivo)"""
+        with open(caminho, 'rb') as f:
+            if not mapear:
+                return cls(f.read())
+            memoria = cls()
+            tamanho = f.seek(0, 2)
+            if tamanho:
+                memoria.dados = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+                memoria.carregados = tamanho
+                memoria.usados = tamanho
+            return memoria
+
+    def _garantir(self, fim):
+        """Aumenta o buffer para que os bytes até fim (exclusivo) existam"""
+        if fim > len(self.dados):
+            novo_tamanho = max(fim, 2 * len(self.dados))
+            novo_tamanho = -(-novo_tamanho // TAMANHO_PAGINA) * TAMANHO_PAGINA
+            if isinstance(self.dados, mmap.mmap):
+                antigo = self.dados
+                self.dados = bytearray(antigo)
+                antigo.close()
+            self.dados.extend(bytes(novo_tamanho - len(self.dados)))
+        if fim > self.usados:
+            self.usados = fim
+
+    def ler(self, endereco, funct3=0b010):
+        """Lê um valor com a largura e o sinal dados pelo funct3 (LB, LH, LW, LBU, LHU)"""
+        formato = FORMATOS_LOAD.get(funct3, PALAVRA)
+        if endereco < 0:
+            raise ValueError(f"Endereço de memória inválido: {endereco}")
+        try:
+            return formato.unpack_from(self.dados, endereco)[0]
+        except struct.error:
+            # Acesso que passa do fim do buffer: completa com zeros
+            trecho = bytes(self.dados[endereco:endereco + formato.size])
+            return formato.unpack(trecho.ljust(formato.size, b'\x00'))[0]
+
+    def escrever(self, endereco, valor, funct3=0b010):
+        """Escreve um valor com a largura dada pelo funct3 (SB, SH, SW)"""
+        formato, mascara = FORMATOS_STORE.get(funct3, FORMATOS_STORE[0b010])
+        if endereco < 0:
+            raise ValueError(f"Endereço de memória inválido: {endereco}")
+        fim = endereco + formato.size
+        if fim > self.usados:
+            self._garantir(fim)
+        if self.anteriores is not None:
+            self.anteriores.append((endereco, bytes(self.dados[endereco:fim])))
+        formato.pack_into(self.dados, endereco, valor & mascara)
+        self.escritas.append(endereco)
+
+    def ler_palavra(self, endereco):
+        return self.ler(endereco, 0b010)
+
+    def escrever_palavra(self, endereco, valor):
+        self.escrever(endereco, valor, 0b010)
+
+    def estado(self):
+        """(bytes usados, carregados, usados), para checkpoints"""
+        return bytes(self.dados[:self.usados]), self.carregados, self.usados
+
+    def restaurar(self, estado):
+        dados, self.carregados, self.usados = estado
+        if isinstance(self.dados, mmap.mmap):
+            self.dados.close()
+        self.dados = bytearray(dados)
+        self.escritas = []
+
+    def palavras(self):
+        """Itera (endereço, valor) sobre as palavras carregadas e as não-nulas escritas depois"""
+        for endereco in range(0, self.carregados, 4):
+            yield endereco, self.ler(endereco)
+
+        # Fora da região carregada pula páginas zeradas de uma vez
+        inicio = -(-self.carregados // 4) * 4
+        for pagina in range(inicio, self.usados, TAMANHO_PAGINA):
+            fim = min(pagina + TAMANHO_PAGINA, self.usados)
+            if not self.dados[pagina:fim].strip(b'\x00'):
+                continue
+            for endereco in range(pagina, fim, 4):
+                valor = self.ler(endereco)
+                if valor:
+                    yield endereco, valor
+
+    def __len__(self):
+        return self.usados
+
+    def __bool__(self):
+        return self.usados > 0
+
+    def __repr__(self):
+        return repr(dict(self.palavras()))
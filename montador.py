@@ -1,12 +1,47 @@
 import re
 import struct
 
+# Padrões usados em toda linha, compilados uma única vez: separadores entre os
+# operandos e o operando offset(registrador) dos loads e stores
+SEPARADORES = re.compile(r'[,\s]+')
+ENDERECO = re.compile(r'(\d+)\((\w+)\)')
+
+# Formato de cada instrução aceita, que escolhe o codificador. LI, MV e NOP são
+# pseudoinstruções montadas como ADDI
+FORMATOS = {
+    **dict.fromkeys(['ADD', 'SUB', 'MUL', 'DIV', 'REM', 'XOR', 'AND', 'OR', 'SLL', 'SRL'], 'R'),
+    'ADDI': 'I', 'JALR': 'I', 'SLLI': 'SHIFT', 'SRLI': 'SHIFT',
+    **dict.fromkeys(['LB', 'LH', 'LW', 'LBU', 'LHU'], 'LOAD'),
+    **dict.fromkeys(['SB', 'SH', 'SW'], 'S'),
+    **dict.fromkeys(['BEQ', 'BNE', 'BGE', 'BLT'], 'B'),
+    'J': 'J', 'JAL': 'J',
+    'LI': 'LI', 'MV': 'MV', 'NOP': 'NOP',
+}
+
+# Opcode de cada formato (as pseudoinstruções usam o do ADDI)
+OPCODE_FORMATO = {'R': 'R', 'I': 'I', 'SHIFT': 'I', 'LOAD': 'LW', 'S': 'S', 'B': 'B', 'J': 'J',
+                  'LI': 'I', 'MV': 'I', 'NOP': 'I'}
+
+
+class Registradores(dict):
+    """Nome -> número dos registradores. Nomes com maiúsculas são aceitos e nomes
+    desconhecidos valem 0 (x0), como o montador sempre fez"""
+
+    def __missing__(self, nome):
+        return self.get(nome.lower(), 0)
+
+
 class Montador:
     def __init__(self):
         self.registradores = self._init_registers()
         self.funct3_map = self._init_funct3()
         self.funct7_map = self._init_funct7()
         self.opcode_map = self._init_opcodes()
+        self.codificadores = self._init_codificadores()
+        # Tabela de símbolos do último programa montado: label -> endereço na
+        # memória de dados e label -> pc
+        self.labels_dados = {}
+        self.labels_texto = {}
 
     def _init_registers(self):
         regs = {f'x{i}': i for i in range(32)}
@@ -18,7 +53,7 @@ class Montador:
             's7': 23, 's8': 24, 's9': 25, 's10': 26, 's11': 27,
             't3': 28, 't4': 29, 't5': 30, 't6': 31
         })
-        return regs
+        return Registradores(regs)
 
     def _init_funct3(self):
         return {
@@ -26,7 +61,8 @@ class Montador:
             'XOR': 0b100, 'AND': 0b111, 'OR': 0b110, 'SLL': 0b001, 'SRL': 0b101,
             'SLLI': 0b001, 'SRLI': 0b101,
             'ADDI': 0b000, 'LW': 0b010, 'JALR': 0b000,
-            'SW': 0b010, 'BEQ': 0b000, 'BNE': 0b001, 'BGE': 0b101, 'BLT': 0b100
+            'LB': 0b000, 'LH': 0b001, 'LBU': 0b100, 'LHU': 0b101,
+            'SW': 0b010, 'SB': 0b000, 'SH': 0b001, 'BEQ': 0b000, 'BNE': 0b001, 'BGE': 0b101, 'BLT': 0b100
         }
 
     def _init_funct7(self):
@@ -44,9 +80,28 @@ class Montador:
             'JALR': 0b1100111
         }
 
+    def _init_codificadores(self):
+        """Instrução -> (codificador do formato, bits fixos de opcode, funct3 e funct7)"""
+        metodos = {
+            'R': self._codificar_r, 'I': self._codificar_i, 'SHIFT': self._codificar_shift,
+            'LOAD': self._codificar_load, 'S': self._codificar_s, 'B': self._codificar_b,
+            'J': self._codificar_j, 'LI': self._codificar_li, 'MV': self._codificar_mv,
+            'NOP': self._codificar_nop,
+        }
+        codificadores = {}
+        for instr, formato in FORMATOS.items():
+            real = 'ADDI' if formato in ('LI', 'MV', 'NOP') else instr
+            opcode = self.opcode_map['JALR' if instr == 'JALR' else OPCODE_FORMATO[formato]]
+            fixos = (self.funct7_map.get(real, 0) << 25) | (self.funct3_map.get(real, 0) << 12) | opcode
+            codificadores[instr] = (metodos[formato], fixos)
+        return codificadores
+
     def ler_arquivo(self, caminho):
         with open(caminho, 'r', encoding='utf-8') as f:
-            return [linha.split('#')[0].strip() for linha in f if linha.strip() and not linha.startswith('#')]
+            return self.limpar_linhas(f)
+
+    def limpar_linhas(self, linhas):
+        return [linha.partition('#')[0].strip() for linha in linhas if linha.strip() and not linha.startswith('#')]
 
     def dividir_secoes(self, linhas):
         secao = None
@@ -58,29 +113,6 @@ class Montador:
             elif secao == 'text': text.append(linha)
         return data, text
 
-    def parse_instrucao(self, linha):
-        if ':' in linha:
-            label, resto = linha.split(':', 1)
-            return {'label': label.strip(), 'instrucao': resto.strip()}
-        return {'label': None, 'instrucao': linha.strip()}
-
-    def expandir_pseudoinstrucoes(self, instrucoes):
-        expandidas = []
-        for pc, instr in instrucoes:
-            tokens = re.split(r'[\s,]+', instr)
-            op = tokens[0].upper()
-            if op == 'LI':
-                rd, imm = tokens[1], tokens[2]
-                expandidas.append((pc, f"ADDI {rd}, zero, {imm}"))
-            elif op == 'MV':
-                rd, rs = tokens[1], tokens[2]
-                expandidas.append((pc, f"ADDI {rd}, {rs}, 0"))
-            elif op == 'NOP':
-                expandidas.append((pc, "ADDI x0, x0, 0"))
-            else:
-                expandidas.append((pc, instr))
-        return expandidas
-
     def processar_data(self, linhas_data):
         labels = {}
         memoria = bytearray()
@@ -91,186 +123,187 @@ class Montador:
                 label = label.strip()
                 valores = [int(v.strip()) for v in valores.split('.word')[1].split(',')]
                 labels[label] = offset
-                for valor in valores:
-                    memoria += struct.pack('<i', valor)
+                memoria += struct.pack(f'<{len(valores)}i', *valores)
                 offset += len(valores) * 4
         return labels, memoria
 
     def primeira_passagem(self, linhas_text):
         labels, instrucoes, pc = {}, [], 0
         for linha in linhas_text:
-            parsed = self.parse_instrucao(linha)
-            if parsed['label']: labels[parsed['label']] = pc
-            if parsed['instrucao']: instrucoes.append((pc, parsed['instrucao'])); pc += 4
+            label, separador, instrucao = linha.partition(':')
+            if separador:
+                label = label.strip()
+                if label: labels[label] = pc
+                instrucao = instrucao.strip()
+            else:
+                instrucao = label
+            if instrucao: instrucoes.append((pc, instrucao)); pc += 4
         return labels, instrucoes
 
+    def _imediato(self, valor, labels):
+        if valor in labels:
+            return labels[valor]
+        try:
+            return int(valor, 0)
+        except ValueError:
+            raise ValueError(f"Valor imediato inválido: {valor}")
+
+    def codificar(self, instrucao, labels, pc):
+        """Código de máquina (inteiro de 32 bits) de uma instrução sem espaços nas pontas.
+
+        A linha é dividida em tokens uma única vez e o mnemônico escolhe o
+        codificador do formato na tabela montada em _init_codificadores.
+        """
+        tokens = SEPARADORES.split(instrucao)
+        if '' in tokens:
+            tokens = [t for t in tokens if t]
+        instr = tokens[0].upper()
+        try:
+            codificador, fixos = self.codificadores[instr]
+        except KeyError:
+            raise ValueError(f"Instrução não suportada: {instr}")
+        return codificador(instr, tokens, fixos, labels, pc)
+
     def montar_instrucao(self, instrucao, labels, pc):
         """Monta uma única instrução em código de máquina"""
-        tokens = re.split(r'[,\s]+', instrucao.strip())
-        tokens = [t for t in tokens if t]
-        if not tokens:
+        instrucao = instrucao.strip()
+        if not instrucao:
             return b'\x00\x00\x00\x00'
+        return struct.pack('<I', self.codificar(instrucao, labels, pc))
 
-        instr = tokens[0].upper()
-        
-        def reg(nome):
-            return self.registradores.get(nome.lower(), 0)
-            
-        def imm(valor):
-            if valor in labels:
-                return labels[valor]
-            try:
-                return int(valor, 0)
-            except ValueError:
-                raise ValueError(f"Valor imediato inválido: {valor}")
-
-        # Tipo R: ADD, SUB, MUL, DIV, REM, XOR, AND, OR, SLL, SRL
-        if instr in ['ADD', 'SUB', 'MUL', 'DIV', 'REM', 'XOR', 'AND', 'OR', 'SLL', 'SRL']:
-            if len(tokens) != 4:
-                raise ValueError(f"Formato inválido para {instr}: esperado RD, RS1, RS2")
-            
-            rd, rs1, rs2 = reg(tokens[1]), reg(tokens[2]), reg(tokens[3])
-            funct3 = self.funct3_map[instr]
-            funct7 = self.funct7_map[instr]
-            opcode = self.opcode_map['R']
-            
-            return struct.pack('<I', (funct7 << 25) | (rs2 << 20) | (rs1 << 15) | 
-                             (funct3 << 12) | (rd << 7) | opcode)
-
-        # Tipo I: ADDI, SLLI, SRLI, LW, JALR
-        elif instr in ['ADDI', 'SLLI', 'SRLI', 'LW', 'JALR']:
-            if instr == 'LW':
-                if len(tokens) != 3:
-                    raise ValueError("Formato inválido para LW: esperado RD, offset(RS1)")
-                
-                rd = reg(tokens[1])
-                
-                # Extrai offset e base
-                try:
-                    offset, base = re.match(r'(\d+)\((\w+)\)', tokens[2]).groups()
-                    imm12 = int(offset) & 0xFFF
-                    rs1 = reg(base)
-                except:
-                    raise ValueError(f"Formato inválido para LW: {tokens[2]}")
-                
-                funct3 = self.funct3_map['LW']
-                opcode = self.opcode_map['LW']
-            else:
-                if len(tokens) != 4:
-                    raise ValueError(f"Formato inválido para {instr}: esperado RD, RS1, IMM")
-                
-                rd = reg(tokens[1])
-                rs1 = reg(tokens[2])
-                
-                if instr in ['SLLI', 'SRLI']:
-                    imm12 = imm(tokens[3]) & 0x1F  # Apenas 5 bits para shifts
-                else:
-                    imm12 = imm(tokens[3]) & 0xFFF  # 12 bits para outras instruções
-                
-                funct3 = self.funct3_map[instr]
-                opcode = self.opcode_map['I'] if instr != 'JALR' else self.opcode_map['JALR']
-            
-            return struct.pack('<I', (imm12 << 20) | (rs1 << 15) | 
-                             (funct3 << 12) | (rd << 7) | opcode)
-
-        # Tipo S: SW
-        elif instr == 'SW':
-            if len(tokens) != 3:
-                raise ValueError("Formato inválido para SW: esperado RS2, offset(RS1)")
-            
-            rs2 = reg(tokens[1])
-            offset, rs1 = re.match(r'(\d+)\((\w+)\)', tokens[2]).groups()
-            offset = int(offset)
-            
-            imm11_5 = (offset >> 5) & 0x7F
-            imm4_0 = offset & 0x1F
-            funct3 = self.funct3_map['SW']
-            opcode = self.opcode_map['S']
-            
-            return struct.pack('<I', (imm11_5 << 25) | (rs2 << 20) | (reg(rs1) << 15) | 
-                             (funct3 << 12) | (imm4_0 << 7) | opcode)
-
-        # Tipo B: BEQ, BNE, BGE, BLT
-        elif instr in ['BEQ', 'BNE', 'BGE', 'BLT']:
-            if len(tokens) != 4:
-                raise ValueError(f"Formato inválido para {instr}: esperado RS1, RS2, LABEL")
-            
-            rs1, rs2 = reg(tokens[1]), reg(tokens[2])
-
-            destino = imm(tokens[3])
-            offset = destino - pc
-
-            if offset % 2 != 0:
-                raise ValueError(f"Offset de branch não alinhado para instrução {instr}")
-            
-            imm12 = (offset >> 12) & 0x1
-            imm10_5 = (offset >> 5) & 0x3F
-            imm4_1 = (offset >> 1) & 0xF
-            imm11 = (offset >> 11) & 0x1
-            
-            funct3 = self.funct3_map[instr]
-            opcode = self.opcode_map['B']
-            
-            return struct.pack('<I', (imm12 << 31) | (imm10_5 << 25) | (rs2 << 20) | 
-                             (rs1 << 15) | (funct3 << 12) | (imm4_1 << 8) | 
-                             (imm11 << 7) | opcode)
-
-        # Tipo J: J, JAL
-        elif instr in ['J', 'JAL']:
-            if len(tokens) != 2 and len(tokens) != 3:
-                raise ValueError(f"Formato inválido para {instr}: esperado [RD,] LABEL")
-            
-            # Determina se tem RD explícito ou não
-            if len(tokens) == 2:
-                # Formato: JAL LABEL (RD implícito como ra)
-                label = tokens[1]
-                rd = reg('ra') if instr == 'JAL' else 0
-            else:
-                # Formato: JAL RD, LABEL
-                if instr == 'J':
-                    raise ValueError("Instrução J não aceita RD explícito")
-                rd = reg(tokens[1])
-                label = tokens[2]
-            
-            try:
-                offset = (labels[label] - pc) & 0x1FFFFF
-            except KeyError:
-                raise ValueError(f"Label não encontrado: {label}")
-
-            # Extrai os bits do offset
-            imm20 = (offset >> 20) & 0x1
-            imm10_1 = (offset >> 1) & 0x3FF
-            imm11 = (offset >> 11) & 0x1
-            imm19_12 = (offset >> 12) & 0xFF
-            
-            opcode = self.opcode_map['J']
-            
-            return struct.pack('<I', (imm20 << 31) | (imm19_12 << 12) | (imm11 << 20) | 
-                            (imm10_1 << 21) | (rd << 7) | opcode)
+    # Codificadores por formato. Recebem o mnemônico, os tokens, os bits fixos
+    # da instrução, os labels e o pc, e devolvem a instrução como inteiro
+
+    def _codificar_r(self, instr, tokens, fixos, labels, pc):
+        # ADD, SUB, MUL, DIV, REM, XOR, AND, OR, SLL, SRL
+        if len(tokens) != 4:
+            raise ValueError(f"Formato inválido para {instr}: esperado RD, RS1, RS2")
+        reg = self.registradores
+        return fixos | (reg[tokens[3]] << 20) | (reg[tokens[2]] << 15) | (reg[tokens[1]] << 7)
+
+    def _codificar_i(self, instr, tokens, fixos, labels, pc):
+        # ADDI, JALR
+        if len(tokens) != 4:
+            raise ValueError(f"Formato inválido para {instr}: esperado RD, RS1, IMM")
+        reg = self.registradores
+        imm12 = self._imediato(tokens[3], labels) & 0xFFF
+        return fixos | (imm12 << 20) | (reg[tokens[2]] << 15) | (reg[tokens[1]] << 7)
+
+    def _codificar_shift(self, instr, tokens, fixos, labels, pc):
+        # SLLI, SRLI: só 5 bits de deslocamento
+        if len(tokens) != 4:
+            raise ValueError(f"Formato inválido para {instr}: esperado RD, RS1, IMM")
+        reg = self.registradores
+        shamt = self._imediato(tokens[3], labels) & 0x1F
+        return fixos | (shamt << 20) | (reg[tokens[2]] << 15) | (reg[tokens[1]] << 7)
+
+    def _codificar_load(self, instr, tokens, fixos, labels, pc):
+        # LB, LH, LW, LBU, LHU
+        if len(tokens) != 3:
+            raise ValueError(f"Formato inválido para {instr}: esperado RD, offset(RS1)")
+        endereco = ENDERECO.match(tokens[2])
+        if endereco is None:
+            raise ValueError(f"Formato inválido para {instr}: {tokens[2]}")
+        offset, base = endereco.groups()
+        reg = self.registradores
+        return fixos | ((int(offset) & 0xFFF) << 20) | (reg[base] << 15) | (reg[tokens[1]] << 7)
+
+    def _codificar_s(self, instr, tokens, fixos, labels, pc):
+        # SB, SH, SW
+        if len(tokens) != 3:
+            raise ValueError(f"Formato inválido para {instr}: esperado RS2, offset(RS1)")
+        endereco = ENDERECO.match(tokens[2])
+        if endereco is None:
+            raise ValueError(f"Formato inválido para {instr}: {tokens[2]}")
+        offset, base = endereco.groups()
+        offset = int(offset)
+        reg = self.registradores
+        return (fixos | (((offset >> 5) & 0x7F) << 25) | (reg[tokens[1]] << 20)
+                | (reg[base] << 15) | ((offset & 0x1F) << 7))
+
+    def _codificar_b(self, instr, tokens, fixos, labels, pc):
+        # BEQ, BNE, BGE, BLT: o destino é um label ou um endereço absoluto
+        if len(tokens) != 4:
+            raise ValueError(f"Formato inválido para {instr}: esperado RS1, RS2, LABEL")
+        reg = self.registradores
+        offset = self._imediato(tokens[3], labels) - pc
+        if offset % 2 != 0:
+            raise ValueError(f"Offset de branch não alinhado para instrução {instr}")
+        return (fixos | (((offset >> 12) & 0x1) << 31) | (((offset >> 5) & 0x3F) << 25)
+                | (reg[tokens[2]] << 20) | (reg[tokens[1]] << 15)
+                | (((offset >> 1) & 0xF) << 8) | (((offset >> 11) & 0x1) << 7))
+
+    def _codificar_j(self, instr, tokens, fixos, labels, pc):
+        # J LABEL, JAL LABEL (RD implícito como ra) e JAL RD, LABEL
+        if len(tokens) == 2:
+            label = tokens[1]
+            rd = self.registradores['ra'] if instr == 'JAL' else 0
+        elif len(tokens) == 3:
+            if instr == 'J':
+                raise ValueError("Instrução J não aceita RD explícito")
+            rd = self.registradores[tokens[1]]
+            label = tokens[2]
         else:
-            raise ValueError(f"Instrução não suportada: {instr}")
+            raise ValueError(f"Formato inválido para {instr}: esperado [RD,] LABEL")
+
+        try:
+            offset = (labels[label] - pc) & 0x1FFFFF
+        except KeyError:
+            raise ValueError(f"Label não encontrado: {label}")
+        return (fixos | (((offset >> 20) & 0x1) << 31) | (((offset >> 1) & 0x3FF) << 21)
+                | (((offset >> 11) & 0x1) << 20) | (((offset >> 12) & 0xFF) << 12) | (rd << 7))
 
-    def montar(self, caminho_entrada, caminho_saida_base=None):
-        linhas = self.ler_arquivo(caminho_entrada)
+    def _codificar_li(self, instr, tokens, fixos, labels, pc):
+        # LI RD, IMM -> ADDI RD, zero, IMM
+        if len(tokens) < 3:
+            raise ValueError(f"Formato inválido para {instr}: esperado RD, IMM")
+        return self._codificar_i('ADDI', ['ADDI', tokens[1], 'zero', tokens[2]], fixos, labels, pc)
+
+    def _codificar_mv(self, instr, tokens, fixos, labels, pc):
+        # MV RD, RS -> ADDI RD, RS, 0
+        if len(tokens) < 3:
+            raise ValueError(f"Formato inválido para {instr}: esperado RD, RS")
+        return self._codificar_i('ADDI', ['ADDI', tokens[1], tokens[2], '0'], fixos, labels, pc)
+
+    def _codificar_nop(self, instr, tokens, fixos, labels, pc):
+        # NOP -> ADDI x0, x0, 0
+        return fixos
+
+    def montar(self, caminho_entrada, caminho_saida_base=None, gravar=True):
+        """Monta o arquivo e devolve as imagens (dados, texto) das seções.
+
+        Os buffers podem ir direto para o Simulador. Com gravar=True também são
+        gravados em <base>_data.bin e <base>_text.bin.
+        """
+        memoria_data, memoria_text = self.montar_linhas(self.ler_arquivo(caminho_entrada))
+
+        if gravar:
+            base = caminho_saida_base or caminho_entrada.rsplit('.', 1)[0]
+            with open(f'{base}_data.bin', 'wb') as f:
+                f.write(memoria_data)
+            with open(f'{base}_text.bin', 'wb') as f:
+                f.write(memoria_text)
+
+        return memoria_data, memoria_text
+
+    def montar_fonte(self, fonte):
+        """Monta o código-fonte dado como texto (sem arquivo) e devolve (dados, texto)"""
+        return self.montar_linhas(self.limpar_linhas(fonte.splitlines()))
+
+    def montar_linhas(self, linhas):
         data_linhas, text_linhas = self.dividir_secoes(linhas)
         labels_data, memoria_data = self.processar_data(data_linhas)
-        labels_text, instrucoes_raw = self.primeira_passagem(text_linhas)
-        instrucoes = self.expandir_pseudoinstrucoes(instrucoes_raw)
+        labels_text, instrucoes = self.primeira_passagem(text_linhas)
         labels = {**labels_data, **labels_text}
+        self.labels_dados, self.labels_texto = labels_data, labels_text
 
-        memoria_text = bytearray()
+        codigos = []
+        codificar = self.codificar
         for pc, instr in instrucoes:
             try:
-                codigo = self.montar_instrucao(instr, labels, pc)
-                memoria_text += codigo
+                codigos.append(codificar(instr, labels, pc))
             except Exception as e:
                 raise ValueError(f"Erro em PC={pc:04X}: {instr}\n{str(e)}")
-
-        base = caminho_saida_base or caminho_entrada.rsplit('.', 1)[0]
-        with open(f'{base}_data.bin', 'wb') as f:
-            f.write(memoria_data)
-        with open(f'{base}_text.bin', 'wb') as f:
-            f.write(memoria_text)
-
+        memoria_text = struct.pack(f'<{len(codigos)}I', *codigos)
         return memoria_data, memoria_text
 
@@ -0,0 +1,212 @@
+# Preditores de desvio consultados no estágio IF do pipeline. Todo preditor
+# devolve o próximo pc previsto para a instrução buscada e é atualizado quando o
+# desvio (B ou JAL) é resolvido. Os que usam o alvo pc + imm contam com a
+# instrução pré-decodificada, como um pré-decodificador no IF.
+
+# Ciclos perdidos por previsão errada, pelo estágio onde o desvio é resolvido:
+# as instruções mais novas que já estão nos registradores de pipeline são
+# descartadas e o IF do mesmo ciclo já busca o pc correto
+PENALIDADE_DESVIO = {'ID': 0, 'EX': 1, 'MEM': 2}
+
+
+class Preditor:
+    """Interface comum; sozinho se comporta como 'sempre não desvia'"""
+
+    nome = 'nao_desvia'
+    # Tabelas que formam o estado do preditor (salvas nos checkpoints)
+    campos_estado = ()
+
+    def prever(self, pc, d):
+        """Próximo pc previsto para a instrução d, buscada em pc"""
+        return pc + 4
+
+    def atualizar(self, pc, d, desviou, alvo):
+        """Informa o resultado real do desvio em pc"""
+
+    def estado(self):
+        return tuple(list(getattr(self, campo)) for campo in self.campos_estado)
+
+    def restaurar(self, estado):
+        for campo, valores in zip(self.campos_estado, estado):
+            setattr(self, campo, list(valores))
+
+
+class NaoDesvia(Preditor):
+    """Estático: sempre segue para pc + 4 (o comportamento original)"""
+
+
+class BTFN(Preditor):
+    """Estático: desvios para trás são tomados, para frente não; JAL sempre"""
+
+    nome = 'btfn'
+
+    def prever(self, pc, d):
+        if d.tipo == 'J' or (d.tipo == 'B' and d.imm < 0):
+            return pc + d.imm
+        return pc + 4
+
+
+class TabelaHistorico(Preditor):
+    """Base das BHTs: uma tabela de contadores indexada pelos bits baixos do pc"""
+
+    # Valor inicial de cada contador e a partir de quanto o desvio é previsto tomado
+    inicial = 0
+    limiar = 1
+    maximo = 1
+    campos_estado = ('contadores',)
+
+    def __init__(self, entradas=64):
+        if entradas < 1 or entradas & (entradas - 1):
+            raise ValueError(f"Número de entradas deve ser potência de 2: {entradas}")
+        self.mascara = entradas - 1
+        self.contadores = [self.inicial] * entradas
+
+    def prever(self, pc, d):
+        if d.tipo == 'J':
+            return pc + d.imm
+        if d.tipo == 'B' and self.contadores[(pc >> 2) & self.mascara] >= self.limiar:
+            return pc + d.imm
+        return pc + 4
+
+    def atualizar(self, pc, d, desviou, alvo):
+        if d.tipo != 'B':
+            return
+        i = (pc >> 2) & self.mascara
+        if desviou:
+            self.contadores[i] = min(self.contadores[i] + 1, self.maximo)
+        else:
+            self.contadores[i] = max(self.contadores[i] - 1, 0)
+
+
+class BHT1(TabelaHistorico):
+    """Um bit por entrada: repete o que o desvio fez da última vez"""
+
+    nome = 'bht1'
+
+
+class BHT2(TabelaHistorico):
+    """Contador de saturação de 2 bits por entrada (começa em 'fracamente não tomado')"""
+
+    nome = 'bht2'
+    inicial = 1
+    limiar = 2
+    maximo = 3
+
+
+class BTB(Preditor):
+    """Branch target buffer de mapeamento direto com contador de 2 bits.
+
+    Não usa a pré-decodificação: só prevê desvio para pcs que já estão no
+    buffer, com o alvo guardado da última vez que desviaram.
+    """
+
+    nome = 'btb'
+    campos_estado = ('tags', 'alvos', 'contadores')
+
+    def __init__(self, entradas=64):
+        if entradas < 1 or entradas & (entradas - 1):
+            raise ValueError(f"Número de entradas deve ser potência de 2: {entradas}")
+        self.mascara = entradas - 1
+        self.tags = [None] * entradas
+        self.alvos = [0] * entradas
+        self.contadores = [0] * entradas
+
+    def prever(self, pc, d):
+        i = (pc >> 2) & self.mascara
+        if self.tags[i] == pc and self.contadores[i] >= 2:
+            return self.alvos[i]
+        return pc + 4
+
+    def atualizar(self, pc, d, desviou, alvo):
+        i = (pc >> 2) & self.mascara
+        if self.tags[i] != pc:
+            if not desviou:
+                return
+            # Entrada nova já nasce prevendo tomado
+            self.tags[i] = pc
+            self.contadores[i] = 2
+        elif desviou:
+            self.contadores[i] = min(self.contadores[i] + 1, 3)
+        else:
+            self.contadores[i] = max(self.contadores[i] - 1, 0)
+        if desviou:
+            self.alvos[i] = alvo
+
+
+PREDITORES = {classe.nome: classe for classe in (NaoDesvia, BTFN, BHT1, BHT2, BTB)}
+
+
+def criar_preditor(nome, entradas=64):
+    """Cria um preditor pelo nome ('nao_desvia', 'btfn', 'bht1', 'bht2' ou 'btb')"""
+    if nome not in PREDITORES:
+        raise ValueError(f"Preditor de desvio inválido: {nome}")
+    classe = PREDITORES[nome]
+    if issubclass(classe, (TabelaHistorico, BTB)):
+        return classe(entradas)
+    return classe()
+
+
+class EstatisticasDesvio:
+    """Acertos do preditor por desvio e ciclos economizados.
+
+    A economia é medida contra o pipeline original (sempre não desvia,
+    resolvido no MEM), onde todo desvio tomado custa PENALIDADE_DESVIO['MEM'].
+    """
+
+    def __init__(self, estagio='MEM'):
+        self.estagio = estagio
+        self.por_pc = {}  # pc -> [executados, acertos, tomados]
+        self.ultimo = None  # (pc, acertou, desviou) do último registrar
+
+    def registrar(self, pc, acertou, desviou):
+        self.ultimo = (pc, acertou, desviou)
+        contagem = self.por_pc.get(pc)
+        if contagem is None:
+            contagem = self.por_pc[pc] = [0, 0, 0]
+        contagem[0] += 1
+        if acertou:
+            contagem[1] += 1
+        if desviou:
+            contagem[2] += 1
+
+    def desfazer(self, pc, acertou, desviou):
+        """Desconta um registrar feito antes"""
+        contagem = self.por_pc[pc]
+        contagem[0] -= 1
+        contagem[1] -= acertou
+        contagem[2] -= desviou
+        if not contagem[0]:
+            del self.por_pc[pc]
+
+    @property
+    def total(self):
+        return sum(c[0] for c in self.por_pc.values())
+
+    @property
+    def acertos(self):
+        return sum(c[1] for c in self.por_pc.values())
+
+    @property
+    def ciclos_economizados(self):
+        tomados = sum(c[2] for c in self.por_pc.values())
+        erros = self.total - self.acertos
+        return PENALIDADE_DESVIO['MEM'] * tomados - PENALIDADE_DESVIO[self.estagio] * erros
+
+    def precisao(self):
+        """Fração de previsões certas (1.0 se nenhum desvio foi resolvido)"""
+        total = self.total
+        return self.acertos / total if total else 1.0
+
+    def relatorio(self, desmontar_pc=None):
+        """Linhas de texto com a precisão por desvio e a total"""
+        linhas = []
+        for pc in sorted(self.por_pc):
+            executados, acertos, tomados = self.por_pc[pc]
+            texto = f"  0x{pc:08X}"
+            if desmontar_pc:
+                texto += f" {desmontar_pc(pc):<22}"
+            linhas.append(f"{texto} executado {executados}x, tomado {tomados}x, "
+                          f"acertos {acertos} ({100 * acertos / executados:.1f}%)")
+        linhas.append(f"  Total: {self.acertos}/{self.total} previsões certas "
+                      f"({100 * self.precisao():.1f}%), {self.ciclos_economizados} ciclos economizados")
+        return linhas
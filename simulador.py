@@ -1,363 +1,754 @@
 import struct
+import sys
+import checkpoint
+from contadores import Contadores, resumir
+from decodificador import CAMPOS_ID_EX, decodificar_programa, desmontar
+from memoria import FORMATOS_STORE, PALAVRA, Memoria
+from preditor import EstatisticasDesvio, criar_preditor
+
+# Tipos aceitos no lugar de um caminho de arquivo para as seções .data e .text
+BUFFERS = (bytes, bytearray, memoryview)
+# A seção .text é little-endian; em máquinas little-endian com unsigned int de 4
+# bytes ela é lida direto do buffer com memoryview.cast('I'), sem cópia
+PALAVRAS_NATIVAS = sys.byteorder == 'little' and struct.calcsize('I') == 4
+# Acesso a palavras direto no buffer da memória, usado pelo modo funcional
+unpack_palavra = PALAVRA.unpack_from
+pack_palavra = FORMATOS_STORE[0b010][0].pack_into
+
+
+def dividir(rs1, rs2):
+    """Quociente como no RISC-V: truncado em direção a zero; divisão por zero dá -1"""
+    if rs2 == 0:
+        return -1
+    quociente = abs(rs1) // abs(rs2)
+    return -quociente if (rs1 < 0) != (rs2 < 0) else quociente
+
+
+def resto(rs1, rs2):
+    """Resto com o sinal do dividendo (par do dividir); resto por zero dá o dividendo"""
+    if rs2 == 0:
+        return rs1
+    return rs1 - rs2 * dividir(rs1, rs2)
+
+
+def operacao_r(funct3, funct7, rs1, rs2):
+    """Resultado da ULA para as instruções tipo R"""
+    if funct3 == 0b000:
+        if funct7 == 0b0000000:
+            return rs1 + rs2  # ADD
+        elif funct7 == 0b0100000:
+            return rs1 - rs2  # SUB
+        elif funct7 == 0b0000001:
+            return rs1 * rs2  # MUL
+        else:
+            return 0
+    elif funct3 == 0b100:
+        if funct7 == 0b0000001:
+            return dividir(rs1, rs2)  # DIV
+        return rs1 ^ rs2  # XOR
+    elif funct3 == 0b110:
+        if funct7 == 0b0000001:
+            return resto(rs1, rs2)  # REM
+        return rs1 | rs2  # OR
+    elif funct3 == 0b111:
+        return rs1 & rs2  # AND
+    elif funct3 == 0b001:
+        return rs1 << (rs2 & 0x1F)  # SLL
+    elif funct3 == 0b101:
+        return rs1 >> (rs2 & 0x1F)  # SRL
+    return 0
+
+
+def condicao_desvio(funct3, rs1, rs2):
+    """Indica se um desvio condicional (tipo B) deve ser tomado"""
+    if funct3 == 0b000:  # BEQ
+        return rs1 == rs2
+    elif funct3 == 0b001:  # BNE
+        return rs1 != rs2
+    elif funct3 == 0b100:  # BLT
+        return rs1 < rs2
+    elif funct3 == 0b101:  # BGE
+        return rs1 >= rs2
+    return False
+
+
+# Campos que aparecem no snapshot de cada registrador de pipeline, por tipo de instrução
+CAMPOS_IF_ID = {None: ('instrucao', 'pc')}
+CAMPOS_EX_MEM = {
+    'R': ('rd', 'resultado', 'rs1', 'rs2'),
+    'I': ('rd', 'resultado', 'imm', 'rs1'),
+    'LW': ('rd', 'endereco', 'imm', 'rs1', 'rs2'),
+    'SW': ('rs2_valor', 'endereco', 'imm', 'rs1'),
+    'B': ('desvia', 'novo_pc', 'imm', 'rs1', 'rs2'),
+    'J': ('rd', 'pc_retorno', 'novo_pc', 'imm'),
+}
+CAMPOS_MEM_WB = {
+    'R': ('rd', 'resultado', 'rs1', 'rs2'),
+    'I': ('rd', 'resultado', 'imm', 'rs1'),
+    'LW': ('rd', 'resultado', 'imm', 'rs1', 'rs2'),
+    'SW': ('imm', 'rs1'),
+    'B': ('rs1', 'rs2', 'imm'),
+    'J': ('imm',),
+}
+
+
+# Tipos que leem rs2 (nos demais o campo rs2 é parte do imediato ou não existe)
+TIPOS_COM_RS2 = ('R', 'SW', 'B')
+
+
+class RegistradorPipeline:
+    """Registrador entre dois estágios do pipeline.
+
+    Um único objeto por registrador é reaproveitado a cada ciclo: os estágios
+    sobrescrevem os campos no lugar e usam o bit valido no lugar de um dict vazio.
+    """
+
+    __slots__ = ('nome', 'campos', 'valido', 'tipo', 'pc', 'instrucao', 'rd', 'rs1', 'rs2',
+                 'funct3', 'funct7', 'imm', 'resultado', 'endereco', 'rs2_valor',
+                 'desvia', 'novo_pc', 'pc_retorno', 'previsto')
+
+    def __init__(self, nome, campos):
+        self.nome = nome
+        self.campos = campos
+        self.valido = False
+        self.tipo = None
+        self.pc = 0
+        self.instrucao = 0
+        self.rd = 0
+        self.rs1 = 0
+        self.rs2 = 0
+        self.funct3 = 0
+        self.funct7 = 0
+        self.imm = 0
+        self.resultado = 0
+        self.endereco = 0
+        self.rs2_valor = 0
+        self.desvia = False
+        self.novo_pc = 0
+        self.pc_retorno = 0
+        self.previsto = 0  # pc que o IF buscou depois desta instrução
+
+    def copiar_instrucao(self, origem):
+        """Copia os campos decodificados da instrução vinda do registrador anterior"""
+        self.valido = True
+        self.tipo = origem.tipo
+        self.pc = origem.pc
+        self.rd = origem.rd
+        self.rs1 = origem.rs1
+        self.rs2 = origem.rs2
+        self.funct3 = origem.funct3
+        self.funct7 = origem.funct7
+        self.imm = origem.imm
+        self.previsto = origem.previsto
+
+    def snapshot(self):
+        """Cópia barata em dict com os campos relevantes; {} quando o registrador está vazio"""
+        if not self.valido:
+            return {}
+        estado = {} if self.tipo is None else {'tipo': self.tipo, 'pc': self.pc}
+        for campo in self.campos[self.tipo]:
+            estado[campo] = getattr(self, campo)
+        return estado
+
+    def estado(self):
+        """Todos os campos (menos nome e campos) em uma tupla, para checkpoints"""
+        return tuple(getattr(self, campo) for campo in self.__slots__[2:])
+
+    def restaurar(self, estado):
+        for campo, valor in zip(self.__slots__[2:], estado):
+            setattr(self, campo, valor)
+
 
 class Simulador:
 
-    def __init__ (self, file_data, file_text):
+    MODOS = ('pipeline', 'funcional')
+    NIVEIS_TRACE = ('nenhum', 'final', 'intervalo', 'completo')
+    NOMES_LATCHES = ('IF_ID', 'ID_EX', 'EX_MEM', 'MEM_WB')
+    ESTAGIOS_DESVIO = ('ID', 'EX', 'MEM')
+
+    def __init__ (self, file_data, file_text, modo='pipeline', mapear_memoria=False,
+                  forwarding=False, detectar_load_use=False, preditor=None, estagio_desvio='MEM',
+                  cache_instrucoes=None, cache_dados=None):
+        if modo not in self.MODOS:
+            raise ValueError(f"Modo de execução inválido: {modo}")
+        if estagio_desvio not in self.ESTAGIOS_DESVIO:
+            raise ValueError(f"Estágio de resolução de desvios inválido: {estagio_desvio}")
+        self.modo = modo
         self.bancoReg = [0]*32
 
+        # file_data e file_text são os caminhos dos .bin ou as próprias imagens
+        # das seções em buffers, como as devolvidas por Montador.montar
         if file_data is not None:
-            self.memoria_dados = self.carregar_memoria(file_data)
+            self.memoria_dados = self.carregar_memoria(file_data, mapear_memoria)
         else:
-            self.memoria_dados = {} 
+            self.memoria_dados = Memoria()
 
         self.instrucoes = self.carregar_instrucoes(file_text)
+        # Decodificadas uma única vez no carregamento, indexadas por pc // 4
+        self.decodificadas = decodificar_programa(self.instrucoes)
         self.pc = 0 
         self.ciclo = 0
 
-        self.IF_ID = {}
-        self.ID_EX = {}
-        self.EX_MEM = {}
-        self.MEM_WB = {}
+        self.IF_ID = RegistradorPipeline('IF_ID', CAMPOS_IF_ID)
+        self.ID_EX = RegistradorPipeline('ID_EX', CAMPOS_ID_EX)
+        self.EX_MEM = RegistradorPipeline('EX_MEM', CAMPOS_EX_MEM)
+        self.MEM_WB = RegistradorPipeline('MEM_WB', CAMPOS_MEM_WB)
 
         self.fim = False
 
-    def carregar_memoria(self, file_path):
-        with open(file_path, 'rb') as f:
-            dados_binarios = f.read()
-        memoria = {}
-        for i in range(0, len(dados_binarios), 4):
-            endereco = i
-            valor = struct.unpack('<i', dados_binarios[i:i+4])[0]
-            memoria[endereco] = valor
-        return memoria
-    
-    def carregar_instrucoes(self, file_path):
-        with open(file_path, 'rb') as f:
-            dados_binarios = f.read()
-        instrucoes = []
-        for i in range(0, len(dados_binarios), 4):
-            instr = struct.unpack('<I', dados_binarios[i:i+4])[0]
-            instrucoes.append(instr)
-        return instrucoes
-    
-    def instrucao_para_assembly(self, data_dict):
-        """Converte dados de instrução decodificada para formato assembly"""
+        # Forwarding do resultado em EX_MEM para o EX e parada de um ciclo em
+        # load-use. Desligados, programas com NOPs entre as dependências
+        # continuam com os mesmos ciclos de antes
+        self.forwarding = forwarding
+        self.detectar_load_use = detectar_load_use
+        self.parado = False  # ID inseriu uma bolha: IF não busca neste ciclo
+
+        # Preditor consultado no IF (nome ou objeto de preditor.py; None é o
+        # original, sempre pc + 4) e estágio onde B e JAL são resolvidos
+        if isinstance(preditor, str):
+            preditor = criar_preditor(preditor)
+        self.preditor = preditor
+        self.estagio_desvio = estagio_desvio
+        self.estatisticas_desvio = EstatisticasDesvio(estagio_desvio)
+
+        # Caches L1 (objetos de cache.py) consultadas no IF e no MEM; None é
+        # memória sem latência, como no original. Uma falta para o estágio
+        # pelos ciclos de penalidade; a repetição do acesso depois da espera
+        # não conta de novo na cache
+        self.cache_instrucoes = cache_instrucoes
+        self.cache_dados = cache_dados
+        self.espera_if = 0
+        self.pc_liberado = None  # pc cuja linha já foi trazida para a I-cache
+        self.espera_mem = 0
+        self.mem_liberado = False
+        self.mem_parado = False  # MEM esperando a D-cache: EX, ID e IF não andam
+
+        # Registradores escritos no último ciclo; os endereços escritos ficam
+        # em memoria_dados.escritas
+        self.regs_escritos = []
+        # Contadores de desempenho (instruções retiradas por pc, bolhas,
+        # descartes e esperas de cache); resumo_contadores() calcula CPI e mix.
+        # Contagens novas entram em Contadores e não como atributos daqui: com
+        # mais de 30 atributos o CPython deixa de compartilhar as chaves do
+        # __dict__ e todo acesso a self.* no laço de ciclos fica mais lento
+        self.contadores = Contadores(len(self.instrucoes))
+        self.contadores.crc_programa = checkpoint.crc_programa(self.instrucoes)
+        # Nomes dos registradores de pipeline que mudaram no último ciclo.
+        # Só é preenchido com rastrear_latches ligado (a interface gráfica liga)
+        self.rastrear_latches = False
+        self.latches_alterados = []
+
+    @staticmethod
+    def carregar_memoria(dados, mapear=False):
+        """Memória de dados de um arquivo ou de um buffer (bytes, bytearray, memoryview)"""
+        if isinstance(dados, BUFFERS):
+            return Memoria(dados)
+        return Memoria.de_arquivo(dados, mapear)
+
+    @staticmethod
+    def carregar_instrucoes(texto):
+        """Palavras da seção .text, de um arquivo ou de um buffer (bytes, bytearray, memoryview).
+
+        Devolve uma memoryview de inteiros sobre o próprio buffer, sem copiar; um
+        bytearray passado aqui não pode mais mudar de tamanho enquanto o
+        simulador existir.
+        """
+        if not isinstance(texto, BUFFERS):
+            with open(texto, 'rb') as f:
+                texto = f.read()
+        dados = memoryview(texto).cast('B')
+        if len(dados) % 4:
+            raise ValueError(f"Seção .text com {len(dados)} bytes, que não é múltiplo de 4")
+        if PALAVRAS_NATIVAS:
+            return dados.cast('I')
+        return list(struct.unpack(f'<{len(dados) // 4}I', dados))
+
+    def instrucao_para_assembly(self, data_dict, desmontador=None):
+        """Converte dados de instrução decodificada para formato assembly.
+
+        Com um Desmontador (decodificador.py) o texto vem da cache dele, com
+        os labels do programa.
+        """
         if not data_dict or 'tipo' not in data_dict:
             return ""
-            
-        tipo = data_dict['tipo']
-        
-        if tipo == 'R':
-            # Instruções tipo R: ADD, SUB, AND, OR, etc.
-            funct3 = data_dict.get('funct3', 0)
-            funct7 = data_dict.get('funct7', 0)
-            rd = data_dict.get('rd', 0)
-            rs1 = data_dict.get('rs1', 0)
-            rs2 = data_dict.get('rs2', 0)
-            
-            if funct3 == 0 and funct7 == 0:
-                return f"ADD x{rd}, x{rs1}, x{rs2}"
-            elif funct3 == 0 and funct7 == 32:
-                return f"SUB x{rd}, x{rs1}, x{rs2}"
-            elif funct3 == 7:
-                return f"AND x{rd}, x{rs1}, x{rs2}"
-            elif funct3 == 6:
-                return f"OR x{rd}, x{rs1}, x{rs2}"
-            else:
-                return f"R-type x{rd}, x{rs1}, x{rs2}"
-                
-        elif tipo == 'I':
-            # Instruções tipo I: ADDI, etc.
-            funct3 = data_dict.get('funct3', 0)
-            rd = data_dict.get('rd', 0)
-            rs1 = data_dict.get('rs1', 0)
-            imm = data_dict.get('imm', 0)
-            
-            if funct3 == 0:
-                return f"ADDI x{rd}, x{rs1}, {imm}"
-            else:
-                return f"I-type x{rd}, x{rs1}, {imm}"
-                
-        elif tipo == 'LW':
-            rd = data_dict.get('rd', 0)
-            rs1 = data_dict.get('rs1', 0)
-            imm = data_dict.get('imm', 0)
-            return f"LW x{rd}, {imm}(x{rs1})"
-            
-        elif tipo == 'SW':
-            rs1 = data_dict.get('rs1', 0)
-            rs2 = data_dict.get('rs2', 0)
-            imm = data_dict.get('imm', 0)
-            return f"SW x{rs2}, {imm}(x{rs1})"
-            
-        elif tipo == 'B':
-            funct3 = data_dict.get('funct3', 0)
-            rs1 = data_dict.get('rs1', 0)
-            rs2 = data_dict.get('rs2', 0)
-            imm = data_dict.get('imm', 0)
-            
-            if funct3 == 0:
-                return f"BEQ x{rs1}, x{rs2}, {imm}"
-            elif funct3 == 1:
-                return f"BNE x{rs1}, x{rs2}, {imm}"
-            else:
-                return f"B-type x{rs1}, x{rs2}, {imm}"
-                
-        elif tipo == 'J':
-            rd = data_dict.get('rd', 0)
-            imm = data_dict.get('imm', 0)
-            return f"JAL x{rd}, {imm}"
-            
-        return f"{tipo}-type"
+
+        # Todos os registradores de pipeline carregam o pc da instrução, então o
+        # texto vem direto da instrução pré-decodificada
+        pc = data_dict.get('pc')
+        if pc is None or not 0 <= pc // 4 < len(self.decodificadas):
+            return f"{data_dict['tipo']}-type"
+        if desmontador is not None:
+            return desmontador.texto(self.instrucoes[pc // 4], pc)
+        return desmontar(self.decodificadas[pc // 4])
     
 
     # etapas --------------------------------------------------
 
     def etapa_IF (self):
+        IF_ID = self.IF_ID
+        if self.parado:
+            # IF_ID mantém a instrução que o ID não pôde consumir
+            self.parado = False
+            if self.espera_if:
+                self.espera_if -= 1
+            return None
+        if self.espera_if:
+            self.espera_if -= 1
+            IF_ID.valido = False
+            return None
         if self.pc >= len(self.instrucoes) * 4:
             self.fim = True
-            self.IF_ID = {}
+            IF_ID.valido = False
             return None
+
+        if self.cache_instrucoes is not None:
+            if self.pc_liberado != self.pc:
+                penalidade = self.cache_instrucoes.acessar(self.pc)
+                if penalidade:
+                    self.contadores.ciclos_espera_icache += penalidade
+                    self.espera_if = penalidade - 1
+                    self.pc_liberado = self.pc
+                    IF_ID.valido = False
+                    return None
+            self.pc_liberado = None
         
-        instrucao = self.instrucoes[self.pc // 4]
-        self.IF_ID = {'instrucao': instrucao, 'pc': self.pc}
-        self.pc += 4
+        IF_ID.valido = True
+        IF_ID.instrucao = self.instrucoes[self.pc // 4]
+        IF_ID.pc = self.pc
+        if self.preditor is None:
+            self.pc += 4
+        else:
+            self.pc = self.preditor.prever(self.pc, self.decodificadas[self.pc // 4])
+        IF_ID.previsto = self.pc
 
 
     def etapa_ID (self):
-        if not self.IF_ID:
-            self.ID_EX = {}
+        IF_ID = self.IF_ID
+        ID_EX = self.ID_EX
+        if not IF_ID.valido:
+            ID_EX.valido = False
             return None
         
-        instr = self.IF_ID['instrucao']
-        opcode = instr & 0x7F
-
-        if opcode == 0b0110011:  # Tipo R
-            self.ID_EX = {
-                'tipo': 'R',
-                'rd': (instr >> 7) & 0x1F,
-                'funct3': (instr >> 12) & 0x7,
-                'rs1': (instr >> 15) & 0x1F,
-                'rs2': (instr >> 20) & 0x1F,
-                'funct7': (instr >> 25) & 0x7F
-            }
-
-        elif opcode == 0b0010011:  # Tipo I (ex: ADDI)
-            imm = (instr >> 20) & 0xFFF
-            imm = imm - 4096 if imm & 0x800 else imm
-            self.ID_EX = {
-                'tipo': 'I',
-                'rd': (instr >> 7) & 0x1F,
-                'funct3': (instr >> 12) & 0x7,
-                'rs1': (instr >> 15) & 0x1F,
-                'imm': imm
-            }
-
-        elif opcode == 0b0000011:  # LW
-            imm = (instr >> 20) & 0xFFF
-            imm = imm - 4096 if imm & 0x800 else imm
-            self.ID_EX = {
-                'tipo': 'LW',
-                'rd': (instr >> 7) & 0x1F,
-                'funct3': (instr >> 12) & 0x7,
-                'rs1': (instr >> 15) & 0x1F,
-                'rs2': (instr >> 20) & 0x1F,
-                'imm': imm
-            }
-
-        elif opcode == 0b0100011:  # SW
-            imm11_5 = (instr >> 25) & 0x7F
-            imm4_0 = (instr >> 7) & 0x1F
-            imm = (imm11_5 << 5) | imm4_0
-            imm = imm - 4096 if imm & 0x800 else imm
-            self.ID_EX = {
-                'tipo': 'SW',
-                'funct3': (instr >> 12) & 0x7,
-                'rs1': (instr >> 15) & 0x1F,
-                'rs2': (instr >> 20) & 0x1F,
-                'imm': imm
-            }
-
-        elif opcode == 0b1100011:  # BEQ, BNE (Tipo B)
-            imm12 = (instr >> 31) & 0x1
-            imm10_5 = (instr >> 25) & 0x3F
-            imm4_1 = (instr >> 8) & 0xF
-            imm11 = (instr >> 7) & 0x1
-            imm = (imm12 << 12) | (imm11 << 11) | (imm10_5 << 5) | (imm4_1 << 1)
-            imm = imm - 8192 if imm & 0x1000 else imm
-            self.ID_EX = {
-                'tipo': 'B',
-                'funct3': (instr >> 12) & 0x7,
-                'rs1': (instr >> 15) & 0x1F,
-                'rs2': (instr >> 20) & 0x1F,
-                'imm': imm,
-                'pc': self.IF_ID['pc']
-            }
-
-        elif opcode == 0b1101111:  # JAL (Tipo J)
-            rd = (instr >> 7) & 0x1F
-            imm = (
-                ((instr >> 31) & 0x1) << 20 |
-                ((instr >> 21) & 0x3FF) << 1 |
-                ((instr >> 20) & 0x1) << 11 |
-                ((instr >> 12) & 0xFF) << 12
-            )
-            imm = imm - (1 << 21) if imm & (1 << 20) else imm
-            self.ID_EX = {
-                'tipo': 'J',
-                'rd': rd,
-                'imm': imm,
-                'pc': self.IF_ID['pc']
-            }
-
-        else:
+        d = self.decodificadas[IF_ID.pc // 4]
+        if d.tipo is None:
             print("opcode não suportado!")
-            self.ID_EX = {}
+            ID_EX.valido = False
+            return None
+
+        if self.detectar_load_use and self.hazard_load_use(d):
+            ID_EX.valido = False
+            self.parado = True
+            self.contadores.bolhas_load_use += 1
+            return None
 
+        ID_EX.valido = True
+        ID_EX.pc = IF_ID.pc
+        ID_EX.previsto = IF_ID.previsto
+        (ID_EX.tipo, ID_EX.rd, ID_EX.rs1, ID_EX.rs2,
+         ID_EX.funct3, ID_EX.funct7, ID_EX.imm, ID_EX.instrucao) = d
+
+        if self.estagio_desvio == 'ID':
+            # Nada mais novo foi buscado ainda: basta corrigir o pc antes do IF
+            if d.tipo == 'B':
+                rs1, rs2 = self.operandos_id(d)
+                self.resolver_desvio(ID_EX, condicao_desvio(d.funct3, rs1, rs2), ID_EX.pc + d.imm)
+            elif d.tipo == 'J':
+                self.resolver_desvio(ID_EX, True, ID_EX.pc + d.imm)
+
+    def operandos_id(self, d):
+        """Valores de rs1 e rs2 para comparar um desvio já no ID.
+
+        O banco tem o resultado de três instruções atrás; com forwarding
+        MEM_WB e EX_MEM (já atualizados neste ciclo) cobrem as duas anteriores.
+        Um JAL escreve o rd no MEM, então só falta o que acabou de passar pelo
+        EX (o resultado dele é o endereço de retorno).
+        """
+        rs1 = self.bancoReg[d.rs1]
+        rs2 = self.bancoReg[d.rs2]
+        if self.forwarding:
+            for latch, tipos in ((self.MEM_WB, ('R', 'I', 'LW')), (self.EX_MEM, ('R', 'I', 'J'))):
+                if latch.valido and latch.rd != 0 and latch.tipo in tipos:
+                    if latch.rd == d.rs1:
+                        rs1 = latch.resultado
+                    if latch.rd == d.rs2:
+                        rs2 = latch.resultado
+        return rs1, rs2
+
+    def resolver_desvio(self, latch, desviou, alvo):
+        """Confere a previsão feita no IF para o desvio em latch.
+
+        Atualiza o preditor e as estatísticas; se errou, põe no pc o caminho
+        certo e devolve True para o estágio descartar as instruções mais novas.
+        """
+        correto = alvo if desviou else latch.pc + 4
+        acertou = correto == latch.previsto
+        if self.preditor is not None:
+            self.preditor.atualizar(latch.pc, self.decodificadas[latch.pc // 4], desviou, alvo)
+        self.estatisticas_desvio.registrar(latch.pc, acertou, desviou)
+        if acertou:
+            return False
+        self.pc = correto
+        return True
+
+    def descartar(self, *latches):
+        """Invalida os registradores de pipeline, contando as instruções perdidas"""
+        for latch in latches:
+            if latch.valido:
+                self.contadores.instrucoes_descartadas += 1
+                latch.valido = False
+
+
+    def hazard_load_use(self, d):
+        """Indica se a instrução d depende de um load que acabou de passar pelo EX.
+
+        Como os estágios rodam de trás para frente, quando o ID executa o load
+        já está em EX_MEM e o valor só sai do MEM no próximo ciclo.
+        """
+        EX_MEM = self.EX_MEM
+        if not EX_MEM.valido or EX_MEM.tipo != 'LW' or EX_MEM.rd == 0 or d.tipo == 'J':
+            return False
+        return EX_MEM.rd == d.rs1 or (EX_MEM.rd == d.rs2 and d.tipo in TIPOS_COM_RS2)
 
     def etapa_EX (self):
-        if not self.ID_EX:
-            self.EX_MEM = {}
+        ID_EX = self.ID_EX
+        EX_MEM = self.EX_MEM
+        if not ID_EX.valido:
+            EX_MEM.valido = False
             return None
         
-        tipo = self.ID_EX['tipo']
+        # O WB já rodou neste ciclo, então o banco tem o resultado de duas
+        # instruções atrás (o caminho MEM/WB). A instrução imediatamente anterior
+        # ainda está em EX_MEM e só é vista com forwarding
+        rs1 = self.bancoReg[ID_EX.rs1]
+        rs2 = self.bancoReg[ID_EX.rs2]
+        if (self.forwarding and EX_MEM.valido and EX_MEM.rd != 0
+                and EX_MEM.tipo in ('R', 'I')):
+            if EX_MEM.rd == ID_EX.rs1:
+                rs1 = EX_MEM.resultado
+            if EX_MEM.rd == ID_EX.rs2:
+                rs2 = EX_MEM.resultado
+
+        EX_MEM.copiar_instrucao(ID_EX)
+        tipo = ID_EX.tipo
 
         if tipo == 'R':
-            rs1 = self.bancoReg[self.ID_EX['rs1']]
-            rs2 = self.bancoReg[self.ID_EX['rs2']]
-            funct3 = self.ID_EX['funct3']
-            funct7 = self.ID_EX['funct7']
-
-            if funct3 == 0b000:
-                if funct7 == 0b0000000:
-                    resultado = rs1 + rs2  # ADD
-                elif funct7 == 0b0100000:
-                    resultado = rs1 - rs2  # SUB
-                elif funct7 == 0b0000001:
-                    resultado = rs1 * rs2  # MUL
-                else:
-                    resultado = 0
-            elif funct3 == 0b100:
-                resultado = rs1 ^ rs2  # XOR
-            elif funct3 == 0b110:
-                resultado = rs1 | rs2  # OR
-            elif funct3 == 0b111:
-                resultado = rs1 & rs2  # AND
-            elif funct3 == 0b001:
-                resultado = rs1 << (rs2 & 0x1F)  # SLL
-            elif funct3 == 0b101:
-                resultado = rs1 >> (rs2 & 0x1F)  # SRL
-            elif funct3 == 0b100 and funct7 == 0b0000001:
-                resultado = rs1 % rs2  # REM
-            elif funct3 == 0b100 and funct7 == 0b0000001:
-                resultado = rs1 // rs2  # DIV
-            else:
-                resultado = 0
-
-            self.EX_MEM = {'tipo': 'R', 'rd': self.ID_EX['rd'], 'resultado': resultado, 'rs1': self.ID_EX['rs1'], 'rs2': self.ID_EX['rs2']}
-
+            EX_MEM.resultado = operacao_r(ID_EX.funct3, ID_EX.funct7, rs1, rs2)
 
         elif tipo == 'I':
-            rs1 = self.bancoReg[self.ID_EX['rs1']]
-            imm = self.ID_EX['imm']
-            resultado = rs1 + imm
-            self.EX_MEM = {'tipo': 'I', 'rd': self.ID_EX['rd'], 'resultado': resultado, 'imm': self.ID_EX['imm'], 'rs1': self.ID_EX['rs1']}
-
+            EX_MEM.resultado = rs1 + ID_EX.imm
 
         elif tipo == 'LW':
-            rs1 = self.bancoReg[self.ID_EX['rs1']]
-            endereco = rs1 + self.ID_EX['imm']
-            self.EX_MEM = {'tipo': 'LW', 'rd': self.ID_EX['rd'], 'endereco': endereco, 'imm': self.ID_EX['imm'], 'rs1': self.ID_EX['rs1'], 'rs2': self.ID_EX['rs2']}
+            EX_MEM.endereco = rs1 + ID_EX.imm
 
         elif tipo == 'SW':
-
-            rs1 = self.bancoReg[self.ID_EX['rs1']]
-            rs2 = self.bancoReg[self.ID_EX['rs2']]
-            endereco = rs1 + self.ID_EX['imm']
-            self.EX_MEM = {'tipo': 'SW', 'rs2_valor': rs2, 'endereco': endereco, 'imm': self.ID_EX['imm'], 'rs1': self.ID_EX['rs1']}
+            EX_MEM.rs2_valor = rs2
+            EX_MEM.endereco = rs1 + ID_EX.imm
 
         elif tipo == 'B':
-
-            rs1 = self.bancoReg[self.ID_EX['rs1']]
-            rs2 = self.bancoReg[self.ID_EX['rs2']]
-            desvia = False
-
-            if self.ID_EX['funct3'] == 0b000 and rs1 == rs2:  # BEQ
-                desvia = True
-            elif self.ID_EX['funct3'] == 0b001 and rs1 != rs2:  # BNE
-                desvia = True
-            elif self.ID_EX['funct3'] == 0b100 and rs1 < rs2:   # BLT
-                desvia = True
-            elif self.ID_EX['funct3'] == 0b101 and rs1 >= rs2:  # BGE
-                desvia = True
-            self.EX_MEM = {'tipo': 'B', 'desvia': desvia, 'novo_pc': self.ID_EX['pc'] + self.ID_EX['imm'], 'imm': self.ID_EX['imm'], 'rs1': self.ID_EX['rs1'], 'rs2': self.ID_EX['rs2']}
-            
+            EX_MEM.desvia = condicao_desvio(ID_EX.funct3, rs1, rs2)
+            EX_MEM.novo_pc = ID_EX.pc + ID_EX.imm
+            if self.estagio_desvio == 'EX' and self.resolver_desvio(EX_MEM, EX_MEM.desvia, EX_MEM.novo_pc):
+                self.descartar(self.IF_ID)
 
         elif tipo == 'J':
-            self.EX_MEM = {
-                'tipo': 'J',
-                'rd': self.ID_EX['rd'],
-                'pc_retorno': self.ID_EX['pc'] + 4,
-                'novo_pc': self.ID_EX['pc'] + self.ID_EX['imm'],
-                'imm': self.ID_EX['imm']
-            }
+            EX_MEM.resultado = EX_MEM.pc_retorno = ID_EX.pc + 4
+            EX_MEM.novo_pc = ID_EX.pc + ID_EX.imm
+            if self.estagio_desvio == 'EX' and self.resolver_desvio(EX_MEM, True, EX_MEM.novo_pc):
+                self.descartar(self.IF_ID)
 
 
     def etapa_MEM (self):
-        if not self.EX_MEM:
-            self.MEM_WB = {}
+        EX_MEM = self.EX_MEM
+        MEM_WB = self.MEM_WB
+        if not EX_MEM.valido:
+            MEM_WB.valido = False
             return None
         
-        tipo = self.EX_MEM['tipo']
+        tipo = EX_MEM.tipo
+        if self.cache_dados is not None and tipo in ('LW', 'SW'):
+            if not self.espera_mem and not self.mem_liberado:
+                penalidade = self.cache_dados.acessar(EX_MEM.endereco, tipo == 'SW')
+                if penalidade:
+                    self.contadores.ciclos_espera_dcache += penalidade
+                    self.espera_mem = penalidade
+                    self.mem_liberado = True
+            if self.espera_mem:
+                self.espera_mem -= 1
+                MEM_WB.valido = False
+                self.mem_parado = True
+                return None
+            self.mem_liberado = False
+
+        MEM_WB.copiar_instrucao(EX_MEM)
 
         if tipo == 'LW':
-            val = self.memoria_dados.get(self.EX_MEM['endereco'], 0)
-            self.MEM_WB = {'tipo': 'LW', 'rd': self.EX_MEM['rd'], 'resultado': val, 'imm': self.EX_MEM['imm'], 'rs1': self.EX_MEM['rs1'], 'rs2': self.EX_MEM['rs2']}
+            MEM_WB.resultado = self.memoria_dados.ler(EX_MEM.endereco, EX_MEM.funct3)
+            MEM_WB.endereco = EX_MEM.endereco
 
         elif tipo == 'SW':
-            self.memoria_dados[self.EX_MEM['endereco']] = self.EX_MEM['rs2_valor']
-            self.MEM_WB = {'tipo': 'SW', 'imm': self.EX_MEM['imm'], 'rs1': self.EX_MEM['rs1']}
+            self.memoria_dados.escrever(EX_MEM.endereco, EX_MEM.rs2_valor, EX_MEM.funct3)
+            MEM_WB.endereco = EX_MEM.endereco
+            MEM_WB.rs2_valor = EX_MEM.rs2_valor
 
-        elif tipo in ['R', 'I']:
-            self.MEM_WB = self.EX_MEM
+        elif tipo in ('R', 'I'):
+            MEM_WB.resultado = EX_MEM.resultado
 
         elif tipo == 'B':
-            if self.EX_MEM['desvia']:
-                self.pc = self.EX_MEM['novo_pc']
-                self.IF_ID = {}
-                self.ID_EX = {}
-            self.MEM_WB = {'tipo': 'B', 'rs1': self.EX_MEM['rs1'], 'rs2': self.EX_MEM['rs2'], 'imm': self.EX_MEM['imm']}
+            if self.estagio_desvio == 'MEM' and self.resolver_desvio(EX_MEM, EX_MEM.desvia, EX_MEM.novo_pc):
+                self.descartar(self.IF_ID, self.ID_EX)
 
         elif tipo == 'J':
-            if self.EX_MEM['rd'] != 0:
-                self.bancoReg[self.EX_MEM['rd']] = self.EX_MEM['pc_retorno']
-            self.pc = self.EX_MEM['novo_pc']
-            self.IF_ID = {}
-            self.ID_EX = {}
-            self.MEM_WB = {'tipo': 'J', 'imm': self.EX_MEM['imm']}
+            MEM_WB.resultado = EX_MEM.pc_retorno
+            if EX_MEM.rd != 0:
+                self.bancoReg[EX_MEM.rd] = EX_MEM.pc_retorno
+                self.regs_escritos.append(EX_MEM.rd)
+            if self.estagio_desvio == 'MEM' and self.resolver_desvio(EX_MEM, True, EX_MEM.novo_pc):
+                self.descartar(self.IF_ID, self.ID_EX)
 
         
     def etapa_WB (self):
-        if not self.MEM_WB:
+        MEM_WB = self.MEM_WB
+        if not MEM_WB.valido:
             return None
         
-        tipo = self.MEM_WB['tipo']
-        if tipo in ['R', 'I', 'LW']:
-            rd = self.MEM_WB['rd']
+        self.contadores.por_pc[MEM_WB.pc >> 2] += 1
+        if MEM_WB.tipo in ('R', 'I', 'LW'):
+            rd = MEM_WB.rd
             if rd != 0:
-                self.bancoReg[rd] = self.MEM_WB['resultado']
+                self.bancoReg[rd] = MEM_WB.resultado
+                self.regs_escritos.append(rd)
 
 
     # execução -------------------------------------------
 
 
     def executar_ciclo(self):
+        self.regs_escritos.clear()
+        self.memoria_dados.escritas.clear()
+        if self.modo == 'funcional':
+            if self.pc < len(self.decodificadas) * 4:
+                d = self.decodificadas[self.pc // 4]
+                if d.rd != 0 and d.tipo in ('R', 'I', 'LW', 'J'):
+                    self.regs_escritos.append(d.rd)
+            self.latches_alterados = []
+            self.executar_funcional(1)
+            return
+        if self.rastrear_latches:
+            antes = self.identificar_latches()
         self.etapa_WB()
         self.etapa_MEM()
-        self.etapa_EX()
-        self.etapa_ID()
-        self.etapa_IF()
+        if self.mem_parado:
+            self.mem_parado = False
+        else:
+            self.etapa_EX()
+            self.etapa_ID()
+            self.etapa_IF()
         self.ciclo += 1
+        if self.rastrear_latches:
+            depois = self.identificar_latches()
+            self.latches_alterados = [nome for nome, a, d in zip(self.NOMES_LATCHES, antes, depois) if a != d]
+
+    def identificar_latches(self):
+        """pc da instrução em cada registrador de pipeline (None se vazio).
+
+        Uma instrução só fica dois ciclos seguidos no mesmo registrador quando o
+        pipeline para, e aí o conteúdo não muda; então o pc basta para saber se
+        o registrador mudou.
+        """
+        return (self.IF_ID.pc if self.IF_ID.valido else None,
+                self.ID_EX.pc if self.ID_EX.valido else None,
+                self.EX_MEM.pc if self.EX_MEM.valido else None,
+                self.MEM_WB.pc if self.MEM_WB.valido else None)
+
+    def executar_funcional(self, max_instrucoes=None, tradutor=None):
+        """Executa as instruções direto sobre bancoReg/memoria_dados, sem pipeline.
+
+        Cada instrução conta como um ciclo. Devolve quantas instruções foram
+        executadas. Com um Tradutor (tradutor.py) os blocos básicos executados
+        mais de uma vez rodam como funções Python geradas, com o mesmo resultado.
+        """
+        if tradutor is not None:
+            return tradutor.executar(self, max_instrucoes)
+        regs = self.bancoReg
+        memoria = self.memoria_dados
+        memoria.escritas.clear()
+        escritas = memoria.escritas
+        # Palavras lidas e escritas direto no buffer enquanto couberem nele;
+        # o resto (bytes, meias palavras, endereços fora do buffer e escritas
+        # anotadas pelo diário) passa por ler/escrever
+        dados = memoria.dados
+        ultima_leitura = len(dados) - 4
+        ultima_escrita = -1 if memoria.anteriores is not None else memoria.usados - 4
+        decodificadas = self.decodificadas
+        fim_texto = len(decodificadas) * 4
+        pc = inicio = self.pc
+        limite = -1 if max_instrucoes is None else max_instrucoes
+        executadas = 0
+        # Execuções por pc contadas por trecho em linha reta (ver Contadores)
+        trechos = self.contadores.trechos
+
+        # pc e ciclo ficam em variáveis locais; o finally os devolve também
+        # quando um acesso à memória falha, com o pc na instrução que falhou
+        try:
+            while pc < fim_texto and executadas != limite:
+                tipo, rd, rs1, rs2, funct3, funct7, imm, _ = decodificadas[pc >> 2]
+                executadas += 1
+
+                if tipo == 'I':
+                    if rd != 0:
+                        regs[rd] = regs[rs1] + imm
+                elif tipo == 'R':
+                    if rd != 0:
+                        if funct3 == 0 and funct7 == 0:
+                            regs[rd] = regs[rs1] + regs[rs2]  # ADD
+                        elif funct3 == 0 and funct7 == 0b0100000:
+                            regs[rd] = regs[rs1] - regs[rs2]  # SUB
+                        else:
+                            regs[rd] = operacao_r(funct3, funct7, regs[rs1], regs[rs2])
+                elif tipo == 'B':
+                    a, b = regs[rs1], regs[rs2]
+                    if (a != b if funct3 == 0b001 else a == b if funct3 == 0b000
+                            else condicao_desvio(funct3, a, b)):
+                        trechos[inicio >> 2] += 1
+                        trechos[(pc >> 2) + 1] -= 1
+                        pc = inicio = pc + imm
+                        continue
+                elif tipo == 'LW':
+                    endereco = regs[rs1] + imm
+                    if funct3 == 0b010 and 0 <= endereco <= ultima_leitura:
+                        valor = unpack_palavra(dados, endereco)[0]
+                    else:
+                        valor = memoria.ler(endereco, funct3)
+                    if rd != 0:
+                        regs[rd] = valor
+                elif tipo == 'SW':
+                    endereco = regs[rs1] + imm
+                    if funct3 == 0b010 and 0 <= endereco <= ultima_escrita:
+                        pack_palavra(dados, endereco, regs[rs2] & 0xFFFFFFFF)
+                        escritas.append(endereco)
+                    else:
+                        memoria.escrever(endereco, regs[rs2], funct3)
+                        # A escrita pode ter aumentado (ou trocado) o buffer
+                        dados = memoria.dados
+                        ultima_leitura = len(dados) - 4
+                        if memoria.anteriores is None:
+                            ultima_escrita = memoria.usados - 4
+                elif tipo == 'J':
+                    if rd != 0:
+                        regs[rd] = pc + 4
+                    trechos[inicio >> 2] += 1
+                    trechos[(pc >> 2) + 1] -= 1
+                    pc = inicio = pc + imm
+                    continue
+                else:
+                    print("opcode não suportado!")
+                pc += 4
+        except Exception:
+            # A instrução que falhou não foi executada
+            executadas -= 1
+            raise
+        finally:
+            if inicio < pc <= fim_texto:
+                trechos[inicio >> 2] += 1
+                trechos[pc >> 2] -= 1
+            self.pc = pc
+            self.ciclo += executadas
+            if pc >= fim_texto:
+                self.fim = True
+        return executadas
+
+    def executar_ate(self, pontos, max_ciclos=None):
+        """Executa até um breakpoint ou watchpoint de pontos (depuracao.PontosParada),
+        até o fim do programa ou até o ciclo max_ciclos.
+
+        Não imprime nem rastreia nada por ciclo: só as instruções dos pcs de
+        pontos.preparar() são conferidas, quando são concluídas. Devolve a
+        depuracao.Parada que interrompeu a execução, ou None.
+        """
+        interessantes = pontos.preparar(self)
+        limite = float('inf') if max_ciclos is None else max_ciclos
+        executar_ciclo = self.executar_ciclo
+        MEM_WB = self.MEM_WB
+        decodificadas = self.decodificadas
+        parada = None
+        rastrear_latches, self.rastrear_latches = self.rastrear_latches, False
+        funcional = self.modo == 'funcional'
+        try:
+            while self.ciclo < limite and not self.terminou():
+                if funcional:
+                    pc = self.pc
+                    if pc not in interessantes:
+                        executar_ciclo()
+                        continue
+                    d = decodificadas[pc >> 2]
+                    endereco = self.bancoReg[d.rs1] + d.imm
+                    valor_store = self.bancoReg[d.rs2]
+                    executar_ciclo()
+                    # Uma instrução por ciclo: o rd de agora é o que ela escreveu
+                    resultado = self.bancoReg[d.rd]
+                elif MEM_WB.valido and MEM_WB.pc in interessantes:
+                    # O WB deste ciclo conclui a instrução em MEM_WB; os valores
+                    # são lidos antes do ciclo, que pode escrever outros no MEM
+                    pc, endereco = MEM_WB.pc, MEM_WB.endereco
+                    resultado, valor_store = MEM_WB.resultado, MEM_WB.rs2_valor
+                    executar_ciclo()
+                else:
+                    executar_ciclo()
+                    continue
+                parada = pontos.verificar(self, pc, endereco, resultado, valor_store)
+                if parada is not None:
+                    break
+        finally:
+            self.rastrear_latches = rastrear_latches
+            pontos.ciclo = self.ciclo
+        return parada
+
+    def resumo_contadores(self, max_pcs=None):
+        """Métricas de desempenho da execução até aqui (ver contadores.resumir)"""
+        return resumir(self, max_pcs)
+
+    def salvar_estado(self, comprimir=False):
+        """Checkpoint do estado completo em bytes (ver checkpoint.py)"""
+        return checkpoint.salvar_estado(self, comprimir)
+
+    def restaurar_estado(self, dados):
+        """Volta ao estado de um checkpoint feito com o mesmo programa"""
+        checkpoint.restaurar_estado(self, dados)
+
+    def pipeline_vazio(self):
+        return not (self.IF_ID.valido or self.ID_EX.valido or
+                    self.EX_MEM.valido or self.MEM_WB.valido)
+
+    def terminou(self):
+        """Indica se não há mais instruções a buscar nem em voo no pipeline"""
+        return self.pc >= len(self.instrucoes) * 4 and self.pipeline_vazio()
+
+    def esvaziar_pipeline(self):
+        """Termina as instruções em voo sem buscar novas, deixando o pc na próxima instrução"""
+        while not self.pipeline_vazio():
+            self.etapa_WB()
+            self.etapa_MEM()
+            if self.mem_parado:
+                self.mem_parado = False
+            else:
+                self.etapa_EX()
+                self.etapa_ID()
+                if self.parado:
+                    self.parado = False
+                else:
+                    self.IF_ID.valido = False
+            self.ciclo += 1
+        # Uma busca que esperava a I-cache é refeita do zero
+        self.espera_if = 0
+        self.pc_liberado = None
+
+    def trocar_modo(self, modo):
+        """Troca o modo de execução no meio da simulação, preservando o estado"""
+        if modo not in self.MODOS:
+            raise ValueError(f"Modo de execução inválido: {modo}")
+        if self.modo == 'pipeline' and modo == 'funcional':
+            self.esvaziar_pipeline()
+        self.modo = modo
 
     def exibir_estado(self):
         print("Registradores:")
@@ -367,24 +758,35 @@ class Simulador:
         print("PC:", self.pc)
 
 
-    def executar(self):
-        self.IF_ID = {}
-        self.ID_EX = {}
-        self.EX_MEM = {}
-        self.MEM_WB = {}
-
-        while self.ciclo < 10000:
-            print(f"\nCiclo {self.ciclo}")      
-            self.executar_ciclo()
-            self.exibir_estado()
-
-            if (
-                self.pc >= len(self.instrucoes) * 4 and
-                not self.IF_ID and
-                not self.ID_EX and
-                not self.EX_MEM and
-                not self.MEM_WB
-            ):
-                break
+    def executar(self, max_ciclos=10000, trace='completo', intervalo=1, tradutor=None, gravador=None):
+        """Executa até o fim do programa ou até max_ciclos.
+
+        trace controla o que é impresso: 'nenhum', 'final' (só o estado final),
+        'intervalo' (a cada `intervalo` ciclos) ou 'completo' (todo ciclo).
+        tradutor só vale no modo funcional (ver executar_funcional).
+        gravador (GravadorTrace de trace_execucao.py) recebe um registro por
+        ciclo; no modo funcional, por instrução, sem o tradutor.
+        """
+        if trace not in self.NIVEIS_TRACE:
+            raise ValueError(f"Nível de trace inválido: {trace}")
+        if trace == 'completo':
+            intervalo = 1
+
+        while self.ciclo < max_ciclos and not self.terminou():
+            if gravador is not None:
+                self.executar_ciclo()
+                gravador.registrar(self)
+            elif self.modo == 'funcional':
+                # Sem trace por ciclo o modo funcional roda de uma vez só
+                passo = intervalo if trace in ('intervalo', 'completo') else max_ciclos
+                self.executar_funcional(min(passo, max_ciclos - self.ciclo), tradutor)
+            else:
+                self.executar_ciclo()
 
+            if trace in ('intervalo', 'completo') and self.ciclo % intervalo == 0:
+                print(f"\nCiclo {self.ciclo - 1}")
+                self.exibir_estado()
 
+        if trace == 'final':
+            print(f"\nCiclo {self.ciclo - 1}")
+            self.exibir_estado()
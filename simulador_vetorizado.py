@@ -0,0 +1,377 @@
+try:
+    import numpy as np
+except ImportError:  # o NumPy só é necessário para este módulo
+    np = None
+
+from decodificador import decodificar_programa
+from memoria import FORMATOS_LOAD, FORMATOS_STORE, PALAVRA, TAMANHO_PAGINA, Memoria
+from simulador import Simulador
+
+# Execução de N cópias do mesmo programa (uma seção .text e N imagens de .data)
+# em lockstep, com o NumPy: os registradores ficam em um array (32, N) e a
+# memória em um array (N, bytes), então cada instrução vira uma operação sobre
+# todas as instâncias de uma vez. Usado para corrigir trabalhos ou testar muitas
+# entradas do mesmo programa, com a semântica do modo funcional do Simulador.
+#
+# Enquanto todas as instâncias estão no mesmo pc o passo é uma instrução para
+# todas. Um desvio que vai para lados diferentes separa as instâncias pelo pc;
+# daí em diante cada passo executa a instrução do menor pc para o grupo de
+# instâncias que está nele, o que em laços e ifs estruturados faz os grupos se
+# reencontrarem logo depois do ponto de junção. Quando todas voltam ao mesmo pc
+# o lote converge de novo.
+#
+# Uma instância em um laço infinito em pc baixo deixaria as de pc maior paradas
+# para sempre; por isso, quando uma instância fica mais de ATRASO_MAXIMO
+# instruções atrás da mais adiantada, o grupo dela passa a executar primeiro.
+#
+# Diferença para o Simulador: os registradores têm 64 bits (no Simulador são
+# inteiros do Python, sem limite), o que só muda o resultado de programas cujos
+# valores passam de 64 bits (MUL ou SLL em cadeia), e os stores vão no máximo
+# até LIMITE_MEMORIA.
+
+# Maior endereço que um store pode escrever. A memória de todas as instâncias
+# tem a largura da maior delas, então um store em um endereço muito alto faria
+# a memória do lote inteiro crescer; a instância que tenta isso dá erro
+LIMITE_MEMORIA = 16 * 2**20
+
+# Diferença de instruções executadas a partir da qual a instância mais
+# atrasada passa na frente, conferida a cada PASSOS_VERIFICACAO passos
+ATRASO_MAXIMO = 1000
+PASSOS_VERIFICACAO = 256
+
+
+def paginas(tamanho):
+    """Tamanho arredondado para páginas inteiras (pelo menos uma)"""
+    return max(1, -(-tamanho // TAMANHO_PAGINA)) * TAMANHO_PAGINA
+
+
+def dividir(a, b):
+    """simulador.dividir sobre arrays de valores"""
+    divisor = np.where(b == 0, 1, b)
+    quociente = np.abs(a) // np.abs(divisor)
+    quociente = np.where((a < 0) != (divisor < 0), -quociente, quociente)
+    return np.where(b == 0, -1, quociente)
+
+
+def resto(a, b):
+    """simulador.resto sobre arrays de valores"""
+    return np.where(b == 0, a, a - b * dividir(a, b))
+
+
+def operacao_r(funct3, funct7, a, b):
+    """simulador.operacao_r sobre arrays de valores"""
+    if funct3 == 0b000:
+        if funct7 == 0b0000000:
+            return a + b  # ADD
+        elif funct7 == 0b0100000:
+            return a - b  # SUB
+        elif funct7 == 0b0000001:
+            return a * b  # MUL
+        return np.zeros_like(a)
+    elif funct3 == 0b100:
+        if funct7 == 0b0000001:
+            return dividir(a, b)  # DIV
+        return a ^ b  # XOR
+    elif funct3 == 0b110:
+        if funct7 == 0b0000001:
+            return resto(a, b)  # REM
+        return a | b  # OR
+    elif funct3 == 0b111:
+        return a & b  # AND
+    elif funct3 == 0b001:
+        return a << (b & 0x1F)  # SLL
+    elif funct3 == 0b101:
+        return a >> (b & 0x1F)  # SRL
+    return np.zeros_like(a)
+
+
+def condicao_desvio(funct3, a, b):
+    """simulador.condicao_desvio sobre arrays de valores"""
+    if funct3 == 0b000:  # BEQ
+        return a == b
+    elif funct3 == 0b001:  # BNE
+        return a != b
+    elif funct3 == 0b100:  # BLT
+        return a < b
+    elif funct3 == 0b101:  # BGE
+        return a >= b
+    return np.zeros(a.shape, dtype=bool)
+
+
+class SimuladorVetorizado:
+    """N instâncias de um programa, cada uma com a sua imagem de dados, executadas juntas.
+
+    imagens_dados é uma lista de caminhos de _data.bin ou de buffers (None é
+    uma memória vazia); file_text é o caminho do _text.bin ou o buffer da seção,
+    como no Simulador.
+    """
+
+    def __init__(self, imagens_dados, file_text):
+        if np is None:
+            raise ImportError("O SimuladorVetorizado precisa do NumPy (pip install numpy)")
+        memorias = [Memoria() if dados is None else Simulador.carregar_memoria(dados)
+                    for dados in imagens_dados]
+        if not memorias:
+            raise ValueError("Nenhuma imagem de dados para executar")
+        self.n = len(memorias)
+        self.decodificadas = decodificar_programa(Simulador.carregar_instrucoes(file_text))
+        self.fim_texto = len(self.decodificadas) * 4
+
+        # bancoReg[r] é o registrador r de todas as instâncias
+        self.bancoReg = np.zeros((32, self.n), dtype=np.int64)
+        self.carregados = np.array([len(m) for m in memorias], dtype=np.int64)
+        self.usados = self.carregados.copy()  # maior endereço escrito + 1, por instância
+        self.memoria = np.zeros((self.n, paginas(int(self.carregados.max()))), dtype=np.uint8)
+        for i, m in enumerate(memorias):
+            self.memoria[i, :len(m)] = np.frombuffer(bytes(m.dados[:len(m)]), dtype=np.uint8)
+        self.palavras = self.memoria.view('<i4')  # mesma memória, uma palavra por coluna
+
+        self.todas = np.arange(self.n)
+        self.pcs = np.zeros(self.n, dtype=np.int64)
+        self.executadas = np.zeros(self.n, dtype=np.int64)
+        self.ativas = np.ones(self.n, dtype=bool)  # não terminaram nem deram erro
+        self.erros = [None] * self.n
+        self.passos = 0
+        # pc comum às instâncias ativas e quais são (None: todas), enquanto
+        # estão convergentes; com as instâncias separadas pc é None e vale pcs
+        self.pc = 0
+        self.linhas = None
+
+    def executar(self, max_passos=None):
+        """Executa até todas as instâncias terminarem ou até max_passos passos.
+
+        Cada passo executa uma instrução para um grupo de instâncias no mesmo
+        pc, então nenhuma instância executa mais que max_passos instruções.
+        Devolve quantos passos foram dados.
+        """
+        limite = float('inf') if max_passos is None else max_passos
+        regs = self.bancoReg
+        decodificadas = self.decodificadas
+        fim_texto = self.fim_texto
+        passos = 0
+        convergentes = 0  # passos convergentes ainda não somados em executadas
+        ativos = None  # instâncias ativas com as instâncias separadas (None: recalcular)
+        atrasada = None  # instância que passa na frente até a próxima verificação
+        verificar = PASSOS_VERIFICACAO
+
+        try:
+            while passos < limite:
+                pc = self.pc
+                if pc is not None:
+                    linhas = self.linhas
+                    if pc >= fim_texto:
+                        self.ativas[self.todas if linhas is None else linhas] = False
+                        break
+                else:
+                    if ativos is None:
+                        ativos = np.flatnonzero(self.ativas)
+                        if not len(ativos):
+                            break
+                    pcs = self.pcs[ativos]
+                    verificar -= 1
+                    if not verificar:
+                        verificar = PASSOS_VERIFICACAO
+                        executadas = self.executadas[ativos]
+                        mais_atrasada = executadas.argmin()
+                        if executadas.max() - executadas[mais_atrasada] > ATRASO_MAXIMO:
+                            atrasada = ativos[mais_atrasada]
+                        else:
+                            atrasada = None
+                    if atrasada is not None and self.ativas[atrasada]:
+                        # Uma instância presa em um laço em pc menor não pode
+                        # deixar as outras sem executar
+                        pc = int(self.pcs[atrasada])
+                    else:
+                        pc = int(pcs.min())
+                    grupo = pcs == pc
+                    if grupo.all():
+                        self.pc = pc
+                        self.linhas = linhas = None if len(ativos) == self.n else ativos
+                        ativos = atrasada = None
+                    else:
+                        linhas = ativos[grupo]
+                sel = slice(None) if linhas is None else linhas
+
+                tipo, rd, rs1, rs2, funct3, funct7, imm, _ = decodificadas[pc >> 2]
+                proximo = pc + 4
+                if tipo == 'I':
+                    if rd != 0:
+                        regs[rd, sel] = regs[rs1, sel] + imm
+                elif tipo == 'R':
+                    if rd != 0:
+                        regs[rd, sel] = operacao_r(funct3, funct7, regs[rs1, sel], regs[rs2, sel])
+                elif tipo == 'LW' or tipo == 'SW':
+                    enderecos = regs[rs1, sel] + imm
+                    comum = int(enderecos[0])
+                    if (enderecos == comum).all():
+                        enderecos = comum  # o mesmo endereço em todas as instâncias do grupo
+                    invalidos = self.invalidos(sel, enderecos, tipo == 'SW')
+                    if invalidos is not None:
+                        convergentes = self.divergir(convergentes)
+                        self.falhar(*invalidos)
+                        ativos = None
+                        continue
+                    if tipo == 'LW':
+                        valores = self.ler(sel, enderecos, funct3)
+                        if rd != 0:
+                            regs[rd, sel] = valores
+                    else:
+                        self.escrever(sel, enderecos, regs[rs2, sel], funct3)
+                elif tipo == 'B':
+                    tomados = condicao_desvio(funct3, regs[rs1, sel], regs[rs2, sel])
+                    if tomados.all():
+                        proximo = pc + imm
+                    elif tomados.any():
+                        # As instâncias se separam: cada uma segue com o próprio pc
+                        convergentes = self.divergir(convergentes)
+                        proximo = np.where(tomados, pc + imm, pc + 4)
+                elif tipo == 'J':
+                    if rd != 0:
+                        regs[rd, sel] = pc + 4
+                    proximo = pc + imm
+                else:
+                    print("opcode não suportado!")
+                passos += 1
+
+                if self.pc is not None:
+                    self.pc = proximo
+                    convergentes += 1
+                    continue
+                indices = self.todas if linhas is None else linhas
+                self.executadas[indices] += 1
+                self.pcs[indices] = proximo
+                if isinstance(proximo, int):
+                    if proximo >= fim_texto:
+                        self.ativas[indices] = False
+                        ativos = None
+                else:
+                    terminadas = proximo >= fim_texto
+                    if terminadas.any():
+                        self.ativas[indices[terminadas]] = False
+                        ativos = None
+        finally:
+            self.sincronizar(convergentes)
+            self.passos += passos
+        return passos
+
+    def sincronizar(self, convergentes):
+        """Passa o pc comum e os passos convergentes para pcs e executadas"""
+        if self.pc is not None:
+            indices = self.todas if self.linhas is None else self.linhas
+            self.pcs[indices] = self.pc
+            self.executadas[indices] += convergentes
+        return 0
+
+    def divergir(self, convergentes):
+        """Sai do modo convergente; devolve o novo número de passos convergentes (0)"""
+        self.sincronizar(convergentes)
+        self.pc = None
+        self.linhas = None
+        return 0
+
+    def invalidos(self, sel, enderecos, store):
+        """(instâncias, endereços) dos acessos com endereço negativo ou, em um
+        store, além de LIMITE_MEMORIA; None se todos são válidos"""
+        maximo = LIMITE_MEMORIA - 4 if store else float('inf')
+        if isinstance(enderecos, int):
+            if 0 <= enderecos <= maximo:
+                return None
+            indices = self.todas[sel]
+            return indices, np.full(len(indices), enderecos)
+        ruins = (enderecos < 0) | (enderecos > maximo)
+        if not ruins.any():
+            return None
+        return self.todas[sel][ruins], enderecos[ruins]
+
+    def ler(self, sel, enderecos, funct3):
+        """Valor lido por cada instância de sel em seu endereço (ou no endereço
+        comum, um int), como Memoria.ler"""
+        formato = FORMATOS_LOAD.get(funct3, PALAVRA)
+        tamanho = self.memoria.shape[1]
+        if isinstance(enderecos, int):
+            if formato is PALAVRA and not enderecos & 3 and enderecos + 4 <= tamanho:
+                return self.palavras[sel, enderecos >> 2].astype(np.int64)
+            enderecos = np.full(len(self.todas[sel]), enderecos)
+        elif formato is PALAVRA and not (enderecos & 3).any() and int(enderecos.max()) + 4 <= tamanho:
+            posicoes = self.todas[sel] * self.palavras.shape[1] + (enderecos >> 2)
+            return self.palavras.reshape(-1).take(posicoes).astype(np.int64)
+
+        # Byte a byte; o que passa do fim da memória é lido como 0
+        indices = self.todas[sel]
+        valores = np.zeros(len(indices), dtype=np.int64)
+        for k in range(formato.size):
+            posicoes = enderecos + k
+            lidos = self.memoria[indices, np.minimum(posicoes, tamanho - 1)]
+            valores |= np.where(posicoes < tamanho, lidos, 0).astype(np.int64) << (8 * k)
+        if formato.format[-1].islower():  # LB, LH e LW estendem o sinal
+            sinal = 1 << (8 * formato.size - 1)
+            valores = (valores ^ sinal) - sinal
+        return valores
+
+    def escrever(self, sel, enderecos, valores, funct3):
+        """Cada instância de sel escreve seu valor em seu endereço (ou no
+        endereço comum, um int), como Memoria.escrever"""
+        formato, mascara = FORMATOS_STORE.get(funct3, FORMATOS_STORE[0b010])
+        fins = enderecos + formato.size
+        maior = fins if isinstance(fins, int) else int(fins.max())
+        if maior > self.memoria.shape[1]:
+            self.crescer(maior)
+        self.usados[sel] = np.maximum(self.usados[sel], fins)
+        if formato.size == 4:
+            palavras = (valores & mascara).astype(np.uint32).view(np.int32)
+            if isinstance(enderecos, int):
+                if not enderecos & 3:
+                    self.palavras[sel, enderecos >> 2] = palavras
+                    return
+            elif not (enderecos & 3).any():
+                posicoes = self.todas[sel] * self.palavras.shape[1] + (enderecos >> 2)
+                self.palavras.reshape(-1)[posicoes] = palavras
+                return
+        linhas = sel if isinstance(enderecos, int) else self.todas[sel]
+        for k in range(formato.size):
+            self.memoria[linhas, enderecos + k] = (valores >> (8 * k)) & 0xFF
+
+    def crescer(self, fim):
+        """Aumenta a memória de todas as instâncias para que os bytes até fim existam"""
+        memoria = np.zeros((self.n, paginas(max(fim, 2 * self.memoria.shape[1]))), dtype=np.uint8)
+        memoria[:, :self.memoria.shape[1]] = self.memoria
+        self.memoria = memoria
+        self.palavras = memoria.view('<i4')
+
+    def falhar(self, indices, enderecos):
+        """Tira do lote as instâncias que acessaram um endereço inválido ou além do limite"""
+        for i, endereco in zip(indices.tolist(), enderecos.tolist()):
+            if endereco < 0:
+                self.erros[i] = f"Endereço de memória inválido: {endereco}"
+            else:
+                self.erros[i] = f"Endereço além do limite de {LIMITE_MEMORIA} bytes por instância: {endereco}"
+        self.ativas[indices] = False
+
+    def terminou(self):
+        return not self.ativas.any()
+
+    def registradores(self, i):
+        return self.bancoReg[:, i].tolist()
+
+    def memoria_instancia(self, i):
+        """Memoria (memoria.py) com a imagem final da instância i"""
+        memoria = Memoria(self.memoria[i, :self.usados[i]].tobytes())
+        memoria.carregados = int(self.carregados[i])
+        return memoria
+
+    def resultado(self, i):
+        """Estado final da instância i, com o status e os campos do relatório de executar_lote"""
+        if self.erros[i] is not None:
+            status = 'erro'
+        elif self.ativas[i]:
+            status = 'limite_ciclos'
+        else:
+            status = 'ok'
+        return {
+            'status': status,
+            'instrucoes_retiradas': int(self.executadas[i]),
+            'pc': int(self.pcs[i]),
+            'erro': self.erros[i],
+            'registradores': self.registradores(i),
+            'memoria': {f"0x{endereco:08X}": valor for endereco, valor in self.memoria_instancia(i).palavras()},
+        }
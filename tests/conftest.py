@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Os módulos do simulador ficam na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from montador import Montador
+from simulador import Simulador
+
+
+@pytest.fixture
+def montar():
+    """Monta o código-fonte e devolve um Simulador: montar(fonte, **opcoes_do_simulador)"""
+    def montar(fonte, **opcoes):
+        dados, texto = Montador().montar_fonte(fonte)
+        return Simulador(dados, texto, **opcoes)
+    return montar
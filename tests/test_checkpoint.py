@@ -0,0 +1,67 @@
+import struct
+import zlib
+
+import pytest
+
+import checkpoint
+
+PROGRAMA = """
+.data
+vetor: .word 5, 3, 8, 1
+.text
+    ADDI x1, x0, 0
+    ADDI x2, x0, 16
+laco:
+    LW x3, 0(x1)
+    ADDI x3, x3, 10
+    SW x3, 0(x1)
+    ADDI x1, x1, 4
+    BLT x1, x2, laco
+"""
+
+
+def estado_final(simulador):
+    simulador.executar(10000, 'nenhum')
+    return simulador.ciclo, list(simulador.bancoReg), list(simulador.memoria_dados.palavras())
+
+
+@pytest.mark.parametrize('opcoes', [
+    {},
+    {'forwarding': True, 'detectar_load_use': True, 'preditor': 'bht2'},
+    {'modo': 'funcional'},
+])
+@pytest.mark.parametrize('comprimir', [False, True])
+def test_restaurar_refaz_a_mesma_execucao(montar, opcoes, comprimir):
+    simulador = montar(PROGRAMA, **opcoes)
+    simulador.executar(7, 'nenhum')
+    dados = simulador.salvar_estado(comprimir)
+    esperado = estado_final(simulador)
+
+    simulador.restaurar_estado(dados)
+    assert simulador.ciclo == 7
+    assert estado_final(simulador) == esperado
+
+
+def test_arquivo_em_outro_simulador(montar, tmp_path):
+    origem = montar(PROGRAMA)
+    origem.executar(12, 'nenhum')
+    caminho = tmp_path / 'estado.ck'
+    checkpoint.salvar_arquivo(origem, caminho)
+
+    destino = montar(PROGRAMA)
+    checkpoint.carregar_arquivo(destino, caminho)
+    assert destino.salvar_estado() == origem.salvar_estado()
+
+
+def test_checkpoint_de_outro_programa(montar):
+    dados = montar(PROGRAMA).salvar_estado()
+    with pytest.raises(ValueError, match="outro programa"):
+        montar(PROGRAMA.replace("ADDI x3, x3, 10", "ADDI x3, x3, 11")).restaurar_estado(dados)
+
+
+def test_crc_calculado_no_carregamento_igual_ao_do_arquivo(montar):
+    simulador = montar(PROGRAMA)
+    palavras = list(simulador.instrucoes)
+    esperado = zlib.crc32(struct.pack(f'<{len(palavras)}I', *palavras))
+    assert simulador.contadores.crc_programa == esperado
+    assert checkpoint.crc_programa(palavras) == esperado
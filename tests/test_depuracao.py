@@ -0,0 +1,65 @@
+import pytest
+
+from depuracao import PontosParada, palavra_apos_store
+
+MODOS = ('pipeline', 'funcional')
+
+# O JAL escreve x1 no MEM, no mesmo ciclo em que o ADDI é concluído no WB
+JAL_DEPOIS_DE_ADDI = """
+.text
+    ADDI x1, x0, 5
+    JAL x1, fim
+    ADDI x2, x0, 1
+fim:
+    ADDI x3, x0, 3
+"""
+
+# O segundo store escreve no MEM enquanto o primeiro é concluído no WB
+STORES_SEGUIDOS = """
+.data
+vigiada: .word 0
+.text
+    ADDI x5, x0, 7
+    ADDI x6, x0, 9
+    SW x5, 0(x0)
+    SW x6, 0(x0)
+    SB x5, 1(x0)
+"""
+
+
+def paradas(simulador, pontos):
+    encontradas = []
+    while (parada := simulador.executar_ate(pontos)) is not None:
+        encontradas.append((parada.pc, parada.anterior, parada.atual))
+    return encontradas
+
+
+@pytest.mark.parametrize('modo', MODOS)
+def test_registrador_vigiado_mostra_o_valor_da_propria_instrucao(montar, modo):
+    simulador = montar(JAL_DEPOIS_DE_ADDI, modo=modo)
+    pontos = PontosParada()
+    pontos.observar_registrador(1)
+    assert paradas(simulador, pontos) == [(0x0, 0, 5), (0x4, 5, 8)]
+
+
+@pytest.mark.parametrize('modo', MODOS)
+def test_memoria_vigiada_mostra_o_valor_do_proprio_store(montar, modo):
+    simulador = montar(STORES_SEGUIDOS, modo=modo, forwarding=True)
+    pontos = PontosParada()
+    pontos.observar_memoria(0)
+    assert paradas(simulador, pontos) == [(0x8, 0, 7), (0xC, 7, 9), (0x10, 9, 0x709)]
+
+
+@pytest.mark.parametrize('modo', MODOS)
+def test_acesso_a_registrador_lido(montar, modo):
+    simulador = montar(JAL_DEPOIS_DE_ADDI, modo=modo)
+    pontos = PontosParada()
+    pontos.observar_registrador(0, 'acesso')
+    # ADDI x1, x0, 5 lê x0; o JAL não lê registradores
+    assert paradas(simulador, pontos)[0] == (0x0, 0, 0)
+
+
+def test_palavra_apos_store_de_byte_e_meia_palavra():
+    assert palavra_apos_store(0x11223344, 0, 2, 0xAB, 0b000) == 0x11AB3344
+    assert palavra_apos_store(0x11223344, 4, 3, 0xBEEF, 0b001) == 0x112233BE
+    assert palavra_apos_store(0, 0, 0, -1, 0b010) == -1
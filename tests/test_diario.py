@@ -0,0 +1,98 @@
+import pytest
+
+from cache import criar_cache
+from diario import Diario
+
+# Soma de um vetor com um store por volta, para o diário ter memória a desfazer
+PROGRAMA = """
+.data
+vetor: .word 4, 8, 15, 16, 23, 42
+soma: .word 0
+.text
+    ADDI x1, x0, 0
+    ADDI x2, x0, 24
+    ADDI x4, x0, 0
+laco:
+    LW x3, 0(x1)
+    ADD x4, x4, x3
+    SW x4, 24(x0)
+    ADDI x1, x1, 4
+    BLT x1, x2, laco
+    SB x4, 25(x0)
+"""
+
+CONFIGURACOES = {
+    'pipeline': lambda: {},
+    'forwarding': lambda: {'forwarding': True, 'detectar_load_use': True, 'preditor': 'btfn'},
+    'funcional': lambda: {'modo': 'funcional'},
+    # Com cache o diário não é exato e volta sempre pelos checkpoints
+    'cache': lambda: {'forwarding': True, 'cache_dados': criar_cache('D', 'vias=2,penalidade=3')},
+}
+
+
+@pytest.fixture(params=sorted(CONFIGURACOES))
+def configuracao(request):
+    return CONFIGURACOES[request.param]
+
+
+def estado_no_ciclo(montar, opcoes, ciclo):
+    simulador = montar(PROGRAMA, **opcoes())
+    simulador.executar(ciclo, 'nenhum')
+    return simulador.salvar_estado()
+
+
+def test_ir_para_tras_e_para_frente(montar, configuracao):
+    simulador = montar(PROGRAMA, **configuracao())
+    diario = Diario(simulador, intervalo_checkpoint=7)
+    while not simulador.terminou():
+        diario.executar_ciclo()
+    fim = simulador.ciclo
+
+    # Alvos perto do fim desfazem registros; os distantes partem de um checkpoint
+    for alvo in (fim - 1, fim - 3, 20, 6, 0, 13, fim):
+        diario.ir_para(alvo)
+        assert simulador.ciclo == alvo
+        assert simulador.salvar_estado() == estado_no_ciclo(montar, configuracao, alvo)
+
+
+def test_exato_so_sem_cache_e_sem_tabelas(montar):
+    assert Diario(montar(PROGRAMA)).exato()
+    assert not Diario(montar(PROGRAMA, preditor='bht2')).exato()
+    assert not Diario(montar(PROGRAMA, cache_dados=criar_cache('D', 'vias=2'))).exato()
+
+
+def test_limite_descarta_os_ciclos_mais_antigos(montar):
+    simulador = montar(PROGRAMA)
+    diario = Diario(simulador, limite_bytes=20000, intervalo_checkpoint=10)
+    while not simulador.terminou():
+        diario.executar_ciclo()
+
+    assert diario.ciclo_mais_antigo > 0
+    assert diario.bytes_registros + diario.bytes_checkpoints <= 20000
+    with pytest.raises(ValueError):
+        diario.ir_para(diario.ciclo_mais_antigo - 1)
+    alvo = diario.ciclo_mais_antigo
+    diario.ir_para(alvo)
+    assert simulador.salvar_estado() == estado_no_ciclo(montar, CONFIGURACOES['pipeline'], alvo)
+
+
+def test_checkpoints_recebidos_de_outra_thread(montar):
+    simulador = montar(PROGRAMA)
+    diario = Diario(simulador, intervalo_checkpoint=5)
+    for _ in range(3):
+        diario.executar_ciclo()
+    # O que a thread do "Executar Tudo" faz: executa direto e manda os checkpoints
+    proximo = diario.proximo_checkpoint
+    recebidos = []
+    while not simulador.terminou():
+        simulador.executar_ciclo()
+        if simulador.ciclo >= proximo:
+            recebidos.append((simulador.ciclo, simulador.salvar_estado()))
+            proximo = simulador.ciclo + diario.intervalo_checkpoint
+    for ciclo, dados in recebidos:
+        diario.receber_checkpoint(ciclo, dados)
+    diario.sincronizar()
+
+    assert not diario.registros
+    diario.ir_para(12)
+    assert simulador.salvar_estado() == estado_no_ciclo(montar, CONFIGURACOES['pipeline'], 12)
@@ -0,0 +1,75 @@
+import pytest
+
+# Cada volta incrementa a palavra 0 e lê 4 bytes mais abaixo; a terceira volta
+# lê o endereço -4 e falha no LW de pc 0x18
+FALHA_NA_TERCEIRA_VOLTA = """
+.data
+contador: .word 0
+.text
+    ADDI x8, x0, 8
+laco:
+    LW x1, 0(x0)
+    ADDI x1, x1, 1
+    SW x1, 0(x0)
+    ADDI x7, x7, 1
+    ADDI x8, x8, -4
+    LW x3, 0(x8)
+    BEQ x0, x0, laco
+"""
+
+# Soma um vetor, guarda a soma depois do fim do .data (a memória cresce) e a relê
+SOMA_VETOR = """
+.data
+vetor: .word 3, -1, 4, 1, -5, 9
+.text
+    ADDI x1, x0, 0
+    ADDI x2, x0, 24
+laco:
+    LW x3, 0(x1)
+    ADD x4, x4, x3
+    SUB x5, x5, x3
+    ADDI x1, x1, 4
+    BNE x1, x2, laco
+    SW x4, 4096(x0)
+    SH x5, 4100(x0)
+    LW x6, 4096(x0)
+    LH x7, 4100(x0)
+"""
+
+
+def test_falha_deixa_pc_e_ciclo_na_instrucao_que_falhou(montar):
+    simulador = montar(FALHA_NA_TERCEIRA_VOLTA, modo='funcional')
+    with pytest.raises(ValueError, match="inválido"):
+        simulador.executar_funcional()
+
+    # Duas voltas completas, mais o ADDI inicial e as 5 instruções da terceira antes do LW
+    assert simulador.pc == 0x18
+    assert simulador.ciclo == 1 + 2 * 7 + 5
+    assert sum(simulador.contadores.execucoes()) == simulador.ciclo
+    assert simulador.bancoReg[1] == simulador.bancoReg[7] == 3
+    assert simulador.memoria_dados.ler_palavra(0) == 3
+    assert simulador.bancoReg[8] == -4
+
+
+def test_falha_com_limite_antes_da_instrucao(montar):
+    simulador = montar(FALHA_NA_TERCEIRA_VOLTA, modo='funcional')
+    assert simulador.executar_funcional(19) == 19
+    assert simulador.pc == 0x14
+    with pytest.raises(ValueError):
+        simulador.executar_funcional(5)
+    assert (simulador.pc, simulador.ciclo) == (0x18, 20)
+
+
+@pytest.mark.parametrize('passo', [None, 1, 3, 7])
+def test_igual_ao_pipeline(montar, passo):
+    pipeline = montar(SOMA_VETOR, forwarding=True, detectar_load_use=True)
+    pipeline.executar(10000, 'nenhum')
+
+    funcional = montar(SOMA_VETOR, modo='funcional')
+    while not funcional.terminou():
+        funcional.executar_funcional(passo)
+
+    assert funcional.bancoReg == pipeline.bancoReg
+    assert list(funcional.memoria_dados.palavras()) == list(pipeline.memoria_dados.palavras())
+    assert funcional.contadores.execucoes() == pipeline.contadores.execucoes()
+    assert (funcional.bancoReg[6], funcional.bancoReg[7]) == (11, -11)
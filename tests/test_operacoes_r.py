@@ -0,0 +1,59 @@
+import pytest
+
+from decodificador import decodificar, desmontar
+from montador import Montador
+from simulador import dividir, operacao_r, resto
+from tradutor import Tradutor
+
+# MUL, DIV e REM têm funct7 = 1 e o mesmo funct3 de ADD, XOR e OR: o funct7
+# precisa ser conferido antes de cair na operação lógica
+PROGRAMA = """
+.text
+    ADDI x10, x0, 2
+    ADDI x1, x0, 7
+    ADDI x2, x0, -2
+laco:
+    MUL x3, x1, x2
+    DIV x4, x1, x2
+    REM x5, x1, x2
+    XOR x6, x1, x2
+    OR x7, x1, x2
+    DIV x8, x1, x0
+    REM x9, x1, x0
+    ADDI x10, x10, -1
+    BNE x10, x0, laco
+"""
+
+ESPERADOS = {3: -14, 4: -3, 5: 1, 6: -7, 7: -1, 8: -1, 9: 7}
+
+
+@pytest.mark.parametrize('nome', ['MUL', 'DIV', 'REM', 'XOR', 'OR', 'ADD', 'SUB', 'AND'])
+def test_desmontar_segue_funct7(nome):
+    _, texto = Montador().montar_fonte(f".text\n{nome} x1, x2, x3\n")
+    assert desmontar(decodificar(int.from_bytes(texto, 'little'))) == f"{nome} x1, x2, x3"
+
+
+@pytest.mark.parametrize('modo, opcoes, traduzir', [
+    ('pipeline', {'forwarding': True, 'detectar_load_use': True}, False),
+    ('funcional', {}, False),
+    ('funcional', {}, True),
+], ids=['pipeline', 'funcional', 'traduzido'])
+def test_resultados_em_todos_os_modos(montar, modo, opcoes, traduzir):
+    simulador = montar(PROGRAMA, modo=modo, **opcoes)
+    tradutor = Tradutor(1) if traduzir else None
+    simulador.executar(1000, 'nenhum', tradutor=tradutor)
+    assert simulador.terminou()
+    assert {r: simulador.bancoReg[r] for r in ESPERADOS} == ESPERADOS
+    if traduzir:
+        assert tradutor.instrucoes_traduzidas > 0
+
+
+@pytest.mark.parametrize('a, b, quociente, sobra', [
+    (7, 2, 3, 1), (-7, 2, -3, -1), (7, -2, -3, 1), (-7, -2, 3, -1), (5, 0, -1, 5), (0, 3, 0, 0),
+])
+def test_divisao_trunca_em_direcao_a_zero(a, b, quociente, sobra):
+    assert dividir(a, b) == quociente
+    assert resto(a, b) == sobra
+    assert operacao_r(0b100, 0b0000001, a, b) == quociente
+    assert operacao_r(0b110, 0b0000001, a, b) == sobra
+    assert operacao_r(0b100, 0b0000000, a, b) == a ^ b
@@ -0,0 +1,99 @@
+import random
+import struct
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from montador import Montador
+from simulador import Simulador
+from simulador_vetorizado import SimuladorVetorizado
+
+# Soma os valores absolutos das n primeiras palavras (n é a palavra 0, então
+# cada instância dá um número de voltas diferente), divide pela última e grava
+# quociente, resto e um byte depois do fim do .data. A última palavra também é
+# um deslocamento: negativo demais, o LW final falha só naquela instância
+PROGRAMA = """
+.data
+n: .word 0
+vetor: .word 0, 0, 0, 0, 0, 0
+divisor: .word 0
+.text
+    LW x1, 0(x0)
+    ADDI x2, x0, 4
+    ADDI x4, x0, 0
+laco:
+    BGE x0, x1, fim
+    LW x3, 0(x2)
+    BGE x3, x0, positivo
+    SUB x3, x0, x3
+positivo:
+    ADD x4, x4, x3
+    ADDI x2, x2, 4
+    ADDI x1, x1, -1
+    BEQ x0, x0, laco
+fim:
+    LW x5, 28(x0)
+    DIV x6, x4, x5
+    REM x7, x4, x5
+    SW x6, 64(x0)
+    SH x7, 68(x0)
+    SB x4, 71(x0)
+    LH x8, 68(x0)
+    LBU x9, 71(x0)
+    ADD x10, x5, x5
+    LW x11, 8(x10)
+"""
+
+
+def imagens(quantidade, semente):
+    rnd = random.Random(semente)
+    for _ in range(quantidade):
+        palavras = [rnd.randint(0, 6)] + [rnd.randint(-50, 50) for _ in range(6)] + [rnd.randint(-9, 9)]
+        yield struct.pack('<8i', *palavras)
+
+
+def escalar(dados, texto):
+    """O que o Simulador no modo funcional dá para uma imagem, no formato de resultado()"""
+    simulador = Simulador(dados, texto, modo='funcional')
+    erro = None
+    try:
+        while not simulador.terminou():
+            simulador.executar_funcional()
+    except ValueError as e:
+        erro = str(e)
+    return {
+        'status': 'ok' if erro is None else 'erro',
+        'instrucoes_retiradas': simulador.ciclo,
+        'pc': simulador.pc,
+        'erro': erro,
+        'registradores': list(simulador.bancoReg),
+        'memoria': {f"0x{endereco:08X}": valor for endereco, valor in simulador.memoria_dados.palavras()},
+    }
+
+
+def test_cada_instancia_igual_ao_simulador_escalar():
+    _, texto = Montador().montar_fonte(PROGRAMA)
+    entradas = list(imagens(64, 'vetorizado'))
+    lote = SimuladorVetorizado(entradas, texto)
+    lote.executar()
+
+    esperados = [escalar(dados, texto) for dados in entradas]
+    # As entradas sorteadas cobrem desvios para os dois lados e a falha
+    assert {esperado['status'] for esperado in esperados} == {'ok', 'erro'}
+    assert len({esperado['instrucoes_retiradas'] for esperado in esperados}) > 1
+    for i, esperado in enumerate(esperados):
+        assert lote.resultado(i) == esperado, f"instância {i}"
+
+
+def test_limite_de_passos_para_no_mesmo_ponto():
+    _, texto = Montador().montar_fonte(PROGRAMA)
+    dados = next(imagens(1, 'limite'))
+    lote = SimuladorVetorizado([dados], texto)
+    lote.executar(max_passos=9)
+
+    simulador = Simulador(dados, texto, modo='funcional')
+    simulador.executar_funcional(9)
+    assert lote.resultado(0)['status'] == 'limite_ciclos'
+    assert lote.resultado(0)['pc'] == simulador.pc
+    assert lote.registradores(0) == simulador.bancoReg
@@ -0,0 +1,69 @@
+import pytest
+
+from tradutor import Tradutor
+
+# Laço de dois blocos (o BLT pula o SB na última volta) que desce x8 de 8 em 8
+# bytes. O LW em 0(x8) falha quando x8 fica negativo, no meio do laço traduzido
+# e depois de ele já ter escrito x8 e x7. O SB escreve depois do fim do .data,
+# fazendo a memória crescer
+FALHA_NO_LACO = """
+.data
+dados: .word 1, 2, 3, 4, 5, 6, 7, 8
+.text
+    ADDI x8, x0, 36
+    ADDI x9, x0, 0
+laco:
+    ADDI x8, x8, -8
+    ADDI x7, x7, 1
+    LW x1, 0(x8)
+    ADD x9, x9, x1
+    ADDI x2, x8, -12
+    BLT x2, x0, impar
+    SB x9, 2044(x0)
+impar:
+    SW x9, 0(x8)
+    BEQ x0, x0, laco
+"""
+
+
+def executar(simulador, tradutor, passo=None):
+    """Executa até o fim ou até a falha; devolve a mensagem do erro (ou None)"""
+    try:
+        while not simulador.terminou():
+            simulador.executar_funcional(passo, tradutor)
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def estado(simulador):
+    return (simulador.pc, simulador.ciclo, list(simulador.bancoReg),
+            list(simulador.memoria_dados.palavras()), simulador.contadores.execucoes())
+
+
+@pytest.mark.parametrize('passo', [None, 1, 5, 13])
+def test_falha_em_bloco_traduzido_igual_ao_interpretador(montar, passo):
+    interpretado = montar(FALHA_NO_LACO, modo='funcional')
+    erro = executar(interpretado, None, passo)
+    assert erro is not None
+
+    traduzido = montar(FALHA_NO_LACO, modo='funcional')
+    tradutor = Tradutor(1)
+    assert executar(traduzido, tradutor, passo) == erro
+    assert tradutor.instrucoes_traduzidas > 0
+    assert estado(traduzido) == estado(interpretado)
+    # O pc fica no LW que falhou, e o que as voltas anteriores escreveram ficou
+    assert traduzido.pc == 0x10
+    assert (traduzido.bancoReg[8], traduzido.bancoReg[7]) == (-4, 5)
+    assert traduzido.memoria_dados.ler(2044, 0b100) == 18
+
+
+def test_continua_interpretando_depois_da_falha(montar):
+    simulador = montar(FALHA_NO_LACO, modo='funcional')
+    tradutor = Tradutor(1)
+    executar(simulador, tradutor)
+    # Corrige o ponteiro e retoma do LW que falhou
+    simulador.bancoReg[8] = 0
+    assert simulador.executar_funcional(1, tradutor) == 1
+    assert simulador.pc == 0x14
+    assert simulador.bancoReg[1] == simulador.memoria_dados.ler_palavra(0)
@@ -0,0 +1,294 @@
+import struct
+from collections import namedtuple
+
+from decodificador import Desmontador, decodificar_programa
+
+# Trace de execução: um registro por ciclo com o pc da instrução em cada
+# estágio (IF, ID, EX, MEM, WB) e os registradores e palavras de memória
+# escritos no ciclo. O formato em texto é o *_saida.out da interface
+# (TextoTrace); o binário (GravadorTrace, LeitorTrace) guarda o mesmo conteúdo
+# em registros de tamanho fixo, gravados por Simulador.executar(..., gravador=...),
+# e converter_para_texto gera o *_saida.out a partir dele.
+#
+# Formato binário: CABECALHO, as palavras da seção .text, os labels do .text
+# (tamanho do nome, nome em UTF-8, pc) e as palavras iniciais da memória
+# (endereço, valor); depois os registros. Cada registro é REGISTRO (ciclo,
+# pc // 4 de cada estágio ou VAZIO, quantos registradores e quantas palavras
+# de memória), seguido de (registrador, valor) e (endereço, valor) de cada
+# escrita. Os pcs usam 16 bits quando o programa cabe neles.
+
+MAGICO = b'RVTR'
+VERSAO = 1
+# mágico, versão, largura dos pcs ('H' ou 'I'), instruções, labels, palavras de memória
+CABECALHO = struct.Struct('<4sHcIII')
+INSTRUCAO = struct.Struct('<I')
+LABEL = struct.Struct('<HI')
+PALAVRA = struct.Struct('<Ii')
+ESCRITA_REGISTRADOR = struct.Struct('<Bq')
+ESCRITA_MEMORIA = struct.Struct('<II')
+# Registradores fora de 64 bits (o banco guarda inteiros sem limite): o número
+# do registrador com GRANDE ligado, o tamanho e os bytes do valor
+GRANDE = 0x80
+TAMANHO_GRANDE = struct.Struct('<I')
+
+# Bytes acumulados pelo GravadorTrace antes de ir para o arquivo
+TAMANHO_BUFFER = 1 << 20
+
+ESTAGIOS = ('IF', 'ID', 'EX', 'MEM', 'WB')
+# Máximo de combinações de pcs com o texto do pipeline guardado em TextoTrace
+MAX_TEXTOS_PIPELINE = 65536
+
+# Registro lido do trace: pcs é uma tupla (IF, ID, EX, MEM, WB) com None nos
+# estágios vazios; registradores e memoria são listas de (número/endereço, valor)
+Registro = namedtuple('Registro', ['ciclo', 'pcs', 'registradores', 'memoria'])
+
+
+def formatos(largura):
+    """(struct do registro, valor de estágio vazio) para a largura dos pcs"""
+    return struct.Struct(f'<I5{largura}BB'), (1 << (8 * struct.calcsize(largura))) - 1
+
+
+class TextoTrace:
+    """Texto do *_saida.out de um programa: cabeçalho e registro de cada ciclo.
+
+    Usado pela interface ao gravar o log e por converter_para_texto, para que
+    os dois produzam o mesmo texto.
+    """
+
+    def __init__(self, instrucoes, desmontador=None):
+        self.instrucoes = instrucoes
+        self.decodificadas = decodificar_programa(instrucoes)
+        self.desmontador = desmontador or Desmontador()
+        self.textos_pipeline = {}
+
+    def cabecalho(self, palavras):
+        """Início do arquivo com as palavras (endereço, valor) iniciais da memória"""
+        linhas = ["=== LOG DE EXECUÇÃO DO SIMULADOR RISC-V ===\n\n", "Estado inicial da memória:\n"]
+        for endereco, valor in palavras:
+            linhas.append(f"  0x{endereco:08X}: 0x{valor:08X}\n")
+        linhas.append("\n")
+        return ''.join(linhas)
+
+    def estagio(self, stage, pc):
+        """Formata a instrução no endereço pc (None: estágio vazio) para o log"""
+        if pc is None:
+            return "vazio"
+
+        instrucao = self.instrucoes[pc // 4]
+        assembly = self.desmontador.texto(instrucao, pc)
+        if stage == 'IF':
+            return f"0x{instrucao:08X} (PC: 0x{pc:08X}) {assembly}"
+        elif stage == 'WB':
+            d = self.decodificadas[pc // 4]
+            if d.tipo in ('R', 'I', 'LW') and d.rd != 0:
+                return f"{assembly} -> x{d.rd}"
+            else:
+                return f"{assembly} (sem write-back)"
+        return assembly
+
+    def pipeline(self, pcs):
+        """Linhas do pipeline para os pcs dos cinco estágios (guardadas por pcs)"""
+        texto = self.textos_pipeline.get(pcs)
+        if texto is None:
+            if len(self.textos_pipeline) >= MAX_TEXTOS_PIPELINE:
+                self.textos_pipeline.clear()
+            texto = self.textos_pipeline[pcs] = "Pipeline:\n" + ''.join(
+                f"  {stage}: {self.estagio(stage, pc)}\n" for stage, pc in zip(ESTAGIOS, pcs))
+        return texto
+
+    def registro(self, ciclo, pcs, registradores, memoria):
+        """Texto de um ciclo: pipeline e o que mudou nele"""
+        partes = [f"\n=== CICLO {ciclo} ===\n", self.pipeline(pcs)]
+
+        # Registradores escritos neste ciclo
+        if registradores:
+            partes.append("\nRegistradores alterados:\n")
+            for i, valor in registradores:
+                partes.append(f"  x{i}: {valor}\n")
+
+        # Palavras de memória escritas neste ciclo
+        if memoria:
+            partes.append("\nMemória alterada:\n")
+            for endereco, valor in memoria:
+                partes.append(f"  0x{endereco:08X}: 0x{valor & 0xFFFFFFFF:08X}\n")
+
+        return ''.join(partes)
+
+
+def palavras_escritas(memoria):
+    """(endereço, valor) das palavras tocadas pelas escritas do último ciclo"""
+    return [(endereco, memoria.ler_palavra(endereco)) for endereco in sorted({e & ~3 for e in memoria.escritas})]
+
+
+class GravadorTrace:
+    """Grava o trace binário de uma execução, acumulando os registros em um buffer.
+
+    Criado com o simulador antes de executar (o cabeçalho leva o programa, os
+    labels e a memória daquele momento) e passado para Simulador.executar,
+    que chama registrar depois de cada ciclo. fechar() grava o que falta.
+    """
+
+    def __init__(self, caminho, simulador, labels_texto=None, tamanho_buffer=TAMANHO_BUFFER):
+        instrucoes = simulador.instrucoes
+        largura = b'H' if len(instrucoes) < 0xFFFF else b'I'
+        self.registro, self.vazio = formatos(largura.decode())
+        self.tamanho_buffer = tamanho_buffer
+        self.registros = 0
+        # O WB de um ciclo mostra o que estava em MEM_WB antes dele
+        self.indice_wb = simulador.MEM_WB.pc >> 2 if simulador.MEM_WB.valido else self.vazio
+
+        labels = [(nome.encode('utf-8'), pc) for nome, pc in (labels_texto or {}).items()]
+        palavras = list(simulador.memoria_dados.palavras())
+        self.buffer = bytearray(CABECALHO.pack(MAGICO, VERSAO, largura, len(instrucoes), len(labels), len(palavras)))
+        self.buffer += struct.pack(f'<{len(instrucoes)}I', *instrucoes)
+        for nome, pc in labels:
+            self.buffer += LABEL.pack(len(nome), pc) + nome
+        for endereco, valor in palavras:
+            self.buffer += PALAVRA.pack(endereco, valor)
+        self.arquivo = open(caminho, 'wb')
+
+    def registrar(self, simulador):
+        """Acrescenta o registro do ciclo que o simulador acabou de executar"""
+        # O mesmo que identificar_latches, já como índice da instrução
+        vazio = self.vazio
+        if_id, id_ex, ex_mem, mem_wb = simulador.IF_ID, simulador.ID_EX, simulador.EX_MEM, simulador.MEM_WB
+        indice_wb = self.indice_wb
+        indice_mem = self.indice_wb = mem_wb.pc >> 2 if mem_wb.valido else vazio
+        regs = simulador.regs_escritos
+        memoria = simulador.memoria_dados
+        escritas = palavras_escritas(memoria) if memoria.escritas else ()
+
+        buffer = self.buffer
+        buffer += self.registro.pack(
+            simulador.ciclo, if_id.pc >> 2 if if_id.valido else vazio, id_ex.pc >> 2 if id_ex.valido else vazio,
+            ex_mem.pc >> 2 if ex_mem.valido else vazio, indice_mem, indice_wb, len(regs), len(escritas))
+        banco = simulador.bancoReg
+        for i in regs:
+            valor = banco[i]
+            try:
+                buffer += ESCRITA_REGISTRADOR.pack(i, valor)
+            except struct.error:
+                dados = valor.to_bytes(valor.bit_length() // 8 + 1, 'little', signed=True)
+                buffer += bytes((i | GRANDE,)) + TAMANHO_GRANDE.pack(len(dados)) + dados
+        for endereco, valor in escritas:
+            buffer += ESCRITA_MEMORIA.pack(endereco, valor & 0xFFFFFFFF)
+        self.registros += 1
+        if len(buffer) >= self.tamanho_buffer:
+            self.flush()
+
+    def flush(self):
+        self.arquivo.write(self.buffer)
+        self.buffer.clear()
+
+    def fechar(self):
+        if not self.arquivo.closed:
+            self.flush()
+            self.arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+
+class LeitorTrace:
+    """Lê um trace binário: o cabeçalho ao abrir e os registros sob demanda.
+
+    Iterar (ou chamar registros()) devolve um gerador de Registro que lê o
+    arquivo em blocos, sem carregá-lo inteiro.
+    """
+
+    TAMANHO_BLOCO = 1 << 20
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        with open(caminho, 'rb') as f:
+            cabecalho = f.read(CABECALHO.size)
+            if len(cabecalho) < CABECALHO.size:
+                raise ValueError(f"Trace incompleto: {caminho}")
+            magico, versao, largura, instrucoes, labels, palavras = CABECALHO.unpack(cabecalho)
+            if magico != MAGICO:
+                raise ValueError(f"Arquivo não é um trace binário: {caminho}")
+            if versao != VERSAO:
+                raise ValueError(f"Versão de trace não suportada: {versao}")
+            self.registro, self.vazio = formatos(largura.decode())
+            try:
+                self.instrucoes = list(struct.unpack(f'<{instrucoes}I', f.read(4 * instrucoes)))
+                self.labels = {}
+                for _ in range(labels):
+                    tamanho, pc = LABEL.unpack(f.read(LABEL.size))
+                    self.labels[f.read(tamanho).decode('utf-8')] = pc
+                self.memoria_inicial = [PALAVRA.unpack(f.read(PALAVRA.size)) for _ in range(palavras)]
+            except struct.error:
+                raise ValueError(f"Trace incompleto: {caminho}") from None
+            self.inicio = f.tell()
+
+    def __iter__(self):
+        return self.registros()
+
+    def registros(self):
+        """Gerador dos registros, na ordem dos ciclos"""
+        registro, vazio = self.registro, self.vazio
+        tamanho_registro = registro.size
+        with open(self.caminho, 'rb') as f:
+            f.seek(self.inicio)
+            dados = b''
+            pos = 0
+
+            def garantir(n):
+                # Deixa pelo menos n bytes a partir de pos (menos no fim do arquivo)
+                nonlocal dados, pos
+                if len(dados) - pos < n:
+                    dados = dados[pos:] + f.read(max(n, self.TAMANHO_BLOCO))
+                    pos = 0
+                return len(dados) - pos >= n
+
+            while garantir(tamanho_registro):
+                ciclo, *indices, num_regs, num_memoria = registro.unpack_from(dados, pos)
+                pos += tamanho_registro
+                pcs = tuple(None if i == vazio else i << 2 for i in indices)
+
+                regs = []
+                for _ in range(num_regs):
+                    if not garantir(ESCRITA_REGISTRADOR.size):
+                        raise ValueError("Trace truncado no meio de um registro")
+                    numero = dados[pos]
+                    if numero & GRANDE:
+                        tamanho, = TAMANHO_GRANDE.unpack_from(dados, pos + 1)
+                        pos += 1 + TAMANHO_GRANDE.size
+                        if not garantir(tamanho):
+                            raise ValueError("Trace truncado no meio de um registro")
+                        regs.append((numero & ~GRANDE, int.from_bytes(dados[pos:pos + tamanho], 'little', signed=True)))
+                        pos += tamanho
+                    else:
+                        regs.append(ESCRITA_REGISTRADOR.unpack_from(dados, pos))
+                        pos += ESCRITA_REGISTRADOR.size
+
+                memoria = []
+                if num_memoria:
+                    if not garantir(num_memoria * ESCRITA_MEMORIA.size):
+                        raise ValueError("Trace truncado no meio de um registro")
+                    for _ in range(num_memoria):
+                        memoria.append(ESCRITA_MEMORIA.unpack_from(dados, pos))
+                        pos += ESCRITA_MEMORIA.size
+                yield Registro(ciclo, pcs, regs, memoria)
+
+            if len(dados) > pos:
+                raise ValueError("Trace truncado no meio de um registro")
+
+
+def converter_para_texto(caminho_trace, caminho_saida):
+    """Gera o *_saida.out (o texto da interface) a partir de um trace binário.
+
+    Devolve quantos ciclos foram convertidos.
+    """
+    leitor = LeitorTrace(caminho_trace)
+    texto = TextoTrace(leitor.instrucoes, Desmontador(leitor.labels))
+    ciclos = 0
+    with open(caminho_saida, 'w', encoding='utf-8') as f:
+        f.write(texto.cabecalho(leitor.memoria_inicial))
+        for registro in leitor:
+            f.write(texto.registro(*registro) + "\n")
+            ciclos += 1
+    return ciclos
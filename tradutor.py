@@ -0,0 +1,417 @@
+from memoria import FORMATOS_STORE, PALAVRA
+from simulador import operacao_r
+
+# Tradução de blocos básicos para funções Python, usada pelo modo funcional
+# (Simulador.executar_funcional(..., tradutor=...)). Um bloco é a sequência de
+# instruções em linha reta que começa em um pc e termina no primeiro desvio ou
+# JAL (ou no fim da seção .text). Na segunda vez que a execução chega ao início
+# de um bloco ele é traduzido para o código-fonte de uma função, compilado com
+# compile() e guardado pelo pc inicial. Se o bloco é o início de um laço (algum
+# desvio logo adiante volta para ele), a função leva os blocos do corpo do laço
+# inteiro e passa de um para outro sem voltar ao tradutor. Os registradores
+# ficam em variáveis locais, sem as cadeias de if por tipo e funct3, e loads e
+# stores de palavras vão direto ao buffer da memória quando o endereço cabe
+# nele (os demais usam ler/escrever). Blocos executados uma vez só (como em um
+# programa longo em linha reta) continuam interpretados, porque compilar custa
+# mais do que interpretar uma vez.
+#
+# A seção .text não é endereçável pelos stores, então um bloco só fica inválido
+# se o programa decodificado mudar: o tradutor descarta tudo quando recebe um
+# simulador com outras decodificadas, e invalidar(inicio, fim) descarta os
+# blocos que cobrem um trecho reescrito.
+#
+# Se um acesso à memória falha no meio de um bloco, a função devolve aos
+# registradores o que as instruções anteriores escreveram (os stores delas já
+# estão na memória) e o tradutor deixa pc, ciclo e contadores na instrução que
+# falhou, como o interpretador.
+#
+# Com os laços já traduzidos a execução fica entre 3,5x (bubble_sort, com
+# loads e stores em todo bloco) e 10x (laco_longo) mais rápida que o
+# interpretador; compilar leva alguns milissegundos por laço, então em
+# programas curtos (dezenas de milhares de instruções) o ganho total cai para
+# 1,2x a 2x. Ver benchmarks/benchmark_tradutor.py.
+
+# Vezes que a execução chega ao início de um bloco antes de ele ser traduzido
+LIMIAR_TRADUCAO = 2
+# Maior número de instruções em um bloco traduzido
+MAX_INSTRUCOES_BLOCO = 256
+
+# Expressão de cada (funct3, funct7) tipo R com o mesmo resultado de
+# operacao_r; as demais combinações chamam operacao_r
+EXPRESSOES_R = {
+    (0b000, 0b0000000): '{a} + {b}',          # ADD
+    (0b000, 0b0100000): '{a} - {b}',          # SUB
+    (0b000, 0b0000001): '{a} * {b}',          # MUL
+    (0b100, 0b0000000): '{a} ^ {b}',          # XOR
+    (0b110, 0b0000000): '{a} | {b}',          # OR
+    (0b111, 0b0000000): '{a} & {b}',          # AND
+    (0b001, 0b0000000): '{a} << ({b} & 0x1F)',  # SLL
+    (0b101, 0b0000000): '{a} >> ({b} & 0x1F)',  # SRL
+}
+
+# Condição de cada desvio (como em condicao_desvio)
+CONDICOES_DESVIO = {0b000: '==', 0b001: '!=', 0b100: '<', 0b101: '>='}
+
+
+unpack_palavra = PALAVRA.unpack_from
+pack_palavra = FORMATOS_STORE[0b010][0].pack_into
+
+# Início da função gerada para blocos com acesso à memória: o buffer e os
+# maiores endereços de palavra lidos e escritos direto nele (as escritas
+# anotadas pelo diário sempre passam por escrever)
+LIMITES_MEMORIA = [
+    "dados = m.dados",
+    "ultima_leitura = len(dados) - 4",
+    "ultima_escrita = m.usados - 4 if m.anteriores is None else -1",
+]
+
+
+class Bloco:
+    """Região traduzida: a função, os índices (pc // 4) das instruções e os trechos.
+
+    Uma região é um bloco básico ou, quando o bloco é o início de um laço, os
+    blocos do corpo do laço inteiro (ver regiao).
+    """
+
+    __slots__ = ('inicio', 'funcao', 'indices', 'trechos', 'fonte', 'linhas')
+
+    def __init__(self, inicio, funcao, indices, trechos, fonte, linhas):
+        self.inicio = inicio
+        self.funcao = funcao
+        self.indices = indices
+        self.trechos = trechos  # (índice inicial, tamanho) de cada bloco da região
+        self.fonte = fonte
+        self.linhas = linhas  # linha da fonte -> (bloco da região, posição da instrução nele)
+
+    def falha(self, erro, trechos):
+        """Conta nos trechos o que a chamada que levantou erro executou.
+
+        Devolve (pc da instrução que falhou, instruções concluídas).
+        """
+        tb = erro.__traceback__
+        while tb is not None and tb.tb_frame.f_code is not self.funcao.__code__:
+            tb = tb.tb_next
+        variaveis = tb.tb_frame.f_locals
+        bloco, posicao = self.linhas[tb.tb_lineno]
+        concluidas = 0
+        for k, (indice, tamanho) in enumerate(self.trechos):
+            # O bloco que falhou já tinha sido contado ao começar
+            vezes = variaveis[f"c{k}"] - (k == bloco)
+            trechos[indice] += vezes
+            trechos[indice + tamanho] -= vezes
+            concluidas += vezes * tamanho
+        indice = self.trechos[bloco][0]
+        if posicao:
+            trechos[indice] += 1
+            trechos[indice + posicao] -= 1
+        return (indice + posicao) << 2, concluidas + posicao
+
+
+def regiao(decodificadas, inicio):
+    """pcs iniciais dos blocos traduzidos juntos com o bloco que começa em inicio.
+
+    Se algum desvio ou JAL até MAX_INSTRUCOES_BLOCO instruções adiante volta
+    para inicio, a região tem os blocos alcançáveis a partir de inicio sem
+    sair do trecho até o último desses desvios; senão é só o bloco de inicio.
+    """
+    fim_texto = len(decodificadas) * 4
+    fim = None
+    for pc in range(inicio, min(fim_texto, inicio + 4 * MAX_INSTRUCOES_BLOCO), 4):
+        d = decodificadas[pc >> 2]
+        if d.tipo in ('B', 'J') and pc + d.imm == inicio:
+            fim = pc
+    if fim is None:
+        return [inicio]
+    inicios = [inicio]
+    total = 0
+    for pc in inicios:
+        total += Tradutor.tamanho_bloco(decodificadas, pc)
+        if total > MAX_INSTRUCOES_BLOCO:
+            return [inicio]
+        ultimo = pc + 4 * (Tradutor.tamanho_bloco(decodificadas, pc) - 1)
+        d = decodificadas[ultimo >> 2]
+        destinos = [ultimo + 4]
+        if d.tipo == 'J':
+            destinos = [ultimo + d.imm]
+        elif d.tipo == 'B':
+            destinos.append(ultimo + d.imm)
+        for destino in destinos:
+            if inicio <= destino <= fim and destino not in inicios:
+                inicios.append(destino)
+    return inicios
+
+
+def gerar_bloco(decodificadas, inicio, ler_reg, escrever_reg):
+    """Linhas de um bloco básico: (corpo, posição de cada linha, índices, pc seguinte).
+
+    O pc seguinte é uma expressão; ler_reg e escrever_reg anotam os
+    registradores usados e devolvem o nome da variável local.
+    """
+    fim_texto = len(decodificadas) * 4
+    corpo = []
+    posicoes = []
+    indices = []
+    escrever = lambda numero, expressao: corpo.append(f"{escrever_reg(numero)} = {expressao}")
+
+    def somar(rs1, imm):
+        if rs1 == 0:
+            return str(imm)
+        if imm == 0:
+            return ler_reg(rs1)
+        return f"{ler_reg(rs1)} {'-' if imm < 0 else '+'} {abs(imm)}"
+
+    pc = inicio
+    proximo = None
+    while proximo is None:
+        tipo, rd, rs1, rs2, funct3, funct7, imm, _ = decodificadas[pc >> 2]
+        indices.append(pc >> 2)
+        if tipo == 'I':
+            if rd != 0:
+                escrever(rd, somar(rs1, imm))
+        elif tipo == 'R':
+            a, b = ler_reg(rs1), ler_reg(rs2)
+            modelo = EXPRESSOES_R.get((funct3, funct7))
+            if modelo is None:
+                expressao = f"operacao_r({funct3}, {funct7}, {a}, {b})"
+                if rd != 0:
+                    escrever(rd, expressao)
+                else:
+                    corpo.append(expressao)
+            elif rd != 0:
+                escrever(rd, modelo.format(a=a, b=b))
+        elif tipo == 'LW':
+            # A leitura acontece mesmo com rd = x0 (um endereço inválido ainda é erro)
+            endereco = somar(rs1, imm)
+            if funct3 == 0b010:
+                corpo.append(f"e = {endereco}")
+                expressao = "unpack_palavra(dados, e)[0] if 0 <= e <= ultima_leitura else m.ler(e, 2)"
+            else:
+                expressao = f"m.ler({endereco}, {funct3})"
+            if rd != 0:
+                escrever(rd, expressao)
+            else:
+                corpo.append(expressao)
+        elif tipo == 'SW':
+            endereco, valor = somar(rs1, imm), ler_reg(rs2)
+            if funct3 == 0b010:
+                corpo += [f"e = {endereco}",
+                          "if 0 <= e <= ultima_escrita:",
+                          f"    pack_palavra(dados, e, {valor} & 0xFFFFFFFF)",
+                          "    m.escritas.append(e)",
+                          "else:",
+                          f"    m.escrever(e, {valor}, 2)"]
+                corpo += ["    " + linha for linha in LIMITES_MEMORIA]
+            else:
+                corpo.append(f"m.escrever({endereco}, {valor}, {funct3})")
+        elif tipo == 'B':
+            operador = CONDICOES_DESVIO.get(funct3)
+            if operador is None:
+                proximo = str(pc + 4)
+            else:
+                proximo = f"{pc + imm} if {ler_reg(rs1)} {operador} {ler_reg(rs2)} else {pc + 4}"
+        elif tipo == 'J':
+            if rd != 0:
+                escrever(rd, str(pc + 4))
+            proximo = str(pc + imm)
+        else:
+            corpo.append('print("opcode não suportado!")')
+        posicoes += [len(indices) - 1] * (len(corpo) - len(posicoes))
+
+        if proximo is None:
+            pc += 4
+            if pc >= fim_texto or len(indices) >= MAX_INSTRUCOES_BLOCO:
+                proximo = str(pc)
+    return corpo, posicoes, indices, proximo
+
+
+def gerar_fonte(decodificadas, inicio, nome='bloco'):
+    """Código-fonte da função que executa a região que começa em inicio.
+
+    A função recebe (r, m, t, limite): o banco de registradores, a memória de
+    dados, a lista Contadores.trechos e quantas instruções pode executar. Ela
+    repete os blocos da região enquanto o pc ficar neles e o limite permitir,
+    soma em t as execuções de cada bloco e devolve (pc seguinte, instruções
+    executadas); 0 instruções quando nem o primeiro bloco cabe no limite.
+    Devolve (fonte, índices das instruções, (índice inicial, tamanho) de cada
+    bloco, {linha da fonte: (bloco, posição da instrução nele)}).
+    """
+    lidos = []  # todos os registradores usados, carregados no início
+    escritos = []
+
+    def ler_reg(numero):
+        if numero == 0:
+            return '0'
+        if numero not in lidos:
+            lidos.append(numero)
+        return f"x{numero}"
+
+    def escrever_reg(numero):
+        ler_reg(numero)
+        if numero not in escritos:
+            escritos.append(numero)
+        return f"x{numero}"
+
+    casos = []
+    linhas = {}
+    indices = set()
+    trechos = []
+    memoria = False
+    for k, pc in enumerate(regiao(decodificadas, inicio)):
+        corpo, posicoes, indices_bloco, proximo = gerar_bloco(decodificadas, pc, ler_reg, escrever_reg)
+        indices.update(indices_bloco)
+        trechos.append((indices_bloco[0], len(indices_bloco)))
+        memoria = memoria or any('m.' in linha or 'dados' in linha for linha in corpo)
+        casos.append((pc, k, len(indices_bloco), corpo, posicoes, proximo))
+
+    fonte = [f"def {nome}(r, m, t, limite):"]
+    fonte += [f"    x{numero} = r[{numero}]" for numero in lidos]
+    if memoria:
+        fonte += ["    " + linha for linha in LIMITES_MEMORIA]
+    fonte += [f"    c{k} = 0" for k in range(len(casos))]
+    fonte += [f"    p = {inicio}", "    try:", "        while True:"]
+    for pc, k, tamanho, corpo, posicoes, proximo in casos:
+        fonte += [f"            {'if' if k == 0 else 'elif'} p == {pc}:",
+                  f"                limite -= {tamanho}",
+                  "                if limite < 0:",
+                  "                    break",
+                  f"                c{k} += 1"]
+        for linha, posicao in zip(corpo, posicoes):
+            linhas[len(fonte) + 1] = (k, posicao)
+            fonte.append("                " + linha)
+        fonte.append(f"                p = {proximo}")
+    fonte += ["            else:", "                break"]
+    # Uma falha no meio da região devolve os registradores já escritos
+    fonte.append("    except Exception:")
+    fonte += [f"        r[{numero}] = x{numero}" for numero in escritos]
+    fonte.append("        raise")
+    fonte += [f"    r[{numero}] = x{numero}" for numero in escritos]
+    for k, (indice, tamanho) in enumerate(trechos):
+        fonte += [f"    t[{indice}] += c{k}", f"    t[{indice + tamanho}] -= c{k}"]
+    executadas = " + ".join(f"c{k} * {tamanho}" for k, (_, tamanho) in enumerate(trechos))
+    fonte.append(f"    return p, {executadas}")
+    return "\n".join(fonte) + "\n", sorted(indices), trechos, linhas
+
+
+def compilar(decodificadas, inicio):
+    """Traduz e compila a região que começa em inicio"""
+    fonte, indices, trechos, linhas = gerar_fonte(decodificadas, inicio)
+    espaco = {'operacao_r': operacao_r, 'unpack_palavra': unpack_palavra, 'pack_palavra': pack_palavra}
+    exec(compile(fonte, f"<bloco 0x{inicio:08X}>", 'exec'), espaco)
+    return Bloco(inicio, espaco['bloco'], indices, trechos, fonte, linhas)
+
+
+class Tradutor:
+    """Cache de blocos traduzidos de um programa, indexada pelo pc inicial.
+
+    Passado para Simulador.executar_funcional (ou executar) em vez de ficar
+    guardado no simulador, como os PontosParada do executar_ate.
+    """
+
+    def __init__(self, limiar=LIMIAR_TRADUCAO):
+        self.limiar = limiar
+        self.blocos = {}
+        self.chegadas = {}  # pc inicial -> vezes que o bloco foi interpretado
+        self.programa = None  # decodificadas dos blocos traduzidos
+        self.traduzidos = 0
+        self.instrucoes_traduzidas = 0  # instruções executadas por blocos traduzidos
+
+    def invalidar(self, inicio=0, fim=None):
+        """Descarta os blocos com alguma instrução em [inicio, fim) (todos, por padrão)"""
+        if fim is None:
+            self.blocos.clear()
+            self.chegadas.clear()
+            return
+        primeiro, ultimo = inicio >> 2, (fim - 1) >> 2
+        for pc, bloco in list(self.blocos.items()):
+            if any(primeiro <= i <= ultimo for i in bloco.indices):
+                del self.blocos[pc]
+                self.chegadas.pop(pc, None)
+
+    def interpretar(self, simulador, instrucoes):
+        """Executa no interpretador do simulador sem perder as escritas já anotadas"""
+        memoria = simulador.memoria_dados
+        escritas = memoria.escritas
+        memoria.escritas = []
+        try:
+            return simulador.executar_funcional(instrucoes)
+        finally:
+            escritas.extend(memoria.escritas)
+            memoria.escritas = escritas
+
+    def executar(self, simulador, max_instrucoes=None):
+        """Executa como Simulador.executar_funcional, usando os blocos traduzidos.
+
+        Devolve quantas instruções foram executadas; pc, ciclo, contadores por
+        pc e o fim do programa ficam como se o interpretador tivesse rodado.
+        """
+        decodificadas = simulador.decodificadas
+        if decodificadas is not self.programa:
+            self.invalidar()
+            self.programa = decodificadas
+        memoria = simulador.memoria_dados
+        memoria.escritas.clear()
+        regs = simulador.bancoReg
+        fim_texto = len(decodificadas) * 4
+        blocos = self.blocos
+        chegadas = self.chegadas
+        restante = float('inf') if max_instrucoes is None else max_instrucoes
+        executadas = 0
+        trechos = simulador.contadores.trechos
+        traduzidas = 0
+
+        pc = simulador.pc
+        try:
+            while 0 <= pc < fim_texto and restante > 0:
+                bloco = blocos.get(pc)
+                if bloco is None:
+                    vezes = chegadas.get(pc, 0) + 1
+                    if vezes < self.limiar:
+                        # Bloco frio: interpretado até o desvio que o termina
+                        chegadas[pc] = vezes
+                        simulador.pc = pc
+                        try:
+                            n = self.interpretar(simulador, min(restante, self.tamanho_bloco(decodificadas, pc)))
+                        finally:
+                            pc = simulador.pc
+                        restante -= n
+                        executadas += n
+                        continue
+                    bloco = blocos[pc] = compilar(decodificadas, pc)
+                    chegadas.pop(pc, None)
+                    self.traduzidos += 1
+                try:
+                    pc, n = bloco.funcao(regs, memoria, trechos, restante)
+                except Exception as erro:
+                    # Para na instrução que falhou, como o interpretador
+                    pc, n = bloco.falha(erro, trechos)
+                    traduzidas += n
+                    raise
+                if not n:
+                    # Nem o primeiro bloco coube no limite
+                    break
+                traduzidas += n
+                restante -= n
+        finally:
+            self.instrucoes_traduzidas += traduzidas
+            simulador.pc = pc
+            simulador.ciclo += traduzidas
+
+        # O que sobrou (limite no meio de um bloco ou pc fora da seção .text)
+        # fica com o interpretador
+        if restante > 0 and pc < fim_texto:
+            executadas += self.interpretar(simulador, None if restante == float('inf') else restante)
+        if simulador.pc >= fim_texto:
+            simulador.fim = True
+        return executadas + traduzidas
+
+    @staticmethod
+    def tamanho_bloco(decodificadas, pc):
+        """Instruções do bloco que começa em pc (até o desvio ou JAL, inclusive)"""
+        fim_texto = len(decodificadas) * 4
+        tamanho = 0
+        while pc < fim_texto and tamanho < MAX_INSTRUCOES_BLOCO:
+            tamanho += 1
+            if decodificadas[pc >> 2].tipo in ('B', 'J'):
+                break
+            pc += 4
+        return tamanho
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Varre combinações de parâmetros da microarquitetura para um programa
+
+O programa é montado uma única vez e a imagem vai para cada processo do pool
+uma vez só, na criação do processo; as configurações (produto cartesiano dos
+valores de cada --parametro) rodam em paralelo. Os resultados ficam em um
+arquivo de cache indexado pelo hash do programa montado, pela configuração e
+pelo limite de ciclos, então rodar de novo só executa os pontos que faltam.
+
+Valores de um parâmetro são separados por '|' (as especificações de cache usam
+vírgulas); 'nenhum' desliga preditor e caches.
+
+Exemplos:
+    python varredura.py benchmarks/bubble_sort.asm -p forwarding=nao|sim -p preditor=nenhum|bht2|btb
+    python varredura.py programa.asm -p estagio_desvio=ID|EX|MEM -p detectar_load_use=sim -p forwarding=sim
+    python varredura.py programa.asm -p "cache_dados=nenhum|tamanho=1024,vias=1|tamanho=1024,vias=4" --csv varredura.csv
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Adicionar o diretório atual ao path para importar os módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cache import criar_cache
+from executar_lote import NOMES_CACHES
+from montador import Montador
+from preditor import PREDITORES
+from simulador import Simulador
+
+VERDADEIROS = ('sim', 's', 'true', '1', 'on')
+FALSOS = ('nao', 'não', 'n', 'false', '0', 'off')
+NENHUM = ('nenhum', 'none', '')
+
+
+def booleano(texto):
+    if texto.lower() in VERDADEIROS:
+        return True
+    if texto.lower() in FALSOS:
+        return False
+    raise ValueError(f"Valor booleano inválido: {texto}")
+
+
+def escolha(opcoes, opcional=False):
+    """Conversor que aceita só os valores dados (e 'nenhum', se opcional)"""
+    def converter(texto):
+        if opcional and texto.lower() in NENHUM:
+            return None
+        if texto not in opcoes:
+            raise ValueError(f"Valor inválido: {texto} (opções: {', '.join(opcoes)})")
+        return texto
+    return converter
+
+
+def especificacao_cache(texto):
+    if texto.lower() in NENHUM:
+        return None
+    criar_cache('cache', texto)  # só confere a especificação
+    return texto
+
+
+# Parâmetros do Simulador que podem ser varridos e como converter cada valor
+PARAMETROS = {
+    'modo': escolha(Simulador.MODOS),
+    'forwarding': booleano,
+    'detectar_load_use': booleano,
+    'preditor': escolha(list(PREDITORES), opcional=True),
+    'estagio_desvio': escolha(Simulador.ESTAGIOS_DESVIO),
+    'cache_instrucoes': especificacao_cache,
+    'cache_dados': especificacao_cache,
+}
+
+# Imagem (dados, texto) do programa no processo do worker, recebida uma única
+# vez em iniciar_worker
+_programa = None
+
+
+def ler_grade(parametros):
+    """Dict nome -> lista de valores a partir de textos 'nome=v1|v2|...'"""
+    grade = {}
+    for item in parametros:
+        nome, sep, valores = item.partition('=')
+        nome = nome.strip()
+        if not sep or nome not in PARAMETROS:
+            raise ValueError(f"Parâmetro inválido: {item} (parâmetros: {', '.join(PARAMETROS)})")
+        grade[nome] = [PARAMETROS[nome](valor.strip()) for valor in valores.split('|')]
+    return grade
+
+
+def configuracoes(grade):
+    """Produto cartesiano da grade, como dicts de opções do Simulador"""
+    nomes = list(grade)
+    return [dict(zip(nomes, valores)) for valores in itertools.product(*grade.values())]
+
+
+def hash_programa(dados, texto):
+    return hashlib.sha256(bytes(dados) + b'\0' + bytes(texto)).hexdigest()
+
+
+def chave_resultado(hash_prog, configuracao, max_ciclos):
+    return f"{hash_prog}:{max_ciclos}:{json.dumps(configuracao, sort_keys=True)}"
+
+
+def iniciar_worker(dados, texto):
+    global _programa
+    _programa = (dados, texto)
+
+
+def simular(configuracao, max_ciclos):
+    """Executa o programa do worker com uma configuração e devolve o resultado"""
+    opcoes = dict(configuracao)
+    for chave, nome in NOMES_CACHES.items():
+        if opcoes.get(chave) is not None:
+            opcoes[chave] = criar_cache(nome, opcoes[chave])
+    dados, texto = _programa
+    inicio = time.perf_counter()
+    simulador = Simulador(dados, texto, **opcoes)
+    simulador.executar(max_ciclos, 'nenhum')
+    resumo = simulador.resumo_contadores()
+    return {
+        'configuracao': configuracao,
+        'terminou': simulador.terminou(),
+        'ciclos': simulador.ciclo,
+        'instrucoes_retiradas': resumo['instrucoes_retiradas'],
+        'cpi': resumo['cpi'],
+        'bolhas': resumo['bolhas'],
+        'tempo_s': time.perf_counter() - inicio,
+    }
+
+
+def carregar_cache(caminho):
+    if not caminho or not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def salvar_cache(caminho, resultados):
+    # Grava em um arquivo temporário e troca, para não corromper o cache se a
+    # varredura for interrompida no meio da gravação
+    temporario = f"{caminho}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def varrer(dados, texto, configs, max_ciclos, processos=None, cache=None, ao_concluir=None):
+    """Resultados de cada configuração, na ordem de configs, usando e completando cache.
+
+    cache é um dict chave -> resultado (ver chave_resultado) que recebe os
+    pontos novos; ao_concluir(resultado) é chamado a cada ponto executado.
+    """
+    cache = {} if cache is None else cache
+    hash_prog = hash_programa(dados, texto)
+    chaves = [chave_resultado(hash_prog, configuracao, max_ciclos) for configuracao in configs]
+    pendentes = [i for i, chave in enumerate(chaves) if chave not in cache]
+
+    def concluir(indice, resultado):
+        cache[chaves[indice]] = resultado
+        if ao_concluir is not None:
+            ao_concluir(resultado)
+
+    if processos == 1 or len(pendentes) <= 1:
+        iniciar_worker(dados, texto)
+        for indice in pendentes:
+            concluir(indice, simular(configs[indice], max_ciclos))
+    elif pendentes:
+        with ProcessPoolExecutor(max_workers=min(processos or os.cpu_count(), len(pendentes)),
+                                 initializer=iniciar_worker, initargs=(bytes(dados), bytes(texto))) as executor:
+            jobs = {executor.submit(simular, configs[indice], max_ciclos): indice for indice in pendentes}
+            for job in as_completed(jobs):
+                concluir(jobs[job], job.result())
+    return [cache[chave] for chave in chaves], len(pendentes)
+
+
+def valor(v):
+    """Valor de parâmetro como escrito na linha de comando"""
+    if v is None:
+        return 'nenhum'
+    if isinstance(v, bool):
+        return 'sim' if v else 'nao'
+    return str(v)
+
+
+def formatar_tabela(resultados, nomes):
+    """Linhas de texto com uma coluna por parâmetro e os ciclos e o CPI de cada configuração"""
+    larguras = [max([len(nome)] + [len(valor(r['configuracao'][nome])) for r in resultados]) for nome in nomes]
+    cabecalho = ' '.join(f"{nome:<{largura}}" for nome, largura in zip(nomes, larguras))
+    linhas = [f"{cabecalho} {'ciclos':>10} {'instr':>10} {'CPI':>7}"]
+    for r in resultados:
+        colunas = ' '.join(f"{valor(r['configuracao'][nome]):<{largura}}" for nome, largura in zip(nomes, larguras))
+        aviso = '' if r['terminou'] else '  (limite de ciclos)'
+        linhas.append(f"{colunas} {r['ciclos']:>10} {r['instrucoes_retiradas']:>10} {r['cpi']:>7.3f}{aviso}")
+    return linhas
+
+
+def exportar_csv(resultados, nomes, caminho):
+    with open(caminho, 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(nomes + ['terminou', 'ciclos', 'instrucoes_retiradas', 'cpi', 'bolhas'])
+        for r in resultados:
+            escritor.writerow([r['configuracao'][nome] for nome in nomes]
+                              + [r['terminou'], r['ciclos'], r['instrucoes_retiradas'], r['cpi'], r['bolhas']])
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Varredura de parâmetros da microarquitetura")
+    parser.add_argument('arquivo', help="programa .asm")
+    parser.add_argument('-p', '--parametro', action='append', default=[], metavar='NOME=V1|V2',
+                        help=f"valores de um parâmetro ({', '.join(PARAMETROS)}); pode repetir")
+    parser.add_argument('--max-ciclos', type=int, default=1000000,
+                        help="limite de ciclos de cada configuração (padrão: 1000000)")
+    parser.add_argument('--processos', type=int, default=os.cpu_count(),
+                        help="processos em paralelo (padrão: número de núcleos)")
+    parser.add_argument('--cache', metavar='ARQUIVO',
+                        help="arquivo com os resultados já calculados (padrão: <arquivo>_varredura.json)")
+    parser.add_argument('--sem-cache', action='store_true',
+                        help="executa todos os pontos, sem ler nem gravar o cache")
+    parser.add_argument('--json', metavar='ARQUIVO', help="salva os resultados em JSON")
+    parser.add_argument('--csv', metavar='ARQUIVO', help="salva os resultados em CSV")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    if args.processos < 1:
+        print("Erro: --processos deve ser pelo menos 1", file=sys.stderr)
+        return 2
+    try:
+        grade = ler_grade(args.parametro)
+    except ValueError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 2
+
+    try:
+        dados, texto = Montador().montar(args.arquivo, gravar=False)
+    except (OSError, ValueError) as e:
+        print(f"Erro ao montar {args.arquivo}: {e}", file=sys.stderr)
+        return 1
+
+    caminho_cache = None if args.sem_cache else args.cache or f"{args.arquivo.rsplit('.', 1)[0]}_varredura.json"
+    cache = carregar_cache(caminho_cache)
+    configs = configuracoes(grade)
+    nomes = list(grade)
+
+    def mostrar(resultado):
+        descricao = ', '.join(f"{nome}={valor(resultado['configuracao'][nome])}" for nome in nomes) or 'padrão'
+        print(f"  {descricao}: {resultado['ciclos']} ciclos ({resultado['tempo_s']:.2f} s)")
+        if caminho_cache:
+            salvar_cache(caminho_cache, cache)
+
+    inicio = time.perf_counter()
+    resultados, executados = varrer(dados, texto, configs, args.max_ciclos, args.processos, cache, mostrar)
+    duracao = time.perf_counter() - inicio
+    print(f"\n{len(configs)} configurações, {executados} executadas e "
+          f"{len(configs) - executados} do cache, em {duracao:.2f} s\n")
+    print("\n".join(formatar_tabela(resultados, nomes)))
+
+    try:
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(resultados, f, ensure_ascii=False, indent=2)
+        if args.csv:
+            exportar_csv(resultados, nomes, args.csv)
+    except OSError as e:
+        print(f"Erro ao salvar os resultados: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())